@@ -0,0 +1,179 @@
+"""
+ benchParsing.py - CPU microbenchmarks for PyEdsby's response processing
+ (c) 2017 Charlton Trezevant - MIT License
+
+ Runs the pure-Python processing in edsby.py on synthetic payloads of growing size, with no network involved:
+ getClassAssignmentList's merge, getCurrentClasses/getAllClasses reshaping, parseInstanceMetadata's string
+ slicing and getCalendarEvents' merging. For each case it reports the best and mean time per call over
+ several repeats, and the peak memory allocated during one call (measured separately with tracemalloc, which
+ slows everything down). Compare runs before and after a change to a parser with:
+    python benchmarks/benchParsing.py --output before.json
+"""
+
+import argparse, json, os, platform, random, sys, time, tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import edsby
+from edsby import Edsby, CalendarSnapshot
+
+SIZES = (10, 100, 1000, 10000)
+
+"""
+    Returns an Edsby instance that never touches the network, for calling methods whose fetches are stubbed out.
+"""
+def offlineEdsby():
+    instance = Edsby.__new__(Edsby)
+    instance.edsbyHost = 'localhost'
+    instance.studentData = {'nid': 1, 'unid': 2}
+    return instance
+
+"""
+    Assignment scores and metadata for getClassAssignmentList, cycling through every format it handles:
+    numeric scores with dict or JSON-string weighting/columns, letter grades, and multi-part scores.
+"""
+def assignmentPayloads(size, rand):
+    scores, metadata = dict(), dict()
+    for i in range(size):
+        nid, rid = 100000 + i, 500000 + i
+        assignment = {'nid': nid, 'rid': rid, 'name': 'Assignment '+str(i), 'scheme': 'gs_outof', 'date': '2017-04-21',
+                      'graded': 1, 'published': '1', 'state': '0', 'type': '0', 'nodetype': 6, 'nodesubtype': 3}
+        kind = i % 4
+        if kind == 0: # Numeric score, dict weighting and columns
+            scores[str(nid)] = {'cols': {'0': rand.randint(0, 10)}}
+            assignment.update({'weighting': {'0': 10}, 'columns': {'0': 10}})
+        elif kind == 1: # Numeric score, JSON string weighting and columns
+            scores[str(nid)] = {'cols': {'0': rand.randint(0, 20)}}
+            assignment.update({'weighting': '{"0":20}', 'columns': '{"0":20}'})
+        elif kind == 2: # Letter grade
+            scores[str(nid)] = {'cols': {'0': rand.choice(('a', 'b+', 'c-'))}}
+            assignment.update({'scheme': 'gs_4levelplusminus', 'weighting': '{"0":1}', 'columns': '4'})
+        else: # Multi-part score
+            scores[str(nid)] = {'cols': {'0': rand.randint(0, 10), '1': rand.randint(0, 5)}}
+            assignment.update({'weighting': {'0': 10, '1': 5}, 'columns': '{"0":10,"1":5}'})
+        metadata['r'+str(rid)] = assignment
+    return scores, metadata
+
+def currentClassPayload(size, rand):
+    return dict(('r'+str(i), {'nid': i, 'rid': i + 1, 'class': {'details': {'course': 'Course '+str(i),
+                'info': {'code': 'C'+str(i), 'param': 'Teacher '+str(rand.randint(0, 99)), 'teachernid': 9000 + i}}}}) for i in range(size))
+
+def allClassPayload(size, rand):
+    return dict(('r'+str(i), {'nid': i, 'rid': i + 1, 'course': {'class': {'text': {'line1': 'Course '+str(i),
+                'line2': {'code': 'C'+str(i), 'name': 'Teacher '+str(rand.randint(0, 99))}}}}}) for i in range(size))
+
+"""
+    A homepage with `size` properties in its openSesame call, surrounded by a realistic amount of markup.
+"""
+def homepagePayload(size, rand):
+    props = ["nid: '1000'"] + ["prop%d: 'value%d'" % (i, rand.randint(0, 99999)) for i in range(size - 1)]
+    markup = '<div class="filler">' + 'x' * 64 + '</div>'
+    return '<html><head>' + markup * size + '<script>openSesame({' + ', '.join(props) + '})</script></head><body>' + markup * size + '</body></html>'
+
+def calendarPayload(size, rand):
+    common = dict((str(i), {'nid': i, 'name': 'Event '+str(i), 'sdate': '2017-04-%02d 12:00:00' % (i % 28 + 1)}) for i in range(size))
+    events = dict((str(i) + '.0', {'nid': i, 'name': 'Event '+str(i), 'details': 'x' * rand.randint(0, 200)}) for i in range(0, size, 2))
+    return {'common': common, 'events': events, 'due': dict(), 'overdue': dict(), 'schedules': dict()}
+
+"""
+    Every case, as (name, size, setup) where setup builds the payload and returns the function to time.
+"""
+def cases():
+    def assignmentList(size, rand):
+        instance = offlineEdsby()
+        scores, metadata = assignmentPayloads(size, rand)
+        instance.getClassAssignmentScores = lambda classNID, classRID: scores
+        instance.getClassAssignmentMetadata = lambda classNID: metadata
+        return lambda: instance.getClassAssignmentList(1, 2)
+
+    def currentClasses(size, rand):
+        payload = currentClassPayload(size, rand)
+        return lambda: edsby._parseCurrentClasses(payload)
+
+    def allClasses(size, rand):
+        payload = allClassPayload(size, rand)
+        return lambda: edsby._parseAllClasses(payload)
+
+    def instanceMetadata(size, rand):
+        instance = offlineEdsby()
+        page = type('Response', (object,), {'text': homepagePayload(size, rand)})()
+        instance._call = lambda name: page
+        return lambda: instance.parseInstanceMetadata()
+
+    def calendarEvents(size, rand):
+        snapshot = CalendarSnapshot(calendarPayload(size, rand))
+        return lambda: snapshot.getEvents()
+
+    setups = (('getClassAssignmentList', assignmentList), ('getCurrentClasses', currentClasses), ('getAllClasses', allClasses),
+              ('parseInstanceMetadata', instanceMetadata), ('getCalendarEvents', calendarEvents))
+    return [(name, size, setup) for name, setup in setups for size in SIZES]
+
+"""
+    Times func, calling it enough times per repeat to take at least minTime seconds, and returns
+    the per-call timings of every repeat.
+"""
+def timeCase(func, repeats, minTime):
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for i in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= minTime or loops >= 1000000:
+            break
+        loops *= 2 if elapsed == 0 else max(2, int(minTime / elapsed) + 1)
+    timings = [elapsed / loops]
+    for repeat in range(repeats - 1):
+        started = time.perf_counter()
+        for i in range(loops):
+            func()
+        timings.append((time.perf_counter() - started) / loops)
+    return loops, timings
+
+def peakAllocation(func):
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        func()
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+def runCase(name, size, setup, repeats, minTime):
+    func = setup(size, random.Random(size))
+    func() # Warm up
+    loops, timings = timeCase(func, repeats, minTime)
+    return {
+        'case': name,
+        'size': size,
+        'loops': loops,
+        'best_us': round(min(timings) * 1e6, 3),
+        'mean_us': round(sum(timings) / len(timings) * 1e6, 3),
+        'peak_bytes': peakAllocation(func)
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Microbenchmark PyEdsby's response processing on synthetic payloads.")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.1, help='Minimum seconds per repeat')
+    parser.add_argument('--case', action='append', help='Only run the named case(s)')
+    parser.add_argument('--output', default='parsing-results.json')
+    args = parser.parse_args()
+
+    results = {
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': vars(args),
+        'cases': list()
+    }
+    for name, size, setup in cases():
+        if args.case and name not in args.case:
+            continue
+        result = runCase(name, size, setup, args.repeats, args.min_time)
+        results['cases'].append(result)
+        print('%(case)-24s %(size)6d: %(best_us)12.1fus best, %(mean_us)12.1fus mean, %(peak_bytes)11d bytes peak' % result)
+
+    with open(args.output, 'w') as output:
+        json.dump(results, output, indent=2, sort_keys=True)
+    print('Results written to '+args.output)
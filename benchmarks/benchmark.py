@@ -0,0 +1,140 @@
+"""
+ benchmark.py - End-to-end benchmarks for PyEdsby, run against a local stand-in Edsby server
+ (c) 2017 Charlton Trezevant - MIT License
+
+ Measures login time, the latency of individual API methods, and the throughput of full student syncs
+ (EdsbyMirror.sync) at several levels of concurrency. Nothing leaves your machine: the server is started
+ on localhost (see standInServer.py). Results are printed, and written as JSON for regression tracking:
+    python benchmarks/benchmark.py --classes 8 --concurrency 1,4,16 --output results.json
+"""
+
+import argparse, json, os, platform, sys, threading, time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from edsby import Edsby, EdsbyMirror
+from standInServer import StandInData, StandInServer
+
+SYNC_DATASETS = ('classes', 'averages', 'assignments', 'rosters', 'feeds', 'calendar')
+
+"""
+    Summarizes a list of timings (in seconds) as milliseconds.
+"""
+def summarize(timings):
+    timings = sorted(timings)
+    percentile = lambda p: timings[min(len(timings) - 1, int(round(p * (len(timings) - 1))))]
+    return {
+        'count': len(timings),
+        'mean_ms': round(sum(timings) / len(timings) * 1000, 3),
+        'p50_ms': round(percentile(0.5) * 1000, 3),
+        'p95_ms': round(percentile(0.95) * 1000, 3),
+        'max_ms': round(timings[-1] * 1000, 3)
+    }
+
+def timeCalls(func, iterations):
+    timings = list()
+    for i in range(iterations):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return summarize(timings)
+
+def login(host):
+    return Edsby(host=host, scheme='http', username='student', password='password', catalogTTL=None) # Syncs refresh the catalog themselves
+
+def benchmarkLogin(host, iterations):
+    return timeCalls(lambda: login(host), iterations)
+
+def benchmarkMethods(host, iterations):
+    edsby = login(host)
+    classes = edsby.getCurrentClasses()
+    classNID = sorted(classes)[0]
+    classRID = classes[classNID]['rid']
+    methods = {
+        'getRawCurrentClassData': lambda: edsby.getRawCurrentClassData(),
+        'getRawClassData': lambda: edsby.getRawClassData(),
+        'getClassAverage': lambda: edsby.getClassAverage(classNID),
+        'getClassAssignmentList': lambda: edsby.getClassAssignmentList(classNID, classRID),
+        'getClassmates': lambda: edsby.getClassmates(classNID),
+        'getClassFeed': lambda: edsby.getClassFeed(classNID),
+        'getCalendarData': lambda: edsby.getCalendarData(),
+        'downloadAttachment': lambda: edsby._call('downloadAttachment', feedItemRID=1, feedItemNID=2, attachmentNID=3).content
+    }
+    return dict((name, timeCalls(methods[name], iterations)) for name in methods)
+
+"""
+    Logs in `concurrency` students, and has each of them run full syncs into their own in-memory mirror
+    until `syncs` syncs have been run between them.
+"""
+def benchmarkSync(host, concurrency, syncs, maxWorkers):
+    students = [login(host) for i in range(concurrency)]
+    remaining = [syncs]
+    lock = threading.Lock()
+    timings = list()
+
+    def student(edsby):
+        mirror = EdsbyMirror()
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+            started = time.perf_counter()
+            edsby.refreshClassCatalog()
+            mirror.sync(edsby, SYNC_DATASETS, maxWorkers)
+            with lock:
+                timings.append(time.perf_counter() - started)
+        mirror.close()
+
+    for edsby in students:
+        edsby.resetMetrics()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(student, students))
+    elapsed = time.perf_counter() - started
+
+    requests = sum(metrics['calls'] for edsby in students for metrics in edsby.getMetrics().values())
+    result = summarize(timings)
+    result.update({
+        'concurrency': concurrency,
+        'seconds': round(elapsed, 3),
+        'syncs_per_second': round(len(timings) / elapsed, 3),
+        'requests': requests,
+        'requests_per_second': round(requests / elapsed, 1)
+    })
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark PyEdsby against a local stand-in Edsby server.')
+    parser.add_argument('--classes', type=int, default=8)
+    parser.add_argument('--roster-size', type=int, default=30)
+    parser.add_argument('--feed-length', type=int, default=50)
+    parser.add_argument('--iterations', type=int, default=50, help='Calls per login/method measurement')
+    parser.add_argument('--syncs', type=int, default=20, help='Full student syncs per concurrency level')
+    parser.add_argument('--concurrency', default='1,4,16', help='Comma separated numbers of concurrent students')
+    parser.add_argument('--max-workers', type=int, default=4, help='Concurrent requests within each sync')
+    parser.add_argument('--output', default='benchmark-results.json')
+    args = parser.parse_args()
+
+    data = StandInData(args.classes, args.roster_size, args.feed_length)
+    with StandInServer(data) as server:
+        results = {
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'parameters': vars(args),
+            'login': benchmarkLogin(server.host, args.iterations),
+            'methods': benchmarkMethods(server.host, args.iterations),
+            'sync': [benchmarkSync(server.host, int(level), args.syncs, args.max_workers) for level in args.concurrency.split(',')]
+        }
+
+    print('login: %(mean_ms).1fms mean, %(p95_ms).1fms p95' % results['login'])
+    for name in sorted(results['methods']):
+        print(name+': %(mean_ms).2fms mean, %(p95_ms).2fms p95' % results['methods'][name])
+    for sync in results['sync']:
+        print('sync x%(concurrency)d: %(syncs_per_second).1f syncs/s, %(requests_per_second).0f requests/s, %(p95_ms).0fms p95' % sync)
+
+    with open(args.output, 'w') as output:
+        json.dump(results, output, indent=2, sort_keys=True)
+    print('Results written to '+args.output)
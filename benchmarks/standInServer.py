@@ -0,0 +1,355 @@
+"""
+ standInServer.py - A local stand-in for an Edsby instance, for benchmarking PyEdsby
+ (c) 2017 Charlton Trezevant - MIT License
+
+ Serves synthetic data from the endpoints PyEdsby uses most: the homepage (openSesame metadata), login
+ (fetchcryptdata/loginform), BaseStudentClasses, ClassPicker, MyWork, MyWorkAssessmentPane, MyWorkChart
+ (attendance), ClassStudentList, CourseFeed, Calendar and nodedl, plus enough of the rest (groups, messages,
+ notifications, activity, news, schedules, recipient lookups, link previews and attachment metadata) to run
+ the test suite against. The amount of data scales with the number of classes, roster size and feed length.
+ Responses are built once up front, so the server spends as little time as possible per request.
+
+ Run it on its own with:
+    python benchmarks/standInServer.py --port 8080 --classes 8
+ and point PyEdsby at it with:
+    Edsby(host='127.0.0.1:8080', scheme='http', username='student', password='password')
+"""
+
+import argparse, gzip, json, random, threading
+from datetime import date, timedelta
+
+try:
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+except ImportError: # Python < 3.7
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+
+try:
+    from urllib.parse import urlsplit, parse_qs
+except ImportError:
+    from urlparse import urlsplit, parse_qs
+
+INSTANCE_NID = 1000
+STUDENT_NID = 2000
+STUDENT_UNID = 2001
+
+"""
+    Synthetic data for one student: classes, each with a roster, a feed, a gradebook and attendance records,
+    groups, each with a feed and a member list, plus a calendar, a schedule, an inbox, notifications, activity
+    and news. Every response body is encoded to JSON once, here; use setBody to change one between requests.
+"""
+class StandInData(object):
+    firstNames = ('Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie', 'Avery', 'Quinn')
+    lastNames = ('Smith', 'Jones', 'Brown', 'Lee', 'Garcia', 'Martin', 'Clark', 'Lewis', 'Walker', 'Young')
+
+    def __init__(self, classes=8, rosterSize=30, feedLength=50, assignments=20, attachmentSize=65536, seed=1, groups=2, messages=20):
+        self.classes = classes
+        self.rosterSize = rosterSize
+        self.feedLength = feedLength
+        self.assignments = assignments
+        self.random = random.Random(seed)
+        self.classNIDs = [10000 + i for i in range(classes)]
+
+        self.bodies = {
+            'fetchcryptdata': self._encode({'slices': [{'_formkey': 'formkey', 'data': {'sauthdata': 'sauthdata'}}]}),
+            'loginform': self._encode({'unid': STUDENT_UNID, 'compiled': 1492092324, 'slices': [{'nid': STUDENT_NID, 'data': {
+                'name': 'Stand-in Student', 'guid': 'stand-in-guid', 'formkey': 'formkey'}}]}),
+            'BaseStudentClasses': self._encode({'slices': [{'data': {'classesContainer': {'classes': self._currentClasses()}}}]}),
+            'ClassPicker': self._encode({'slices': [{'data': {'classes': self._allClasses()}}]}),
+            'Calendar': self._encode({'slices': [{'data': {'caldata': self._calendar()}}]})
+        }
+        self.nodeBodies = dict() # class or group NID -> {xds: body}
+        for classNID in self.classNIDs:
+            terms, grades = self._gradebook(classNID)
+            self.nodeBodies[classNID] = {
+                'MyWork': self._encode({'slices': [{'data': {'loaddata': {'average': round(self.random.uniform(60, 100), 1), 'gradebook': {'terms': terms}}}}]}),
+                'MyWorkAssessmentPane': self._encode({'slices': [{'data': {'grades': grades}}]}),
+                'ClassStudentList': self._encode({'slices': [{'data': {'places': {'item': self._roster(classNID)}}}]}),
+                'CourseFeed': self._encode({'slices': [{'data': {'item': self._feed(classNID)}}]})
+            }
+        self.attachment = bytes(bytearray(self.random.getrandbits(8) for i in range(attachmentSize)))
+
+        # Everything below was added after the benchmarks were written, and is generated after them so the
+        # benchmark data doesn't change.
+        self.groupNIDs = [20000 + i for i in range(groups)]
+        self.recipients = self._recipients()
+        self.recipientLimit = None # Set to cut recipient lookups short, as Edsby does for broad searches
+        self.bodies.update({
+            'Messages': self._encode({'slices': [{'data': {'body': {'left': {'items': {'item': self._messages(messages)}}}}}]}),
+            'notifications': self._encode({'slices': [{'data': {'item': self._notifications()}}]}),
+            'BaseActivity': self._encode({'slices': [{'data': {'messages': {'item': self._feed(STUDENT_NID)}}}]}),
+            'scrollingNews': self._encode({'slices': [{'data': {'boxLayout': {'newsbox': {'item': self._news()}}}}]}),
+            'MyGroups': self._encode({'slices': [{'data': {'places': {'item': self._groups()}}}]}),
+            'AlbumFileView': self._encode({'slices': [{'data': {'contents': {'name': 'attachment.bin', 'size': attachmentSize}}}]}),
+            'CalendarPanelNav_Student': self._encode({'slices': [{'data': {'itemdata': self._schedule()}}]})
+        })
+        for i, classNID in enumerate(self.classNIDs):
+            self.nodeBodies[classNID].update({
+                # The last class has no attendance records, which Edsby sends as an empty string
+                'MyWorkChart': self._encode({'slices': [{'data': {'chartContainer': {'chart': {'attendanceRecords': {'data': {'right': {'records': {
+                    'incident': self._attendance(classNID) if i < classes - 1 else ''}}}}}}}}]}),
+                'CalendarPanel_Class': self._encode({'slices': [{'data': {'caldata': {'entries': self._classCalendar(classNID)}}}]})
+            })
+        for groupNID in self.groupNIDs:
+            self.nodeBodies[groupNID] = {
+                'PlaceFeed': self._encode({'slices': [{'data': {'item': self._feed(groupNID)}}]}),
+                'ConferenceMemberList': self._encode({'slices': [{'data': {'places': {'item': self._roster(groupNID)}}}]}),
+                'CalendarPanel_Place': self._encode({'slices': [{'data': {'caldata': {'entries': self._classCalendar(groupNID)}}}]})
+            }
+
+    """
+        Returns the decoded body served for xds, either the student's own or a class or group's (nid).
+    """
+    def getBody(self, xds, nid=None):
+        return json.loads((self.bodies if nid is None else self.nodeBodies[nid])[xds].decode('utf-8'))
+
+    """
+        Replaces the body served for xds (see getBody) with data, e.g. to change grades between two syncs.
+    """
+    def setBody(self, xds, data, nid=None):
+        (self.bodies if nid is None else self.nodeBodies[nid])[xds] = self._encode(data)
+
+    def _encode(self, data):
+        return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+    def _name(self):
+        return self.random.choice(self.firstNames), self.random.choice(self.lastNames)
+
+    def _currentClasses(self):
+        classes = dict()
+        for i, classNID in enumerate(self.classNIDs):
+            classes['r'+str(classNID + 1)] = {'nid': classNID, 'rid': classNID + 1, 'class': {'details': {
+                'course': 'Course '+str(i), 'info': {'code': 'C'+str(i), 'param': ' '.join(self._name()), 'teachernid': 50000 + i}}}}
+        return classes
+
+    def _allClasses(self):
+        classes = dict()
+        for i, classNID in enumerate(self.classNIDs):
+            classes['r'+str(classNID + 1)] = {'nid': classNID, 'rid': classNID + 1, 'course': {'class': {'text': {
+                'line1': 'Course '+str(i), 'line2': {'code': 'C'+str(i), 'name': ' '.join(self._name())}}}}}
+        return classes
+
+    def _gradebook(self, classNID):
+        terms, grades = dict(), dict()
+        for i in range(self.assignments):
+            nid, rid = classNID * 1000 + i, classNID * 1000 + 500 + i
+            terms['r'+str(rid)] = {'nid': nid, 'rid': rid, 'name': 'Assignment '+str(i), 'scheme': 'gs_outof', 'weighting': '{"0":10}',
+                                   'columns': '{"0":10}', 'date': '2017-04-%02d' % (i % 28 + 1), 'graded': 1, 'published': '1'}
+            grades[str(nid)] = {'cols': {'0': self.random.randint(0, 10)}}
+        return terms, grades
+
+    def _roster(self, classNID):
+        roster = dict()
+        for i in range(self.rosterSize):
+            firstName, lastName = self._name()
+            nid = 100000 + self.random.randint(0, self.rosterSize * self.classes) # Classmates share classes, as they would really
+            roster['r'+str(nid + 1)] = {'nid': nid, 'rid': nid + 1, 'FirstName': firstName, 'MName': '', 'LastName': lastName}
+        return roster
+
+    def _feed(self, classNID):
+        feed = dict()
+        for i in range(self.feedLength):
+            nid = classNID * 1000 + 700 + i
+            feed['r'+str(nid + 1)] = {'nid': nid, 'rid': nid + 1, 'nodetype': 4, 'nodesubtype': 0, 'author': ' '.join(self._name()),
+                                      'text': 'Post '+str(i)+' '+'lorem ipsum ' * self.random.randint(1, 20), 'cdate': '2017-04-%02d 08:00:00' % (i % 28 + 1)}
+        return feed
+
+    def _calendar(self):
+        today = date.today()
+        due, common, schedules = dict(), dict(), dict()
+        for i in range(self.classes * 4):
+            day = (today + timedelta(days=i)).strftime('%Y-%m-%d')
+            due['r'+str(i)] = {'nid': 60000 + i, 'name': 'Due '+str(i), 'ddate': day+' 23:59:00'}
+            common['r'+str(i)] = {'nid': 70000 + i, 'name': 'Event '+str(i), 'sdate': day+' 12:00:00', 'edate': day+' 13:00:00'}
+            schedules['r'+str(i)] = {'nid': 80000 + i, 'name': 'Day '+str(i % 2 + 1), 'sdate': day}
+        return {'due': due, 'overdue': dict(), 'common': common, 'events': dict(), 'schedules': schedules}
+
+    def _classCalendar(self, NID):
+        entries = dict()
+        today = date.today()
+        for i in range(4):
+            day = (today + timedelta(days=i * 7)).strftime('%Y-%m-%d')
+            entries['r'+str(i)] = {'nid': NID * 10 + i, 'name': 'Calendar entry '+str(i), 'sdate': day+' 09:00:00', 'edate': day+' 10:00:00'}
+        return entries
+
+    def _schedule(self):
+        periods = dict()
+        for i, classNID in enumerate(self.classNIDs[:4]):
+            start = 8 * 60 + 30 + i * 80 # Minutes after midnight, with 75 minute periods
+            periods['r'+str(i)] = {'nid': classNID, 'name': 'Course '+str(i), 'room': str(101 + i), 'stime': '%d:%02d' % divmod(start, 60),
+                                   'etime': '%d:%02d' % divmod(start + 75, 60)}
+        return periods
+
+    def _attendance(self, classNID):
+        incidents = dict()
+        for i in range(6):
+            incidents['r'+str(i)] = {'date': '2017-04-%02d' % (i * 3 + 3), 'code': ('Absent', 'Late', 'Present')[i % 3]}
+        return incidents
+
+    def _messages(self, count):
+        messages = dict()
+        for i in range(count):
+            nid = 90000 + i * 10
+            message = {'nid': nid, 'rid': nid + 1, 'author': ' '.join(self._name()), 'text': 'Message '+str(i)+' '+'lorem ipsum ' * self.random.randint(1, 5),
+                       'cdate': '2017-05-%02d 09:00:00' % (i % 28 + 1)}
+            if i % 4 == 0: # Every fourth message has a reply nested inside it
+                message['replies'] = {'item': {'r'+str(nid + 3): {'nid': nid + 2, 'rid': nid + 3, 'author': ' '.join(self._name()),
+                                                                 'text': 'Reply to message '+str(i), 'cdate': '2017-05-%02d 10:00:00' % (i % 28 + 1)}}}
+            messages['r'+str(nid + 1)] = message
+        return messages
+
+    def _notifications(self):
+        notifications = dict()
+        for i in range(5):
+            notifications['r'+str(95000 + i)] = {'nid': 95000 + i, 'text': 'Notification '+str(i), 'cdate': '2017-05-%02d 07:00:00' % (i + 1)}
+        return notifications
+
+    def _news(self):
+        news = dict()
+        for i in range(3):
+            news['r'+str(96000 + i)] = {'nid': 96000 + i, 'author': 'School Office', 'text': 'School news '+str(i), 'cdate': '2017-05-%02d 08:00:00' % (i + 1)}
+        return news
+
+    def _groups(self):
+        groups = dict()
+        for i, groupNID in enumerate(self.groupNIDs):
+            groups['r'+str(groupNID + 1)] = {'nid': groupNID, 'rid': groupNID + 1, 'nodetype': 3, 'nodesubtype': 1, 'summary': {
+                'name': 'Group '+str(i), 'about': {'type': 1, 'name': 'Group '+str(i)}, 'info': {'nposts': self.feedLength, 'nmembers': self.rosterSize}}}
+        return groups
+
+    def _recipients(self):
+        recipients = list()
+        for i in range(40):
+            firstName, lastName = self._name()
+            recipients.append({'nid': 110000 + i, 'name': firstName+' '+lastName})
+        return recipients
+
+    """
+        The body of a recipient lookup (msgUserPicker) for pattern, which matches any part of a name.
+        The total is always sent, so lookups cut short by recipientLimit can be told apart.
+    """
+    def lookUpRecipients(self, pattern):
+        matches = [recipient for recipient in self.recipients if pattern.lower() in recipient['name'].lower()]
+        items = matches[:self.recipientLimit] if self.recipientLimit is not None else matches
+        return self._encode({'slices': [{'data': {'item': dict(('r'+str(recipient['nid']), recipient) for recipient in items), 'total': len(matches)}}]})
+
+    """
+        The body of a link preview (bookMarkPreview) for url.
+    """
+    def scrapeURL(self, url):
+        return self._encode({'slices': [{'data': {'href': url, 'type': 'link', 'code': '', 'title': 'Preview of '+url, 'description': 'A stand-in page'}}]})
+
+
+"""
+    Answers requests from the prebuilt bodies in the server's StandInData.
+"""
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True # Otherwise headers and body in separate writes stall on delayed ACKs
+
+    def log_message(self, format, *args):
+        pass # Logging every request would make the server the bottleneck
+
+    def do_GET(self):
+        self.route('GET')
+
+    def do_POST(self):
+        length = int(self.headers.get('content-length') or 0)
+        if length > 0:
+            self.rfile.read(length)
+        self.route('POST')
+
+    def route(self, method):
+        data = self.server.data
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        query = parse_qs(url.query)
+        xds = query.get('xds', [None])[0]
+
+        if len(parts) == 0:
+            return self.respond(b"<html><script>openSesame({nid: '"+str(INSTANCE_NID).encode('ascii')+b"', base: 'BasePublic'})</script></html>", 'text/html')
+        if parts[:2] == ['core', 'login']:
+            if method == 'GET':
+                return self.respond(b'<html></html>', 'text/html', session='anonymous')
+            return self.respond(data.bodies['loginform'], session='stand-in-session')
+        if xds == 'fetchcryptdata':
+            return self.respond(data.bodies['fetchcryptdata'])
+
+        if 'session_id_edsby=' not in (self.headers.get('cookie') or ''):
+            return self.respond(b'{"error":1,"errorstr":"Not logged in"}', status=403)
+        if parts[:2] == ['core', 'nodedl']:
+            return self.respond(data.attachment, 'application/octet-stream')
+        if parts[:2] == ['core', 'node.json'] or parts[:2] == ['core', 'multinode.json']:
+            if xds == 'msgUserPicker':
+                return self.respond(data.lookUpRecipients(query.get('pattern', [''])[0]))
+            if xds in data.bodies:
+                return self.respond(data.bodies[xds])
+            NID = int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else None
+            if NID in data.nodeBodies and xds in data.nodeBodies[NID]:
+                return self.respond(data.nodeBodies[NID][xds])
+        if parts[:2] == ['load', 'embed.json'] and xds == 'bookMarkPreview':
+            return self.respond(data.scrapeURL(query.get('scrape', [''])[0]))
+        self.respond(b'{"error":1,"errorstr":"Not found"}', status=404)
+
+    def respond(self, body, contentType='application/json', status=200, session=None):
+        self.send_response(status)
+        self.send_header('Content-Type', contentType)
+        if self.server.compress and contentType == 'application/json' and 'gzip' in (self.headers.get('accept-encoding') or ''):
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        if session is not None:
+            self.send_header('Set-Cookie', 'session_id_edsby='+session+'; Path=/')
+        self.end_headers()
+        self.wfile.write(body)
+
+
+"""
+    Runs the stand-in server in a background thread. port=0 picks a free port; host holds the
+    address to pass to Edsby once it's started. With compress set, JSON responses are gzipped for
+    clients that accept it.
+"""
+class StandInServer(object):
+    def __init__(self, data=None, address='127.0.0.1', port=0, compress=False):
+        self.data = data if data is not None else StandInData()
+        self.server = ThreadingHTTPServer((address, port), StandInHandler)
+        self.server.daemon_threads = True
+        self.server.data = self.data
+        self.server.compress = compress
+        self.host = '%s:%d' % self.server.server_address[:2]
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}) # So stop doesn't wait long
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve synthetic Edsby data for benchmarking PyEdsby.')
+    parser.add_argument('--address', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--classes', type=int, default=8)
+    parser.add_argument('--roster-size', type=int, default=30)
+    parser.add_argument('--feed-length', type=int, default=50)
+    args = parser.parse_args()
+
+    server = StandInServer(StandInData(args.classes, args.roster_size, args.feed_length), args.address, args.port)
+    print('Serving a stand-in Edsby instance at http://'+server.host)
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        server.server.server_close()
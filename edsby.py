@@ -1,11 +1,37 @@
-import requests, json
-from past.builtins import basestring
+import requests, urllib3, json, argparse, asyncio, base64, bisect, calendar, codecs, csv, gzip, hashlib, heapq, io, itertools, math, os, queue, random, re, sqlite3, sys, threading, time
+from array import array
+from collections import OrderedDict
 from copy import deepcopy
-from datetime import date
+from datetime import date, datetime, timedelta
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# orjson decodes JSON several times faster than the standard library, so we'll use it if it's installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Parquet and Arrow exports need pyarrow, but CSV and JSON Lines exports don't.
+try:
+    import pyarrow, pyarrow.ipc, pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# requests can only decode brotli compressed responses if one of these is installed, so we only ask for brotli if it is.
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
 
 """
     Edsby.py: An API wrapper/library for Python - v0.7.1
     https://github.com/ctrezevant/PyEdsby/
+    Requires Python 3.7 or newer.
 
     (c) 2017 Charlton Trezevant - www.ctis.me
     MIT License
@@ -22,13 +48,57 @@ from datetime import date
 class Edsby(object):
     def __init__(self, **kwargs):
         self.edsbyHost = kwargs['host']
+        # Only ever 'http' for talking to a local stand-in server (see benchmarks/standInServer.py).
+        self.scheme = kwargs['scheme'] if 'scheme' in kwargs else 'https'
+
+        # Every request goes through _request, which pools connections in this session. Cookies are always
+        # passed explicitly (see getCookies), so the session is told not to keep any of its own.
+        self.http = requests.Session()
+        self.http.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=kwargs['poolSize'] if 'poolSize' in kwargs else 16)
+        self.http.mount('https://', adapter)
+        self.http.mount('http://', adapter)
+
+        # The transport actually sends requests. Pass a RecordingTransport to capture traffic to a cassette file,
+        # or a ReplayTransport to serve a cassette back without touching the network.
+        self.transport = kwargs['transport'] if 'transport' in kwargs else RequestsTransport(self.http)
+        # Share one RateLimiter between instances to cap the request rate across all of them.
+        self.rateLimiter = kwargs['rateLimiter'] if 'rateLimiter' in kwargs else None
+
+        # Idempotent requests that fail with a connection error or a 429/5xx response are retried this many times,
+        # with exponential backoff starting at retryBackoff seconds.
+        self.retries = kwargs['retries'] if 'retries' in kwargs else 0
+        self.retryBackoff = kwargs['retryBackoff'] if 'retryBackoff' in kwargs else 1.0
+
+        # Responses from cacheable endpoints are kept for cacheTTL seconds. Caching is off unless this is set.
+        self.cacheTTL = kwargs['cacheTTL'] if 'cacheTTL' in kwargs else None
+
+        # In bandwidth saving mode, compressed responses are always asked for from the JSON endpoints, even if the
+        # headers you pass in say otherwise. See getTransferStats for how much it's saving.
+        self.saveBandwidth = kwargs['saveBandwidth'] if 'saveBandwidth' in kwargs else False
+        self.responseCache = dict()
+        self.metrics = dict()
+        self.coreLock = threading.RLock()
+
+        # The class catalog is loaded on first use, and reloaded once it's older than catalogTTL seconds (five
+        # minutes by default). Pass catalogTTL=0 to reload it every time it's used, or catalogTTL=None to only
+        # ever reload it when refreshClassCatalog is called.
+        self.catalogTTL = kwargs['catalogTTL'] if 'catalogTTL' in kwargs else 300
+        self.classCatalog = None
+        self.recipientDirectory = None
+
+        # Pass a URLPreviewCache (which can be shared between instances) to scrape each link's preview only once.
+        self.urlPreviewCache = kwargs['urlPreviewCache'] if 'urlPreviewCache' in kwargs else None
+
+        # The iter* methods decode responses smaller than this many bytes (decompressed) all at once, and stream larger ones.
+        self.streamThreshold = kwargs['streamThreshold'] if 'streamThreshold' in kwargs else 1048576
 
         if 'headers' in kwargs:
             self.globalHeaders = kwargs['headers']
         else:
             self.globalHeaders = {
                 'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_12_4) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0 Safari/601.1',
-                'referer': 'https://'+self.edsbyHost+'/',
+                'referer': self.scheme+'://'+self.edsbyHost+'/',
                 'accept': '*/*',
                 'accept-language':'en-US,en',
                 'dnt': '1',
@@ -101,6 +171,31 @@ class Edsby(object):
     def getCookies(self):
         return self.session.cookies.get_dict()
 
+    """
+        Returns everything needed to pick up this session again later without logging in (see fromSavedSession),
+        as a dict that can be stored as JSON. Anyone with it can act as the student until the session expires,
+        so keep it as safe as you would a password.
+    """
+    def saveSession(self):
+        return {
+            'host': self.edsbyHost,
+            'scheme': self.scheme,
+            'meta': self.instanceMeta,
+            'cookies': self.getCookies(),
+            'student': self.studentData
+        }
+
+    """
+        Creates an Edsby instance from a session saved with saveSession, without making any requests.
+        Any other keyword arguments are passed on to the constructor.
+    """
+    @classmethod
+    def fromSavedSession(cls, saved, **kwargs):
+        edsby = cls(host=saved['host'], scheme=saved.get('scheme', 'https'), meta=saved['meta'], session=requests.Session(), **kwargs)
+        edsby.setCookies(saved['cookies'])
+        edsby.studentData = saved['student']
+        return edsby
+
     """
         May be used to retrieve student metadata (nid, unid, name, and so on)
     """
@@ -113,6 +208,7 @@ class Edsby(object):
     def clearStudentData(self):
         self.authData = None
         self.studentData = None
+        self.classCatalog = None
         return True
 
     """
@@ -121,12 +217,172 @@ class Edsby(object):
     def setStudentData(self, studentData):
         self.studentData = studentData
 
+    """
+        Returns the full URL for an endpoint in ENDPOINTS, filling its path and query parameters in from args.
+        The student's nid and unid, and the instance NID, are filled in automatically.
+    """
+    def getEndpointURL(self, name, **args):
+        endpoint = ENDPOINTS[name]
+        values = dict()
+        if getattr(self, 'studentData', None) is not None:
+            values['nid'] = self.studentData['nid']
+            values['unid'] = self.studentData['unid']
+        if getattr(self, 'instanceMeta', None) is not None and 'nid' in self.instanceMeta:
+            values['instanceNID'] = self.instanceMeta['nid']
+        values.update(args)
+        values = dict((key, value if value is None else str(value)) for key, value in values.items())
+
+        query = list()
+        if endpoint.xds is not None and 'xds' not in [key for key, template in endpoint.params]:
+            query.append(('xds', endpoint.xds))
+        for key, template in endpoint.params:
+            if key == 'xds':
+                query.append((key, endpoint.xds))
+            elif template.startswith('{') and template.endswith('}') and values.get(template[1:-1]) is None:
+                continue # Optional parameters are left out entirely when they aren't given
+            else:
+                query.append((key, template.format(**values)))
+        return self.scheme+'://'+self.edsbyHost+endpoint.path.format(**values)+('?'+'&'.join(key+'='+requests.utils.quote(value, safe='/,') for key, value in query) if len(query) > 0 else '')
+
+    """
+        Calls an endpoint in ENDPOINTS, and returns the part of the response its extraction path points to
+        (or the Response itself, for endpoints that don't return JSON). Every public method that talks to
+        Edsby goes through here, which is where responses are cached and idempotent requests are retried.
+        data and files are sent with POST requests, and everything else fills in the endpoint's URL.
+    """
+    def _call(self, name, data=None, files=None, stream=False, **args):
+        endpoint = ENDPOINTS[name]
+        url = self.getEndpointURL(name, **args)
+
+        cacheKey = url if endpoint.cacheable and self.cacheTTL is not None else None
+        if cacheKey is not None:
+            with self.coreLock:
+                cached = self.responseCache.get(cacheKey)
+            if cached is not None and cached[0] > time.time():
+                return deepcopy(cached[1])
+
+        attempts = (self.retries if endpoint.idempotent else 0) + 1
+        for attempt in range(attempts):
+            lastAttempt = attempt == attempts - 1
+            try:
+                response = self._request(endpoint.method, url, name, cookies=endpoint.authenticated, data=data, files=files, stream=stream)
+            except requests.exceptions.RequestException:
+                if lastAttempt:
+                    raise
+            else:
+                if lastAttempt or response.status_code not in _retryStatuses:
+                    break
+            time.sleep(_backoffDelay(attempt, self.retryBackoff))
+
+        if endpoint.extract is None:
+            return response
+        payload = _extractPath(_decodeJSON(response.content), endpoint.extract)
+        if cacheKey is not None:
+            with self.coreLock:
+                self.responseCache[cacheKey] = (time.time() + self.cacheTTL, payload)
+            return deepcopy(payload)
+        return payload
+
+    """
+        Sends a single HTTP request to Edsby and records how long it took. Cookies are only sent if
+        cookies is set, as the requests made before the session begins mustn't send any.
+    """
+    def _request(self, method, url, endpointName=None, cookies=True, **kwargs):
+        headers = self.getHeaders()
+        if self.saveBandwidth and _compressiblePattern.search(url):
+            headers = dict((key, value) for key, value in headers.items() if key.lower() != 'accept-encoding')
+            headers['accept-encoding'] = _acceptEncoding
+        if self.rateLimiter is not None:
+            self.rateLimiter.acquire()
+        started = time.time()
+        try:
+            response = self.transport.request(method, url, cookies=self.getCookies() if cookies else None, headers=headers, **kwargs)
+        except Exception:
+            self._recordMetrics(endpointName, started, None)
+            raise
+        self._recordMetrics(endpointName, started, response)
+        if not kwargs.get('stream'): # Streamed responses are accounted for by whoever reads them
+            self._recordTransfer(endpointName, response)
+        return response
+
+    def _endpointMetrics(self, endpointName):
+        return self.metrics.setdefault(endpointName, {'calls': 0, 'errors': 0, 'seconds': 0.0, 'wireBytes': 0, 'decodedBytes': 0})
+
+    def _recordMetrics(self, endpointName, started, response):
+        with self.coreLock:
+            metrics = self._endpointMetrics(endpointName)
+            metrics['calls'] += 1
+            metrics['seconds'] += time.time() - started
+            if response is None or response.status_code >= 400:
+                metrics['errors'] += 1
+
+    """
+        Records the size of a response body, both as it came over the wire and once decompressed.
+        decodedBytes is how much of the body was read, if it was streamed.
+    """
+    def _recordTransfer(self, endpointName, response, decodedBytes=None):
+        decodedBytes = len(response.content) if decodedBytes is None else decodedBytes
+        wireBytes = _wireBytes(response, decodedBytes)
+        with self.coreLock:
+            metrics = self._endpointMetrics(endpointName)
+            metrics['wireBytes'] += wireBytes
+            metrics['decodedBytes'] += decodedBytes
+
+    """
+        Calls several endpoints concurrently. calls is a list of (endpoint name, dict of arguments) tuples,
+        and the result is a list of ((name, arguments), result, error) tuples in the same order.
+    """
+    def callEndpoints(self, calls, maxWorkers=4):
+        return _concurrentMap(lambda call: self._call(call[0], **call[1]), calls, maxWorkers)
+
+    """
+        Returns a dict of endpoint name -> {'calls', 'errors', 'seconds', 'wireBytes', 'decodedBytes'} for all
+        requests made so far.
+    """
+    def getMetrics(self):
+        with self.coreLock:
+            return deepcopy(self.metrics)
+
+    def resetMetrics(self):
+        with self.coreLock:
+            self.metrics = dict()
+
+    """
+        Returns how many response bytes came over the wire and how many they decoded to, in total and per endpoint:
+            {
+                'wireBytes': <bytes received>,
+                'decodedBytes': <bytes after decompression>,
+                'savedBytes': <decodedBytes - wireBytes>,
+                'compressionRatio': <decodedBytes / wireBytes, or None if nothing's been received>,
+                'endpoints': {<endpoint name>: {'wireBytes': ..., 'decodedBytes': ...}}
+            }
+    """
+    def getTransferStats(self):
+        with self.coreLock:
+            endpoints = dict((name, {'wireBytes': metrics['wireBytes'], 'decodedBytes': metrics['decodedBytes']}) for name, metrics in self.metrics.items())
+        wireBytes = sum(endpoint['wireBytes'] for endpoint in endpoints.values())
+        decodedBytes = sum(endpoint['decodedBytes'] for endpoint in endpoints.values())
+        return {
+            'wireBytes': wireBytes,
+            'decodedBytes': decodedBytes,
+            'savedBytes': decodedBytes - wireBytes,
+            'compressionRatio': float(decodedBytes) / wireBytes if wireBytes > 0 else None,
+            'endpoints': endpoints
+        }
+
+    """
+        Empties the response cache.
+    """
+    def clearCache(self):
+        with self.coreLock:
+            self.responseCache = dict()
+
     """
         This begins a session, retrieving cookies that we'll use later. Don't call this if you've already called
         login, as it will overwrite the cookies.
     """
     def getSession(self):
-        return requests.Session().get('https://'+self.edsbyHost+"/core/login/"+str(self.instanceMeta['nid'])+"?xds=loginform&editable=true",headers=self.getHeaders())
+        return self._call('getSession')
 
     """
         This method overwrites the current session, which effectively logs the user out.
@@ -138,7 +394,7 @@ class Edsby(object):
         Scrapes the InstanceMeta dict from your Edsby instance.
     """
     def parseInstanceMetadata(self):
-        rawPage = requests.get('https://'+self.edsbyHost,headers=self.getHeaders()).text
+        rawPage = self._call('parseInstanceMetadata').text
         meta = rawPage[rawPage.find('openSesame(')+12:] # Cut out all parts of webpage before openSesame call.
         meta = meta[:meta.find('}')].split(',') # cut out everything after the openSesame call that isn't a part of the metadata we want
 
@@ -175,7 +431,7 @@ class Edsby(object):
         Which are then used by sendAuthenticationData to complete user authentication.
     """
     def getauthData(self, loginData):
-        self.authData = requests.get('https://'+self.edsbyHost+"/core/node.json/"+str(self.instanceMeta['nid'])+"?xds=fetchcryptdata&type=Plaintext-LeapLDAP",cookies=self.getCookies(),headers=self.getHeaders()).json()["slices"][0]
+        self.authData = self._call('getauthData')
         return {
             '_formkey': self.authData["_formkey"],
             'sauthdata': self.authData['data']["sauthdata"],
@@ -191,12 +447,12 @@ class Edsby(object):
         student metadata returned by Edsby
     """
     def sendAuthenticationData(self):
-        studentData = requests.post('https://'+self.edsbyHost+'/core/login/'+str(self.instanceMeta['nid'])+'?xds=loginform&editable=true',data=self.authData,cookies=self.getCookies(),headers=self.getHeaders())
+        studentData = self._call('sendAuthenticationData', data=self.authData)
         cookies = {
             'session_id_edsby': dict(studentData.cookies)['session_id_edsby'],
         }
         self.setCookies(cookies)
-        studentData = studentData.json()
+        studentData = _decodeJSON(studentData.content)
         if 'error' in studentData:
             raise LoginError(studentData['errorstr'])
         return {
@@ -214,28 +470,28 @@ class Edsby(object):
         though I haven't explored it in detail.
     """
     def getBootstrapData(self):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/?xds=bootstrap',cookies=self.getCookies(),headers=self.getHeaders()).json()
+        return self._call('getBootstrapData')
 
     """
         This returns a wealth of metadata about the student as a whole,
         including classes. This is yet another thing I haven't explored in great detail.
     """
     def getBaseStudentData(self):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(self.studentData['unid'])+'?xds=BaseStudent',cookies=self.getCookies(),headers=self.getHeaders()).json()
+        return self._call('getBaseStudentData')
 
     """
         Returns personal information about the student, including their full name,
         phone number, address, and registered parents.
     """
     def getStudentPersonalInfo(self):
-        personalInfo = requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(self.studentData['unid'])+'?xds=editPersonalInformation',cookies=self.getCookies(),headers=self.getHeaders()).json()["slices"][0]
+        personalInfo = self._call('getStudentPersonalInfo')
         return personalInfo['data'] if 'data' in personalInfo else ''
 
     """
         Returns the currently active account settings for the user.
     """
     def getAccountSettings(self):
-        userSettings = requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(self.studentData['unid'])+'?xds=editSettings',cookies=self.getCookies(),headers=self.getHeaders()).json()["slices"][0]
+        userSettings = self._call('getAccountSettings')
         return userSettings['data'] if 'data' in userSettings else ''
 
     """
@@ -272,7 +528,7 @@ class Edsby(object):
         },
     """
     def getRawCurrentClassData(self):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(self.studentData['nid'])+'?xds=BaseStudentClasses&match=multi',cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]['data']['classesContainer']['classes']
+        return self._call('getRawCurrentClassData')
 
     """
         Returns a parsed list of only the classes you're currently enrolled in.
@@ -287,36 +543,13 @@ class Edsby(object):
             }
     """
     def getCurrentClasses(self):
-        rawCurrentClasses = self.getRawCurrentClassData()
-        currentClasses = dict()
-        for className in rawCurrentClasses:
-            NID = rawCurrentClasses[className]['nid']
-            humanName = rawCurrentClasses[className]['class']['details']['course']
-            RID = rawCurrentClasses[className]['rid']
-            courseCode = rawCurrentClasses[className]['class']['details']['info']['teachernid']
-
-            currentClasses[NID] = dict()
-            currentClasses[NID]['human_name'] = humanName
-            currentClasses[NID]['rid'] = RID
-            currentClasses[NID]['course_code'] = courseCode
-
-            teacherName = rawCurrentClasses[className]['class']['details']['info']['param']
-            teacherNID = rawCurrentClasses[className]['class']['details']['info']['teachernid']
-
-            currentClasses[NID]['teacher'] = dict()
-            currentClasses[NID]['teacher']['name'] = teacherName
-            currentClasses[NID]['teacher']['nid'] = teacherNID
-
-        return currentClasses
+        return self.getClassCatalog().getCurrentClasses()
 
     """
         Returns a list of NIDs for the classes you are currently enrolled in.
     """
     def getCurrentClassNIDList(self):
-        classNIDs = list()
-        for NID in self.getCurrentClasses():
-            classNIDs.append(NID)
-        return classNIDs
+        return self.getClassCatalog().getCurrentClassNIDList()
 
     """
         Returns raw class data for the current and historical set of classes you're enrolled in, which looks like:
@@ -347,7 +580,7 @@ class Edsby(object):
             }
     """
     def getRawClassData(self):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(self.studentData['nid'])+'?xds=ClassPicker&match=multi',cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]['data']['classes']
+        return self._call('getRawClassData')
 
     """
         Returns a parsed list of all available classes, both current and previous.
@@ -362,26 +595,7 @@ class Edsby(object):
             }
     """
     def getAllClasses(self):
-        rawClassData = requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(self.studentData['nid'])+'?xds=ClassPicker&match=multi',cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]['data']['classes']
-        classDict = dict()
-        for className in rawClassData:
-            NID = rawClassData[className]['nid']
-            humanName = rawClassData[className]['course']['class']['text']['line1']
-            RID = rawClassData[className]['rid']
-            courseCode = rawClassData[className]['course']['class']['text']['line2']['code']
-
-            classDict[NID] = dict()
-            classDict[NID]['human_name'] = humanName
-            classDict[NID]['rid'] = RID
-            classDict[NID]['course_code'] = courseCode
-
-            classDict[NID]['teacher'] = dict()
-            classDict[NID]['teacher']['name'] = rawClassData[className]['course']['class']['text']['line2']['name']
-            # This endpoint does not return NID information for teachers, so we'll set this to None (e.g. null). If you need to
-            # Retrieve this data, try using the lookUpMessageRecipient method, or alternatively call getCurrentClasses.
-            classDict[NID]['teacher']['nid'] = None
-
-        return classDict
+        return self.getClassCatalog().getAllClasses()
 
     """
         getClassIDList has been renamed to getAllClasses. This shim provides backwards compatibility
@@ -394,37 +608,43 @@ class Edsby(object):
         Returns a list of NIDs for all available classes, both current and previous.
     """
     def getAllClassNIDList(self):
-        classNIDs = list()
-        for NID in self.getAllClasses():
-            classNIDs.append(NID)
-        return classNIDs
+        return self.getClassCatalog().getAllClassNIDList()
 
     """
         Retrieves the list of all classes you've historically been enrolled in, and
         removes all the classes that you're currently enrolled in.
     """
     def getPastClasses(self):
-        currentClasses = self.getCurrentClassNIDList()
-        allClasses = self.getAllClasses()
-        for classNID in list(allClasses):
-            if classNID in currentClasses:
-                del allClasses[classNID]
-        return allClasses
+        return self.getClassCatalog().getPastClasses()
 
     """
         Returns a list of NIDs for the classes you were previously enrolled in.
     """
     def getPastClassNIDList(self):
-        classNIDs = list()
-        for NID in self.getPastClasses():
-            classNIDs.append(NID)
-        return classNIDs
+        return self.getClassCatalog().getPastClassNIDList()
+
+    """
+        Returns the ClassCatalog for this student. getCurrentClasses, getAllClasses, getPastClasses,
+        getCurrentClassRosters and the other methods that work from the student's list of classes are all
+        served from this catalog, which is reused for catalogTTL seconds rather than fetching
+        BaseStudentClasses and ClassPicker again every time.
+    """
+    def getClassCatalog(self):
+        if self.classCatalog is None:
+            self.classCatalog = ClassCatalog(self, ttl=self.catalogTTL)
+        return self.classCatalog
+
+    """
+        Reloads the class catalog from Edsby, e.g. after the student's schedule changes.
+    """
+    def refreshClassCatalog(self):
+        return self.getClassCatalog().refresh()
 
     """
         Returns your current average for the given class NID (e.g. 97.4)
     """
     def getClassAverage(self, classNID):
-        classData = requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(classNID)+'?xds=MyWork&student='+str(self.studentData['unid']),cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]['data']
+        classData = self._call('getClassAverage', classNID=classNID)
         if 'loaddata' in classData and 'average' in classData['loaddata']:
             return classData['loaddata']['average']
         else:
@@ -435,7 +655,7 @@ class Edsby(object):
         Adds a new property, 'average', to the class dicts returned by the getCurrentClasses() method.
     """
     def getCurrentClassAverages(self):
-        classes = self.getCurrentClasses()
+        classes = self.getClassCatalog().getCurrentClasses()
         for key in classes:
             classes[key]['average'] = self.getClassAverage(key)
         return classes
@@ -445,7 +665,7 @@ class Edsby(object):
         Adds a new property, 'average', to the class dicts returned by the getAllClasses() method.
     """
     def getAllClassAverages(self):
-        classes = self.getAllClasses()
+        classes = self.getClassCatalog().getAllClasses()
         for key in classes:
             classes[key]['average'] = self.getClassAverage(key)
         return classes
@@ -455,14 +675,14 @@ class Edsby(object):
         This includes the NID, RID, and weighting (points possible) of the assignments, but not your score.
     """
     def getClassAssignmentMetadata(self, classNID):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(classNID)+'?xds=MyWork&student='+str(self.studentData['unid']),cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]['data']['loaddata']['gradebook']['terms']
+        return self._call('getClassAssignmentMetadata', classNID=classNID)
 
     """
         Returns an object containing all assignment scores for a specified course, ordered by NID
         This includes the NID and points earned on the assignment, but nothing else.
     """
     def getClassAssignmentScores(self, classNID, classRID):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(classNID)+'/'+str(classRID)+'/'+str(classNID)+'?xds=MyWorkAssessmentPane&unit=all&student='+str(self.studentData['unid'])+'&model=24605449',cookies=self.getCookies(),headers=self.getHeaders()).json()["slices"][0]["data"]['grades']
+        return self._call('getClassAssignmentScores', classNID=classNID, classRID=classRID)
 
     """
         Returns an object containing all assignment scores for a specified course, ordered by NID
@@ -472,14 +692,14 @@ class Edsby(object):
         before reading. getClassAssignmentList can handle and process data returned from both of these endpoints
     """
     def getMixedFormatClassAssignmentScores(self, classNID, classRID):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(classNID)+'/'+str(classRID)+'/'+str(classNID)+'?xds=MyWorkChart&student='+str(self.studentData['unid']),cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]['data']['loaddata']['grades']
+        return self._call('getMixedFormatClassAssignmentScores', classNID=classNID, classRID=classRID)
 
     """
         Returns an array of NIDs for assignments that have been published (e.g. are visible) for a
         given course
     """
     def getClassPublishedAssignments(self, classNID, classRID):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(classNID)+'/'+str(classRID)+'/'+str(classNID)+'?xds=MyWorkChart&student='+str(self.studentData['unid']),cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]['data']['bubbles']['publishedAssessments'].split(',')
+        return self._call('getClassPublishedAssignments', classNID=classNID, classRID=classRID).split(',')
 
     """
         Gathers all available, published assignment data from a specified class, and computes scores for each. Returns an object
@@ -512,94 +732,28 @@ class Edsby(object):
     def getClassAssignmentList(self, classNID, classRID):
         scores = self.getClassAssignmentScores(classNID, classRID) # Fetch assignment scores
         metadata = self.getClassAssignmentMetadata(classNID) # Fetch assignment metadata
-        assignmentData = {
-            'assignments': dict(), # Assignments that have all applicable metadata present
-            'no_scores_found': dict(), # Assignments that we haven't found scores for
-            'no_weights_found': list(), # Assignments we haven't found weights for
-            'no_columns_found': list(), # Assignments we haven't found columns for
-            'invalid_weighting': list(), # Assignments that have invalid weighting
-            'invalid_columns': list() # Assignments that have invalid columns
-        }
-        for nid in scores: # Populates assignmentData with NIDs and available assignment scores
-            if 'cols' in scores[nid]:
-                assignmentData['assignments'][nid] = {'score': scores[nid]['cols']['0']} if '0' in scores[nid]['cols'] else {'score': scores[nid]['cols']}
-
-        # Copy all available assignment metadata to assignmentData dict
-        for assg in metadata:
-            assignmentNID = str(metadata[assg]['nid'])
-
-            # Copy other keys from metadata obj to compiled assignment data obj
-            for key in metadata['r'+str(metadata[assg]['rid'])]:
-                if assignmentNID in assignmentData['assignments']: # If we've found metadata for an asssignment that we've also found scores for
-                    assignmentData['assignments'][assignmentNID][key] = metadata[assg][key] # Copy metadata to that entry
-                else:
-                    assignmentData['no_scores_found'][assignmentNID] = dict() # Otherwise, place this metadata in the no_scores_found dict
-                    for meta in metadata[assg]:
-                        assignmentData['no_scores_found'][assignmentNID][meta] = metadata[assg][meta]
-
-        # Copy weighting data, sort assignments without it, calculate percentage scores if possible
-        deepcopy_assignmentData = deepcopy(assignmentData)
-        for assg in deepcopy_assignmentData['assignments']:
-            assignmentNID = str(assg)
-
-            if 'scheme' not in assignmentData['assignments'][assg]:
-                del assignmentData['assignments'][assg]
-                continue
-
-            if 'weighting' in assignmentData['assignments'][assg]: # If weighting data is present in the metadata we retrieved
-                # API sometimes returns a dict, other times returns a JSON string. Figure out which one it is and parse appropriately.
-                if isinstance(assignmentData['assignments'][assg]['weighting'], dict): # If dict access weighting prop as a dict
-                    if '0' in assignmentData['assignments'][assg]['weighting'] and not isinstance(assignmentData['assignments'][assg]['score'], dict):
-                        assignmentData['assignments'][assignmentNID]['weighting'] = assignmentData['assignments'][assg]['weighting']['0']
-                    elif len(assignmentData['assignments'][assg]['weighting']) is not len(assignmentData['assignments'][assg]['score']):
-                        assignmentData['invalid_weighting'].append(assignmentNID)
-                    else:
-                        assignmentData['assignments'][assignmentNID]['weighting'] = assignmentData['assignments'][assg]['weighting']
-                elif isinstance(assignmentData['assignments'][assg]['weighting'], basestring): # If string access weighting prop as a dict after running through a JSON parser
-                    weighting_dict = json.loads(assignmentData['assignments'][assg]['weighting'])
-                    if '0' in weighting_dict and not isinstance(assignmentData['assignments'][assg]['score'], dict):
-                        assignmentData['assignments'][assignmentNID]['weighting'] = json.loads(assignmentData['assignments'][assg]['weighting'])['0']
-                    elif len(weighting_dict) is not len(assignmentData['assignments'][assg]['score']):
-                        assignmentData['invalid_weighting'].append(assignmentNID)
-                    else:
-                        assignmentData['assignments'][assignmentNID]['weighting'] = weighting_dict
-            else:
-                assignmentData['no_weights_found'].append(assignmentNID) # No weighting data available for this entry, file it away
-
-            if 'columns' in assignmentData['assignments'][assg]: # If columns data is present in the metadata we retrieved
-                # API sometimes returns a dict, other times returns a JSON string. Figure out which one it is and parse appropriately.
-                if isinstance(assignmentData['assignments'][assg]['columns'], dict): # If dict access columns prop as a dict
-                    if '0' in assignmentData['assignments'][assg]['columns'] and not isinstance(assignmentData['assignments'][assg]['score'], dict):
-                        assignmentData['assignments'][assignmentNID]['columns'] = assignmentData['assignments'][assg]['columns']['0']
-                    elif len(assignmentData['assignments'][assg]['columns']) is not len(assignmentData['assignments'][assg]['score']):
-                        assignmentData['invalid_columns'].append(assignmentNID)
-                    else:
-                        assignmentData['assignments'][assignmentNID]['columns'] = assignmentData['assignments'][assg]['columns']
-
-                elif not isinstance(assignmentData['assignments'][assg]['columns'], dict) and assignmentData['assignments'][assg]['scheme'] != 'gs_4levelplusminus': # If string access columns prop as a dict after running through a JSON parser
-                    columns_dict = json.loads(assignmentData['assignments'][assg]['columns'])
-                    if '0' in columns_dict and not isinstance(assignmentData['assignments'][assg]['score'], dict):
-                        assignmentData['assignments'][assignmentNID]['columns'] = json.loads(assignmentData['assignments'][assg]['columns'])['0']
-                    elif len(columns_dict) is not len(assignmentData['assignments'][assg]['score']):
-                        assignmentData['invalid_columns'].append(assignmentNID)
-                    else:
-                        assignmentData['assignments'][assignmentNID]['columns'] = columns_dict
-            else:
-                assignmentData['no_columns_found'].append(assignmentNID) # No columns data available for this entry, file it away
-
-            # Calculate score percentage for assignment
-            if 'columns' in assignmentData['assignments'][assg]: # If valid weighting data is present
-                if isinstance(assignmentData['assignments'][assg]['score'], (basestring, dict)) is False and 'columns' in assignmentData['assignments'][assg]: # If the score is NOT a letter grade or a multi-part grade (e.g. is numeric), calculate percentage score.
-                    assignmentData['assignments'][assg]['scorePercentage'] = (float(assignmentData['assignments'][assg]['score'])/float(assignmentData['assignments'][assg]['columns'])) * 100
-                elif isinstance(assignmentData['assignments'][assg]['score'], dict):
-                    if isinstance(assignmentData['assignments'][assg]['columns'], dict):
-                        assignmentData['assignments'][assg]['scorePercentage'] = {}
-                        for scoreType in assignmentData['assignments'][assg]['score'].keys():
-                            if scoreType in assignmentData['assignments'][assg]['columns']:
-                                assignmentData['assignments'][assg]['scorePercentage'][scoreType] = (float(assignmentData['assignments'][assg]['score'][scoreType])/float(assignmentData['assignments'][assg]['columns'][scoreType])) * 100
-
-
-        return assignmentData
+        return _mergeAssignmentData(scores, metadata)
+
+    """
+        Returns {<class NID>: <getClassAssignmentList output>} for all of your current classes, fetching them
+        with up to maxWorkers threads. Set processes to also merge them in a pool of processes (see
+        AssignmentPipeline), which only pays off for classes with very many assignments.
+    """
+    def getCurrentClassAssignmentLists(self, maxWorkers=8, processes=False):
+        assignmentLists = dict()
+        if processes:
+            with AssignmentPipeline(fetchWorkers=maxWorkers, processes=True) as pipeline:
+                for edsby, classNID, assignmentList, error in pipeline.iterStudents([self]):
+                    if error is not None:
+                        raise error
+                    assignmentLists[classNID] = assignmentList
+            return assignmentLists
+        classes = self.getClassCatalog().getCurrentClasses()
+        for classNID, assignmentList, error in _concurrentMap(lambda NID: self.getClassAssignmentList(NID, classes[NID]['rid']), list(classes), maxWorkers):
+            if error is not None:
+                raise error
+            assignmentLists[classNID] = assignmentList
+        return assignmentLists
 
     """
         Returns a dict with a basic summary of assignments and their grades for a
@@ -616,18 +770,46 @@ class Edsby(object):
         return humanList
 
     """
-        Retrieves raw, unformatted attendance records from the specified class. I haven't tried to
-        parse these yet.
+        Retrieves raw, unformatted attendance records from the specified class (see AttendanceStore for
+        parsed ones). Returns an empty list if the class doesn't have any records, which Edsby shows by
+        leaving them out of the response (or sending an empty string) somewhere along the way.
     """
     def getRawClassAttendanceRecords(self, classID):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(classID)+'?xds=MyWorkChart&student='+str(self.studentData['unid']),cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]['data']['chartContainer']['chart']['attendanceRecords']['data']['right']['records']['incident']
+        data = self._call('getRawClassAttendanceRecords', classNID=classID)
+        for key in ('chartContainer', 'chart', 'attendanceRecords', 'data', 'right', 'records', 'incident'):
+            if data == '' or (isinstance(data, dict) and key not in data):
+                return list()
+            if not isinstance(data, dict):
+                raise RequestError('Unexpected attendance records for class '+str(classID)+': '+key+' is in a '+type(data).__name__)
+            data = data[key]
+        return data
+
+    """
+        Fetches attendance records for all of your current classes (or the classes in classNIDs) concurrently,
+        and returns them parsed into an AttendanceStore.
+    """
+    def getAttendanceStore(self, classNIDs=None, maxWorkers=8):
+        return AttendanceStore.fromEdsby(self, classNIDs, maxWorkers)
+
+    """
+        Snapshots your current class averages and assignment lists into a GradeHistory (see GradeHistory.record),
+        and returns the number of values that changed since the last snapshot.
+    """
+    def recordGradeHistory(self, history, timestamp=None, maxWorkers=4):
+        return history.record(self, timestamp, maxWorkers)
+
+    """
+        Fetches your feeds and messages and adds anything new or edited to a SearchIndex (see SearchIndex.update).
+    """
+    def updateSearchIndex(self, index, sources=None, maxWorkers=4):
+        return index.update(self, sources, maxWorkers)
 
     """
         Returns a list of all member students of a class
         Say hi to your classmates!
     """
     def getClassmates(self, classNID):
-        classMates = requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(classNID)+'?xds=ClassStudentList',cookies=self.getCookies(),headers=self.getHeaders()).json()
+        classMates = self._call('getClassmates', classNID=classNID)
         if 'slices' in classMates: # Make sure we got a valid response from the API.
             if 'places' in classMates['slices'][0]['data'] and 'item' in classMates['slices'][0]['data']['places']:
                 return classMates['slices'][0]['data']['places']['item']
@@ -641,7 +823,7 @@ class Edsby(object):
         This is useful if you want roster information for only the current classes you're enrolled in.
     """
     def getCurrentClassRosters(self):
-        rosterData = self.getCurrentClasses()
+        rosterData = self.getClassCatalog().getCurrentClasses()
         for NID in rosterData:
             rosterData[NID]['classmates'] = self.getClassmates(NID)
 
@@ -654,7 +836,7 @@ class Edsby(object):
         This is useful if you want historical roster information for ALL classes you've been enrolled in this year.
     """
     def getAllClassRosters(self):
-        rosterData = self.getAllClasses()
+        rosterData = self.getClassCatalog().getAllClasses()
         for NID in rosterData:
             rosterData[NID]['classmates'] = self.getClassmates(NID)
 
@@ -664,68 +846,92 @@ class Edsby(object):
         Retrieves the feed of all assignments and messages posted in the feed of a given class NID.
     """
     def getClassFeed(self, classNID):
-        feed = requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(classNID)+'?xds=CourseFeed',cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]['data']
+        feed = self._call('getClassFeed', classNID=classNID)
         return feed if 'item' in feed else ''
 
     """
         Course calendar- returns calendar entries for the specified course.
     """
     def getClassCalendar(self, classNID):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(classNID)+'?xds=CalendarPanel_Class',cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]['data']
+        return self._call('getClassCalendar', classNID=classNID)
 
     """
         Course assignment outline, shows upcoming and historical assignments for the course
     """
     def getClassPlan(self, classNID):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(classNID)+'?xds=Course&_context=1',cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]['data']['col1']['outline']['plan']['tree']
+        return self._call('getClassPlan', classNID=classNID)
 
     """
         Retrieves all current/pending notifications for the student
     """
     def getStudentNotifications(self):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(self.studentData['unid'])+'?xds=notifications',cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]['data']
+        return self._call('getStudentNotifications')
 
     """
         Returns all available calendar data (due/overdue assignments, events, schedules).
         By default, returns data for the current month. 
         Call with a different date (formatted year-month-day) to get calendar data for that month.
     """
-    def getCalendarData(self, date=date.today().strftime("%Y-%m-%d")):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(self.studentData['unid'])+'?xds=Calendar&targetDate='+str(date),cookies=self.getCookies(),headers=self.getHeaders()).json()["slices"][0]["data"]["caldata"]
+    def getCalendarData(self, date=None):
+        if date is None: # Evaluated on every call, so long running processes don't keep asking for the month they started in
+            date = _today()
+        return self._call('getCalendarData', date=date)
+
+    """
+        Fetches calendar data once, and returns a CalendarSnapshot which can serve due and overdue
+        assignments, events and schedules without fetching the calendar again for each.
+        Takes the same date argument as getCalendarData.
+    """
+    def getCalendarSnapshot(self, date=None):
+        if date is None:
+            date = _today()
+        return CalendarSnapshot(self.getCalendarData(date), date)
 
     """
         Get calendar entries for all upcoming due assignments
     """
     def getCalendarDueAssignments(self):
-        return self.getCalendarData()['due']
+        return self.getCalendarSnapshot().getDueAssignments()
 
     """
         Get calendar entries for currently overdue assignments
     """
     def getCalendarOverdueAssignments(self):
-        return self.getCalendarData()['overdue']
+        return self.getCalendarSnapshot().getOverdueAssignments()
 
     """
         Get all available calendar events
     """
     def getCalendarEvents(self):
-        calendar = self.getCalendarData()
-        for key in list(calendar['common']):
-            if str(key + '.0') in list(calendar['events']):
-                calendar['common'][str(key)] = calendar['events'][str(key + '.0')]
-        return calendar['common']
+        return self.getCalendarSnapshot().getEvents()
 
     """
         Returns calendar entries containing school scheduling information
     """
     def getCalendarSchedules(self):
-        return self.getCalendarData()['schedules']
+        return self.getCalendarSnapshot().getSchedules()
+
+    """
+        Fetches calendar data for every month between startDate and endDate (inclusive) concurrently, and
+        returns a CalendarTimeline of all entries, sorted by start time and with entries that show up in
+        more than one month's data merged. Dates may be date objects or year-month-day strings.
+        kinds chooses which parts of the calendar to include (see CalendarSnapshot.getTimelineEvents).
+    """
+    def getCalendarRange(self, startDate, endDate, kinds=('due', 'events', 'schedules'), maxWorkers=4):
+        months = _monthsBetween(startDate, endDate)
+        fetched = _concurrentMap(lambda month: self.getCalendarSnapshot(month.strftime('%Y-%m-%d')), months, maxWorkers)
+        eventLists = list()
+        for month, snapshot, error in fetched:
+            if error is not None:
+                raise error
+            eventLists.append(snapshot.getTimelineEvents(kinds))
+        return CalendarTimeline.merge(*eventLists)
 
     """
         Returns ALL direct Edsby messages from your inbox
     """
     def getDirectMessages(self):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(self.studentData['unid'])+'?xds=Messages&_context=1',cookies=self.getCookies(),headers=self.getHeaders()).json()["slices"][0]["data"]["body"]["left"]["items"]["item"]
+        return self._call('getDirectMessages')
 
     """
         Sends a direct message to a specified user
@@ -747,14 +953,23 @@ class Edsby(object):
             'nodetype': message['nodetype'],
 
         }
-        return requests.post('https://'+self.edsbyHost+'/core/create/'+str(message['to'])+'?xds=MessagesCompose&permaLinkKey=false&scopeState=true&_processed=true',data=payload,cookies=self.getCookies(),headers=self.getHeaders()).json() 
+        return self._call('sendDirectMessage', to=message['to'], data=payload)
 
     """
         Allows you to search for any higher level user (teacher, administrator)
         whose name matches or contains a particular string
     """
     def lookUpMessageRecipient(self, query):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(self.studentData['unid'])+'?xds=msgUserPicker&pattern='+query+'&noForm=true',cookies=self.getCookies(),headers=self.getHeaders()).json()["slices"][0]["data"]["item"]
+        return self._call('lookUpMessageRecipient', query=query)['item']
+
+    """
+        Returns the RecipientDirectory for this session, which remembers recent recipient lookups and shares
+        identical ones in flight. Use it rather than lookUpMessageRecipient for autocomplete.
+    """
+    def getRecipientDirectory(self):
+        if self.recipientDirectory is None:
+            self.recipientDirectory = RecipientDirectory(self)
+        return self.recipientDirectory
 
     """
         Edsby has a built-in website metadata scraper, which it uses to retrieve
@@ -770,7 +985,9 @@ class Edsby(object):
         }
     """
     def scrapeURLMetadata(self, classNID, url):
-        return requests.get('https://'+self.edsbyHost+'/load/embed.json/'+str(classNID)+'?xds=bookMarkPreview&scrape='+requests.utils.quote(url),cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]['data']
+        if self.urlPreviewCache is not None:
+            return self.urlPreviewCache.getMetadata(self, classNID, url)
+        return self._call('scrapeURLMetadata', classNID=classNID, url=url)
 
     """
         Formats the website metadata from the site scraper, preparing it to be included in a message dict.
@@ -802,6 +1019,8 @@ class Edsby(object):
         the formatted dict as a string.
     """
     def getFormattedURLMetadataString(self, classNID, url):
+        if self.urlPreviewCache is not None:
+            return self.urlPreviewCache.getFormattedString(self, classNID, url)
         metadata = self.scrapeURLMetadata(classNID, url)
         return json.dumps(self.formatURLMetadata(metadata))
 
@@ -828,7 +1047,7 @@ class Edsby(object):
             'social-shmart-file-integrations-integrationfiledata': message['filedata'],
             'social-shmart-file-integrations-integrationfiles': message['files']
         }
-        return requests.post('https://'+self.edsbyHost+'/core/create/'+str(classNID)+'?xds=CourseFeedMsg&xdsr=CourseFeed&rxdstype=ref&merge=merge',data=messageSubmission,cookies=self.getCookies(),headers=self.getHeaders()).json()['slice']['slices'][0]['data']['item']
+        return self._call('postMessageInClassFeed', classNID=classNID, data=messageSubmission)
 
     """
         Posts a message in the class feed. This takes a dict called message, which looks like this:
@@ -849,7 +1068,7 @@ class Edsby(object):
             'social-shmart-file-integrations-integrationfiledata': message['filedata'],
             'social-shmart-file-integrations-integrationfiles': message['files']
         }
-        return requests.post('https://'+self.edsbyHost+'/core/node/'+str(classNID)+'/'+str(feedItemRID)+'/'+str(feedItemNID)+'?xds=feedItemEdit&_i=2',data=messageSubmission,cookies=self.getCookies(),headers=self.getHeaders()).json()
+        return self._call('editMessageInClassFeed', classNID=classNID, feedItemRID=feedItemRID, feedItemNID=feedItemNID, data=messageSubmission)
 
 
     """
@@ -879,7 +1098,7 @@ class Edsby(object):
             'replyTo': '',
             'thread': message['parent_nid']
         }
-        return requests.post('https://'+self.edsbyHost+'/core/create/'+str(classNID)+'/'+str(message['parent_rid'])+'/'+str(classNID)+'?xds=feedreply&xdsr=CourseFeed&__delegated=CourseFeed',data=messageSubmission,cookies=self.getCookies(),headers=self.getHeaders()).json()['slice']['slices'][0]['data']['item']
+        return self._call('postReplyInClassFeed', classNID=classNID, parentRID=message['parent_rid'], data=messageSubmission)
 
     """
         Posts a message with an accompanying file in the class feed. This takes a dict called message,
@@ -906,7 +1125,7 @@ class Edsby(object):
             'social-shmart-file-integrations-integrationfiledata': message['filedata'],
             'social-shmart-file-integrations-integrationfiles': message['files']
         }
-        postMetadata = requests.post('https://'+self.edsbyHost+'/core/create/'+str(classNID)+'?xds=CourseFeedMsg&xdsr=CourseFeed&rxdstype=ref&merge=merge',data=messageSubmission,cookies=self.getCookies(),headers=self.getHeaders()).json()['slice']['slices'][0]['data']['item']
+        postMetadata = self._call('postMessageInClassFeed', classNID=classNID, data=messageSubmission)
         parentRID = next(iter(postMetadata))
         cookies = self.session.cookies.get_dict()
 
@@ -922,7 +1141,7 @@ class Edsby(object):
 
         uploadData['files'] = (fileName, open(filePath, 'rb'))
 
-        return requests.post('https://'+self.edsbyHost+'/core/create/'+str(classNID)+'/'+str(postMetadata[parentRID]['rid'])+'/'+str(postMetadata[parentRID]['nid'])+'?xds=MultiFileUploader',files=uploadData,cookies=self.getCookies(),headers=self.getHeaders()).json()
+        return self._call('uploadFileInClassFeed', classNID=classNID, parentRID=postMetadata[parentRID]['rid'], parentNID=postMetadata[parentRID]['nid'], files=uploadData)
 
     """
         Likes an item in the feed for a class
@@ -933,7 +1152,7 @@ class Edsby(object):
             'likes': 1,
             '_formkey': self.studentData['formkey'],
         }
-        return requests.post('https://'+self.edsbyHost+'/core/node/'+str(classNID)+'/'+str(feedItemRID)+'/'+str(feedItemNID)+'?xds=doLike',data=likeData,cookies=self.getCookies(),headers=self.getHeaders()).json()
+        return self._call('likeItemInFeed', classNID=classNID, feedItemRID=feedItemRID, feedItemNID=feedItemNID, data=likeData)
 
     """
         Unlikes an item in the feed for a class
@@ -944,14 +1163,14 @@ class Edsby(object):
             'likes': None,
             '_formkey': self.studentData['formkey']
         }
-        return requests.post('https://'+self.edsbyHost+'/core/node/'+str(classNID)+'/'+str(feedItemRID)+'/'+str(feedItemNID)+'?xds=doLike',data=likeData,cookies=self.getCookies(),headers=self.getHeaders()).json()
+        return self._call('unlikeItemInFeed', classNID=classNID, feedItemRID=feedItemRID, feedItemNID=feedItemNID, data=likeData)
 
     """
         Retrieves metadata about files attached to feed items, should they be present
         If Edsby complains, call getClassFeed before using this function
     """
     def getAttachmentMetadata(self, feedItemNID, attachmentNID):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(feedItemNID)+'/'+str(attachmentNID)+'?xds=AlbumFileView',cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]['data']['contents']
+        return self._call('getAttachmentMetadata', feedItemNID=feedItemNID, attachmentNID=attachmentNID)
 
     """
         Generates the URL to download a particular file from Edsby, as such URLs are long and verbose.
@@ -959,7 +1178,7 @@ class Edsby(object):
         application (If you do, make sure you also take the session cookies with you).
     """
     def getAttachmentDownloadURL(self, classNID, feedItemNID, feedItemRID, attachmentNID):
-        return 'https://'+self.edsbyHost+'/core/nodedl/classNID/'+str(feedItemRID)+'/'+str(feedItemNID)+'/'+str(feedItemRID)+'/'+str(attachmentNID)+'?field=file&attach=1&xds=fileThumbnail'
+        return self.getEndpointURL('downloadAttachment', feedItemRID=feedItemRID, feedItemNID=feedItemNID, attachmentNID=attachmentNID)
 
     """
         Downloads an attachment from Edsby to the specified local path.
@@ -969,18 +1188,21 @@ class Edsby(object):
     def downloadAttachment(self, classNID, feedItemNID, feedItemRID, attachmentNID, filePath):
         self.getClassFeed(classNID)  # Must call these before attempting to download, otherwise API denies access
         self.getAttachmentMetadata(feedItemNID, feedItemRID) # Another prerequisite call
-        attachment = requests.get(self.getAttachmentDownloadURL(classNID, feedItemNID, feedItemRID, attachmentNID),cookies=self.getCookies(),headers=self.getHeaders(),stream=True)
+        attachment = self._call('downloadAttachment', feedItemRID=feedItemRID, feedItemNID=feedItemNID, attachmentNID=attachmentNID, stream=True)
+        downloaded = 0
         with open(filePath, 'wb') as localFile:
             for attachmentPart in attachment.iter_content(chunk_size=1024):
                 if attachmentPart:
                     localFile.write(attachmentPart)
+                    downloaded += len(attachmentPart)
+        self._recordTransfer('downloadAttachment', attachment, downloaded)
         return filePath
 
     """
         Retrieves the 'Edsby River' of school news available to the current user.
     """
     def getScrollingNews(self):
-        news = requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(self.studentData['nid'])+'?xds=scrollingNews',cookies=self.getCookies(),headers=self.getHeaders()).json()
+        news = self._call('getScrollingNews')
         return news if 'item' in news['slices'][0]['data']['boxLayout']['newsbox'] else ''
 
     """
@@ -990,9 +1212,87 @@ class Edsby(object):
         nids = [self.studentData['nid']]
         nids.extend(self.getCurrentClassNIDList())
         nids = '.'.join(str(e) for e in nids)
-        activity = requests.get('https://'+self.edsbyHost+'/core/multinode.json/'+nids+'?xds=BaseActivity&spage='+str(spage),cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]['data']['messages']
+        activity = self._call('getBaseActivity', nids=nids, spage=spage)
         return activity if 'item' in activity else ''
 
+    """
+        Returns an async generator of new notifications, direct messages and recent activity for this student,
+        as ChangeEvents. Takes the same keyword arguments as EventStream, e.g.
+            async for event in edsby.events(interval=30):
+    """
+    def events(self, **kwargs):
+        return EventStream([self], **kwargs).events()
+
+    """
+        Fetches a URL and yields the items (list entries, or dict values) found at path in the JSON response,
+        one at a time, e.g. path=['slices', 0, 'data', 'places', 'item']. Responses under streamThreshold bytes
+        (once decompressed) are decoded all at once, but bigger ones are parsed as they're downloaded, decoding
+        only the items under path, one item at a time, so huge responses are never held in memory whole.
+        Set withKeys to get (key, item) pairs instead. Nothing is yielded if the path doesn't exist.
+        Raises requests.HTTPError if Edsby responds with an error status.
+    """
+    def iterResponseItems(self, url, path, withKeys=False, endpointName=None):
+        response = self._request('GET', url, endpointName, stream=True)
+        decodedBytes = [0]
+        def chunks():
+            for chunk in response.iter_content(chunk_size=65536):
+                decodedBytes[0] += len(chunk)
+                yield chunk
+        try:
+            response.raise_for_status()
+            # Content-Length is the compressed size, so read up to streamThreshold decompressed bytes to find out
+            # whether the response is small enough to decode at once. If it isn't, stream what's been read and the rest.
+            body = chunks()
+            head = list()
+            for chunk in body:
+                head.append(chunk)
+                if decodedBytes[0] >= self.streamThreshold:
+                    items = _JSONPathStream(itertools.chain(head, body)).items(path, withKeys)
+                    break
+            else:
+                items = _walkItems(_decodeJSON(b''.join(head)), path, withKeys)
+            for item in items:
+                yield item
+        finally:
+            self._recordTransfer(endpointName, response, decodedBytes[0])
+            response.close()
+
+    """
+        Streams the items found at an endpoint's items path (see Endpoint and iterResponseItems).
+    """
+    def iterEndpointItems(self, name, withKeys=False, **args):
+        return self.iterResponseItems(self.getEndpointURL(name, **args), ENDPOINTS[name].items, withKeys, name)
+
+    """
+        Streaming version of getFullGroupRoster, which yields group members one at a time.
+    """
+    def iterFullGroupRoster(self, groupNID):
+        return self.iterEndpointItems('getFullGroupRoster', groupNID=groupNID)
+
+    """
+        Streaming version of getClassmates, which yields classmates one at a time.
+    """
+    def iterClassmates(self, classNID):
+        return self.iterEndpointItems('getClassmates', classNID=classNID)
+
+    """
+        Streaming version of getDirectMessages, which yields messages one at a time.
+    """
+    def iterDirectMessages(self):
+        return self.iterEndpointItems('getDirectMessages')
+
+    """
+        Streaming version of getClassFeed, which yields feed items one at a time.
+    """
+    def iterClassFeed(self, classNID):
+        return self.iterEndpointItems('getClassFeed', classNID=classNID)
+
+    """
+        Streaming version of getGroupFeed, which yields feed items one at a time.
+    """
+    def iterGroupFeed(self, groupNID, spage=0):
+        return self.iterEndpointItems('getGroupFeed', groupNID=groupNID, spage=spage)
+
     """
         Returns a dict of dicts containing groups the user is a part of in this format:
             'r<group RID>': {
@@ -1017,66 +1317,107 @@ class Edsby(object):
             }
     """
     def getStudentGroups(self):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(self.studentData['nid'])+'?xds=MyGroups&combine=true',cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]['data']['places']['item']
+        return self._call('getStudentGroups')
 
     """
         Helper to generate download URL for a given user's profile pic. Edsby itself returns a default profile pic if one does not exist.
     """
     def getProfilePicDownloadURL(self, userNID, size=0):
-        if size > 0:
-            return 'https://'+self.edsbyHost+'/core/nodedl/'+str(userNID)+'?nodepic=true&field=file&xds=fileThumbnail&size='+str(size)+','+str(size)
-        else:
-            return 'https://' + self.edsbyHost + '/core/nodedl/' + str(userNID) + '?nodepic=true&field=file&xds=fileThumbnail'
+        return self.getEndpointURL('getProfilePic', userNID=userNID, size=str(size)+','+str(size) if size > 0 else None)
 
     """
         Returns schedule for user for current date, or for targetDate if one is provided.
         targetDate must be formatted as YYYYMMDD.
     """
     def getSchedule(self,targetDate=0):
-        if targetDate == 0:
-            schedule = requests.get('https://' + self.edsbyHost + '/core/node.json/' + str(self.studentData['unid']) + '?xds=CalendarPanelNav_Student',cookies=self.getCookies(), headers=self.getHeaders()).json()['slices'][0]['data']
-            if 'itemdata' in schedule:
-                return schedule['itemdata']
-            else:
-                return None
+        schedule = self._call('getSchedule', targetDate=targetDate if targetDate != 0 else None)
+        if 'itemdata' in schedule:
+            return schedule['itemdata']
         else:
-            schedule = requests.get('https://' + self.edsbyHost + '/core/node.json/' + str(self.studentData['unid']) + '?xds=CalendarPanelNav_Student&targetDate='+str(targetDate), cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]['data']
-            if 'itemdata' in schedule:
-                return schedule['itemdata']
+            return None
+
+    """
+        Fetches the schedule for every day from startDate to endDate (inclusive) concurrently, and returns a
+        ScheduleIndex which can tell you which class the student is in at any time in that range without
+        calling Edsby again. Dates may be date objects or strings in any format Edsby uses. Weekends are
+        skipped unless includeWeekends is set.
+    """
+    def getScheduleRange(self, startDate, endDate, includeWeekends=False, maxWorkers=8):
+        day = _formatTimestamp(_parseTimestamp(startDate)).date()
+        lastDay = _formatTimestamp(_parseTimestamp(endDate)).date()
+        days = list()
+        while day <= lastDay:
+            if includeWeekends or day.weekday() < 5:
+                days.append(day)
+            day += timedelta(days=1)
+
+        schedules = list()
+        for day, schedule, error in _concurrentMap(lambda day: self.getSchedule(day.strftime('%Y%m%d')), days, maxWorkers):
+            if error is not None:
+                raise error
+            schedules.append((day, schedule))
+        return ScheduleIndex(schedules)
+
+    """
+        Fetches the calendars of all current classes and groups, along with the student's own calendar,
+        concurrently, and merges them into a single CalendarTimeline of CalendarEvent records. Each event's
+        kind says where it came from ('class', 'group', or the part of the student's calendar), and
+        sourceNID is the class or group NID. Entries that appear in more than one calendar are kept once.
+        Query the result by date window with CalendarTimeline.between, e.g. for a week view.
+    """
+    def getUnifiedTimeline(self, includeClasses=True, includeGroups=True, includeStudentCalendar=True, date=None, maxWorkers=8):
+        sources = list()
+        if includeClasses:
+            for classNID in self.getCurrentClassNIDList():
+                sources.append(('class', classNID, self.getClassCalendar))
+        if includeGroups:
+            for group in _itemValues(self.getStudentGroups()):
+                if 'nid' in group:
+                    sources.append(('group', group['nid'], self.getGroupCalendar))
+        if includeStudentCalendar:
+            sources.append(('student', self.studentData['unid'], lambda unid: self.getCalendarData(date)))
+
+        eventLists = list()
+        for (kind, NID, fetch), data, error in _concurrentMap(lambda source: source[2](source[1]), sources, maxWorkers):
+            if error is not None:
+                raise error
+            if kind == 'student':
+                eventLists.append(CalendarSnapshot(data, date).getTimelineEvents())
             else:
-                return None
+                eventLists.append(_sortEvents(_extractCalendarEvents(data, kind, NID)))
+        return CalendarTimeline.merge(*eventLists)
 
     """
         Returns the feed of all messages posted in the feed of a given group NID.
     """
     def getGroupFeed(self, groupNID, spage=0):
-        feed = requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(groupNID)+'?xds=PlaceFeed&spage='+str(spage),cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]['data']
+        feed = self._call('getGroupFeed', groupNID=groupNID, spage=spage)
         return feed if 'item' in feed else ''
     
     """
         Returns calendar entries for a specified group.
     """
     def getGroupCalendar(self, groupNID):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(groupNID)+'?xds=CalendarPanel_Place',cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]['data']
+        return self._call('getGroupCalendar', groupNID=groupNID)
 
     """
         Returns recent group members with last active date and time.
     """
     def getGroupActiveList(self, groupNID):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(groupNID)+'?xds=GroupActiveList',cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]['data']['places']['item']
+        return self._call('getGroupActiveList', groupNID=groupNID)
 
     """
         Returns all group members.
     """
     def getFullGroupRoster(self, groupNID):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(groupNID)+'?xds=ConferenceMemberList',cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]['data']['places']['item']
+        return self._call('getFullGroupRoster', groupNID=groupNID)
 
     """
         Returns poll data for a specified poll. The same info is returned in getClassFeed or getGroupFeed.
         Call getGroupFeed or getClassFeed (as applicable) before this to prevent errors.
     """
     def getPollData(self, groupNID, pollNID, pollRID):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(groupNID)+'/'+str(pollRID)+'/'+str(pollNID)+'?xds=FIBPoll',cookies=self.getCookies(),headers=self.getHeaders()).json()
+        return self._call('getPollData', groupNID=groupNID, pollRID=pollRID, pollNID=pollNID)
 
     """
         Returns all voters for a specified poll.
@@ -1084,7 +1425,7 @@ class Edsby(object):
     """
 
     def getPollVoters(self, groupNID, pollNID, pollRID):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(groupNID)+'/'+str(pollRID)+'/'+str(pollNID)+'?xds=PollGetVoters',cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]['data']
+        return self._call('getPollVoters', groupNID=groupNID, pollRID=pollRID, pollNID=pollNID)
 
     """
         Allows you to vote on items. Should work for classes to, though has only been tested with groups.
@@ -1095,7 +1436,7 @@ class Edsby(object):
             'vote': pollVote,
             '_formkey': self.studentData['formkey'],
         }
-        return requests.post('https://'+self.edsbyHost+'/core/node/'+str(groupNID)+'/'+str(pollRID)+'/'+str(pollNID)+'?xds=PollVote',data=voteData,cookies=self.getCookies(),headers=self.getHeaders()).json()
+        return self._call('voteItemInFeed', groupNID=groupNID, pollRID=pollRID, pollNID=pollNID, data=voteData)
 
     """
         Allows you to pin a message in a group.
@@ -1109,7 +1450,7 @@ class Edsby(object):
             'rid': feedItemRID,
             'value': 1,
         }
-        return requests.post('https://'+self.edsbyHost+'/core/putlink/'+str(groupNID)+'?xds=pin',data=pinData,cookies=self.getCookies(),headers=self.getHeaders()).json()
+        return self._call('pinFeedItem', groupNID=groupNID, data=pinData)
 
     """
         Allows you to pin a message in a group.
@@ -1123,7 +1464,7 @@ class Edsby(object):
             'rid': feedItemRID,
             'value': 0,
         }
-        return requests.post('https://'+self.edsbyHost+'/core/putlink/'+str(groupNID)+'?xds=pin',data=pinData,cookies=self.getCookies(),headers=self.getHeaders()).json()
+        return self._call('unpinFeedItem', groupNID=groupNID, data=pinData)
 
     """
         Posts a message in the group feed. This takes a dict called message, which looks like this:
@@ -1148,7 +1489,7 @@ class Edsby(object):
             'social-tools-addresources-integrations-integrationfiledata': message['filedata'],
             'social-tools-addresources-integrations-integrationfiles': message['files']
         }
-        return requests.post('https://'+self.edsbyHost+'/core/create/'+str(groupNID)+'?xds=feedmsg&xdsr=PlaceFeed&rxdstype=ref&noDirtyForm=true',data=messageSubmission,cookies=self.getCookies(),headers=self.getHeaders()).json()['slice']['slices'][0]['data']['item']
+        return self._call('postMessageInGroupFeed', groupNID=groupNID, data=messageSubmission)
 
     """
         Posts a message with an accompanying file in the group feed. This takes a dict called message,
@@ -1174,7 +1515,7 @@ class Edsby(object):
         
         files=[('upload',(fileName,open(filePath,'rb'),'application/octet-stream'))]
         
-        response = requests.post('https://'+self.edsbyHost+'/core/create.json/tmp?xds=MultiFileUploaderNoThumbnailing&nodetype=5.9&temp=tmp',files=files, data=uploadData,cookies=self.getCookies(),headers=self.getHeaders()).json()
+        response = self._call('uploadTemporaryFile', files=files, data=uploadData)
                 
         messageSubmission = {
             '_formkey': self.studentData['formkey'],
@@ -1188,7 +1529,7 @@ class Edsby(object):
             'social-tools-addresources-linkFiles': response['nid'],
             'social-tools-addresources-linkRich': response['nid']
         }
-        return requests.post('https://'+self.edsbyHost+'/core/create/'+str(groupNID)+'?xds=feedmsg&xdsr=PlaceFeed&rxdstype=ref&noDirtyForm=true',data=messageSubmission,cookies=self.getCookies(),headers=self.getHeaders()).json()['slice']['slices'][0]['data']['item']
+        return self._call('postMessageInGroupFeed', groupNID=groupNID, data=messageSubmission)
 
     """
         Deletes specified post in a group. 
@@ -1201,13 +1542,13 @@ class Edsby(object):
             'rid': postRID,
             'value': 0
         }
-        return requests.post('https://'+self.edsbyHost+'/core/putlink/'+str(groupNID)+'?xds=pin',data=body,cookies=self.getCookies(),headers=self.getHeaders()).json()
+        return self._call('deletePostInGroupFeed', groupNID=groupNID, data=body)
 
     """
         Returns raw data from a specified group.
     """
     def getRawGroupData(self, groupNID):
-        return requests.get('https://'+self.edsbyHost+'/core/node.json/'+str(groupNID)+'?xds=Place',cookies=self.getCookies(),headers=self.getHeaders()).json()['slices'][0]
+        return self._call('getRawGroupData', groupNID=groupNID)
 
     """
         Returns all moderators of a specified group.
@@ -1253,7 +1594,7 @@ class Edsby(object):
             
             files=[('upload',(fileName,open(filePath,'rb'),'application/octet-stream'))]
             
-            response = requests.post('https://'+self.edsbyHost+'/core/create.json/tmp?xds=MultiFileUploaderNoThumbnailing&nodetype=5.9&temp=tmp',files=files, data=uploadData,cookies=self.getCookies(),headers=self.getHeaders()).json()
+            response = self._call('uploadTemporaryFile', files=files, data=uploadData)
 
             body.update({
                 "file-linkFiles": response['nid'],
@@ -1269,7 +1610,7 @@ class Edsby(object):
             body[str(i)] = str(pollData["choices"][i])
             choices[str(i + 1)] = str(pollData["choices"][i])
         body["poll-enum"] = str(json.dumps(choices))
-        return requests.post('https://'+self.edsbyHost+'/core/create/'+str(groupNID)+'?xds=CreatePoll&xdsr=PlaceFeed&rxdstype=ref&validate=poll',data=body, cookies=self.getCookies(),headers=self.getHeaders()).json()
+        return self._call('postPollInGroupFeed', groupNID=groupNID, data=body)
 
     """
         Posts a reply to a message in the group feed. This takes a dict called message, which looks like this:
@@ -1298,7 +1639,7 @@ class Edsby(object):
             'replyToNode': message['parent_nid'],
             'thread': message['parent_nid']
         }
-        return requests.post('https://'+self.edsbyHost+'/core/create/'+str(groupNID)+'/'+str(message['parent_rid'])+'/'+str(groupNID)+'?xds=feedreply&xdsr=CourseFeed&__delegated=CourseFeed',data=messageSubmission,cookies=self.getCookies(),headers=self.getHeaders()).json()
+        return self._call('postReplyInGroupFeed', groupNID=groupNID, parentRID=message['parent_rid'], data=messageSubmission)
 
     """
         Invites a user to a group. Accepts group NID and a list of user NIDs.
@@ -1311,12 +1652,3772 @@ class Edsby(object):
             
             "body-members": usersNID
         }
-        return requests.post('https://'+self.edsbyHost+'/core/link/'+str(usersNID.replace(",", "."))+'?xds=PlacesInvite&_processed=true',data=body, cookies=self.getCookies(),headers=self.getHeaders()).json()
+        return self._call('inviteUsersToGroup', usersNIDs=usersNID.replace(",", "."), data=body)
 
-class Error(Exception):
-    pass
+    """
+        Invites any number of users to a group. Accepts a group NID and an iterable of user NIDs.
+        Users who are already on the group's roster (checked once with getFullGroupRoster) are skipped,
+        and the rest are invited in chunks of chunkSize, with up to maxWorkers chunks in flight at once.
+        A chunk that couldn't be sent (because the connection to Edsby couldn't be made) is retried up to
+        retries times, with exponential backoff between attempts. Other failures aren't retried, as Edsby may
+        already have sent the invitations, and sending them again would invite everyone in the chunk twice.
+        Returns a dict that looks like this:
+        {
+            'invited': [<NIDs of users that were invited>],
+            'skipped': [<NIDs of users that were already group members>],
+            'failed': {<NID of user>: '<why the chunk containing this user failed>'}
+        }
+    """
+    def inviteUsersToGroupInBulk(self, groupNID, usersNIDs, chunkSize=50, maxWorkers=4, retries=3, backoff=1.0):
+        roster = self.getFullGroupRoster(groupNID)
+        members = set(str(member['nid']) for member in _itemValues(roster) if 'nid' in member)
 
+        result = {
+            'invited': list(),
+            'skipped': list(),
+            'failed': dict()
+        }
+        pending = list()
+        seen = set()
+        for userNID in usersNIDs:
+            userNID = str(userNID)
+            if userNID in seen: # Ignore duplicates in the input
+                continue
+            seen.add(userNID)
+            if userNID in members:
+                result['skipped'].append(userNID)
+            else:
+                pending.append(userNID)
+
+        def invite(chunk):
+            response = self.inviteUsersToGroup(groupNID, ','.join(chunk))
+            if isinstance(response, dict) and 'error' in response:
+                raise RequestError(response['errorstr'] if 'errorstr' in response else str(response['error']))
+            return response
+
+        chunks = _chunked(pending, chunkSize)
+        for chunk, response, error in _concurrentMap(lambda chunk: _withBackoff(lambda: invite(chunk), retries, backoff, _requestNotSent), chunks, maxWorkers):
+            if error is None:
+                result['invited'].extend(chunk)
+            else:
+                for userNID in chunk:
+                    result['failed'][userNID] = str(error)
+        return result
 
-class LoginError(Error):
-    def __init__(self, message):
-        self.message = message
+"""
+    Describes one Edsby endpoint: where it lives, how to call it, and where the useful part of its response is.
+        path: path template, e.g. '/core/node.json/{classNID}'. {nid}, {unid} and {instanceNID} are filled in
+              from the student and instance metadata, and everything else from the method's arguments.
+        xds: the xds parameter, which tells Edsby which view of the node to return
+        params: list of (name, template) query parameters, sent in this order after xds. A parameter whose
+                template is just '{argument}' is left out when that argument is None.
+        method: 'GET' or 'POST'
+        extract: the path to the useful part of the JSON response, e.g. ('slices', 0, 'data'), or None to
+                 return the Response object itself
+        idempotent: whether the request can safely be retried (GETs are, POSTs aren't)
+        cacheable: whether the response changes rarely enough to be cached (see the cacheTTL option)
+        authenticated: whether the session cookies are sent with the request
+        items: the path to the list of items in the JSON response, for the streaming iter* methods, when it
+               isn't extract itself (e.g. when the getter checks the response before digging into it)
+"""
+class Endpoint(object):
+    def __init__(self, path, xds=None, params=(), method='GET', extract=('slices', 0, 'data'), idempotent=None, cacheable=False, authenticated=True, items=None):
+        self.path = path
+        self.xds = xds
+        self.params = tuple(params)
+        self.method = method
+        self.extract = extract
+        self.idempotent = method == 'GET' if idempotent is None else idempotent
+        self.cacheable = cacheable
+        self.authenticated = authenticated
+        self.items = items if items is not None else extract
+
+
+_feedReplyParams = (('xdsr', 'CourseFeed'), ('__delegated', 'CourseFeed'))
+_placeFeedParams = (('xdsr', 'PlaceFeed'), ('rxdstype', 'ref'), ('noDirtyForm', 'true'))
+
+"""
+    Every endpoint PyEdsby uses, keyed by the name of the method that calls it.
+"""
+ENDPOINTS = {
+    # Session and authentication
+    'parseInstanceMetadata': Endpoint('', extract=None, authenticated=False),
+    'getSession': Endpoint('/core/login/{instanceNID}', 'loginform', [('editable', 'true')], extract=None, authenticated=False),
+    'getauthData': Endpoint('/core/node.json/{instanceNID}', 'fetchcryptdata', [('type', 'Plaintext-LeapLDAP')], extract=('slices', 0)),
+    'sendAuthenticationData': Endpoint('/core/login/{instanceNID}', 'loginform', [('editable', 'true')], 'POST', extract=None),
+
+    # Student
+    'getBootstrapData': Endpoint('/core/node.json/', 'bootstrap', extract=(), cacheable=True),
+    'getBaseStudentData': Endpoint('/core/node.json/{unid}', 'BaseStudent', extract=(), cacheable=True),
+    'getStudentPersonalInfo': Endpoint('/core/node.json/{unid}', 'editPersonalInformation', extract=('slices', 0), cacheable=True),
+    'getAccountSettings': Endpoint('/core/node.json/{unid}', 'editSettings', extract=('slices', 0), cacheable=True),
+    'getStudentNotifications': Endpoint('/core/node.json/{unid}', 'notifications'),
+    'getCalendarData': Endpoint('/core/node.json/{unid}', 'Calendar', [('targetDate', '{date}')], extract=('slices', 0, 'data', 'caldata')),
+    'getSchedule': Endpoint('/core/node.json/{unid}', 'CalendarPanelNav_Student', [('targetDate', '{targetDate}')], cacheable=True),
+    'getScrollingNews': Endpoint('/core/node.json/{nid}', 'scrollingNews', extract=()),
+    'getBaseActivity': Endpoint('/core/multinode.json/{nids}', 'BaseActivity', [('spage', '{spage}')], extract=('slices', 0, 'data', 'messages')),
+    'getStudentGroups': Endpoint('/core/node.json/{nid}', 'MyGroups', [('combine', 'true')], extract=('slices', 0, 'data', 'places', 'item'), cacheable=True),
+    'getProfilePic': Endpoint('/core/nodedl/{userNID}', 'fileThumbnail', [('nodepic', 'true'), ('field', 'file'), ('xds', ''), ('size', '{size}')], extract=None, cacheable=True),
+
+    # Classes
+    'getRawCurrentClassData': Endpoint('/core/node.json/{nid}', 'BaseStudentClasses', [('match', 'multi')], extract=('slices', 0, 'data', 'classesContainer', 'classes'), cacheable=True),
+    'getRawClassData': Endpoint('/core/node.json/{nid}', 'ClassPicker', [('match', 'multi')], extract=('slices', 0, 'data', 'classes'), cacheable=True),
+    'getClassAverage': Endpoint('/core/node.json/{classNID}', 'MyWork', [('student', '{unid}')]),
+    'getClassAssignmentMetadata': Endpoint('/core/node.json/{classNID}', 'MyWork', [('student', '{unid}')], extract=('slices', 0, 'data', 'loaddata', 'gradebook', 'terms')),
+    'getClassAssignmentScores': Endpoint('/core/node.json/{classNID}/{classRID}/{classNID}', 'MyWorkAssessmentPane', [('unit', 'all'), ('student', '{unid}'), ('model', '24605449')], extract=('slices', 0, 'data', 'grades')),
+    'getMixedFormatClassAssignmentScores': Endpoint('/core/node.json/{classNID}/{classRID}/{classNID}', 'MyWorkChart', [('student', '{unid}')], extract=('slices', 0, 'data', 'loaddata', 'grades')),
+    'getClassPublishedAssignments': Endpoint('/core/node.json/{classNID}/{classRID}/{classNID}', 'MyWorkChart', [('student', '{unid}')], extract=('slices', 0, 'data', 'bubbles', 'publishedAssessments')),
+    'getRawClassAttendanceRecords': Endpoint('/core/node.json/{classNID}', 'MyWorkChart', [('student', '{unid}')], items=('slices', 0, 'data', 'chartContainer', 'chart', 'attendanceRecords', 'data', 'right', 'records', 'incident')),
+    'getClassmates': Endpoint('/core/node.json/{classNID}', 'ClassStudentList', extract=(), cacheable=True, items=('slices', 0, 'data', 'places', 'item')),
+    'getClassFeed': Endpoint('/core/node.json/{classNID}', 'CourseFeed', items=('slices', 0, 'data', 'item')),
+    'getClassCalendar': Endpoint('/core/node.json/{classNID}', 'CalendarPanel_Class'),
+    'getClassPlan': Endpoint('/core/node.json/{classNID}', 'Course', [('_context', '1')], extract=('slices', 0, 'data', 'col1', 'outline', 'plan', 'tree'), cacheable=True),
+    'postMessageInClassFeed': Endpoint('/core/create/{classNID}', 'CourseFeedMsg', [('xdsr', 'CourseFeed'), ('rxdstype', 'ref'), ('merge', 'merge')], 'POST', extract=('slice', 'slices', 0, 'data', 'item')),
+    'editMessageInClassFeed': Endpoint('/core/node/{classNID}/{feedItemRID}/{feedItemNID}', 'feedItemEdit', [('_i', '2')], 'POST', extract=()),
+    'postReplyInClassFeed': Endpoint('/core/create/{classNID}/{parentRID}/{classNID}', 'feedreply', _feedReplyParams, 'POST', extract=('slice', 'slices', 0, 'data', 'item')),
+    'uploadFileInClassFeed': Endpoint('/core/create/{classNID}/{parentRID}/{parentNID}', 'MultiFileUploader', method='POST', extract=()),
+    'likeItemInFeed': Endpoint('/core/node/{classNID}/{feedItemRID}/{feedItemNID}', 'doLike', method='POST', extract=()),
+    'unlikeItemInFeed': Endpoint('/core/node/{classNID}/{feedItemRID}/{feedItemNID}', 'doLike', method='POST', extract=()),
+    'getAttachmentMetadata': Endpoint('/core/node.json/{feedItemNID}/{attachmentNID}', 'AlbumFileView', extract=('slices', 0, 'data', 'contents'), cacheable=True),
+    'downloadAttachment': Endpoint('/core/nodedl/classNID/{feedItemRID}/{feedItemNID}/{feedItemRID}/{attachmentNID}', 'fileThumbnail', [('field', 'file'), ('attach', '1'), ('xds', '')], extract=None),
+
+    # Messages and links
+    'getDirectMessages': Endpoint('/core/node.json/{unid}', 'Messages', [('_context', '1')], extract=('slices', 0, 'data', 'body', 'left', 'items', 'item')),
+    'sendDirectMessage': Endpoint('/core/create/{to}', 'MessagesCompose', [('permaLinkKey', 'false'), ('scopeState', 'true'), ('_processed', 'true')], 'POST', extract=()),
+    'lookUpMessageRecipient': Endpoint('/core/node.json/{unid}', 'msgUserPicker', [('pattern', '{query}'), ('noForm', 'true')], cacheable=True, items=('slices', 0, 'data', 'item')),
+    'scrapeURLMetadata': Endpoint('/load/embed.json/{classNID}', 'bookMarkPreview', [('scrape', '{url}')], cacheable=True),
+
+    # Groups
+    'getGroupFeed': Endpoint('/core/node.json/{groupNID}', 'PlaceFeed', [('spage', '{spage}')], items=('slices', 0, 'data', 'item')),
+    'getGroupCalendar': Endpoint('/core/node.json/{groupNID}', 'CalendarPanel_Place'),
+    'getGroupActiveList': Endpoint('/core/node.json/{groupNID}', 'GroupActiveList', extract=('slices', 0, 'data', 'places', 'item')),
+    'getFullGroupRoster': Endpoint('/core/node.json/{groupNID}', 'ConferenceMemberList', extract=('slices', 0, 'data', 'places', 'item'), cacheable=True),
+    'getRawGroupData': Endpoint('/core/node.json/{groupNID}', 'Place', extract=('slices', 0), cacheable=True),
+    'getPollData': Endpoint('/core/node.json/{groupNID}/{pollRID}/{pollNID}', 'FIBPoll', extract=()),
+    'getPollVoters': Endpoint('/core/node.json/{groupNID}/{pollRID}/{pollNID}', 'PollGetVoters'),
+    'voteItemInFeed': Endpoint('/core/node/{groupNID}/{pollRID}/{pollNID}', 'PollVote', method='POST', extract=()),
+    'pinFeedItem': Endpoint('/core/putlink/{groupNID}', 'pin', method='POST', extract=()),
+    'unpinFeedItem': Endpoint('/core/putlink/{groupNID}', 'pin', method='POST', extract=()),
+    'deletePostInGroupFeed': Endpoint('/core/putlink/{groupNID}', 'pin', method='POST', extract=()),
+    'postMessageInGroupFeed': Endpoint('/core/create/{groupNID}', 'feedmsg', _placeFeedParams, 'POST', extract=('slice', 'slices', 0, 'data', 'item')),
+    'uploadTemporaryFile': Endpoint('/core/create.json/tmp', 'MultiFileUploaderNoThumbnailing', [('nodetype', '5.9'), ('temp', 'tmp')], 'POST', extract=()),
+    'postPollInGroupFeed': Endpoint('/core/create/{groupNID}', 'CreatePoll', [('xdsr', 'PlaceFeed'), ('rxdstype', 'ref'), ('validate', 'poll')], 'POST', extract=()),
+    'postReplyInGroupFeed': Endpoint('/core/create/{groupNID}/{parentRID}/{groupNID}', 'feedreply', _feedReplyParams, 'POST', extract=()),
+    'inviteUsersToGroup': Endpoint('/core/link/{usersNIDs}', 'PlacesInvite', [('_processed', 'true')], 'POST', extract=())
+}
+
+
+"""
+    A token bucket limiting how many requests per second are made, shared by every Edsby instance it's
+    passed to (with the rateLimiter option). Up to burst requests can be made at once after a quiet spell.
+"""
+class RateLimiter(object):
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.time()
+        self.lock = threading.Lock()
+
+    """
+        Blocks until a request may be made.
+    """
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.time()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+"""
+    Cuts down the round trips made by message recipient autocomplete (see Edsby.lookUpMessageRecipient).
+    Each query's results are remembered for ttl seconds, so retyping a query (e.g. after a backspace) doesn't
+    look it up again. Without filterLocally that's all it does: it's a ttl second memo of exact queries, and
+    every new keystroke is still looked up on Edsby.
+
+    With filterLocally set, a query is also answered from the results of a shorter one it starts with (e.g.
+    'smi' from 'sm'), by keeping the recipients whose names contain it. The names of recipients from complete
+    results are kept in a sorted index of their suffixes, so finding them is a binary search rather than a
+    scan. That assumes Edsby matches any part of a name, ignoring case, and is only done from results Edsby
+    said were complete (see _recipientsComplete); Edsby cuts long lists short, and a cut short list would
+    silently leave people out. It's off by default because Edsby's matching rules aren't documented.
+
+    Identical lookups that are already in flight share the one request, and lookupLater debounces lookups
+    made while typing, so only the last query typed within debounce seconds is looked up. Results are lists of
+    the recipient dicts Edsby returns, shared with the cache, so don't modify them.
+"""
+class RecipientDirectory(object):
+    def __init__(self, edsby, ttl=30, filterLocally=False, debounce=0.15):
+        self.edsby = edsby
+        self.ttl = ttl
+        self.filterLocally = filterLocally
+        self.debounce = debounce
+        self.results = dict() # normalized query -> (fetched at, list of recipient keys, complete)
+        self.recipients = dict() # recipient key -> (recipient dict, lowercased name)
+        self.suffixes = list() # Sorted (suffix of a lowercased name, recipient key), for complete results only
+        self.indexedNames = dict() # recipient key -> the lowercased name its suffixes were indexed under
+        self.inFlight = dict() # normalized query -> Future
+        self.timer = None
+        self.lock = threading.Lock()
+        self.stats = {'cached': 0, 'local': 0, 'remote': 0, 'coalesced': 0}
+
+    """
+        Returns the list of recipients matching query, from the cache, by filtering an earlier lookup's
+        results (with filterLocally), or from Edsby, in that order of preference.
+    """
+    def lookup(self, query):
+        query = ' '.join(query.lower().split())
+        if query == '':
+            return list()
+        with self.lock:
+            recipients = self._lookupLocally(query)
+            if recipients is not None:
+                return recipients
+            future = self.inFlight.get(query)
+            owner = future is None
+            if owner:
+                future = self.inFlight[query] = Future()
+                self.stats['remote'] += 1
+            else:
+                self.stats['coalesced'] += 1
+        if not owner: # Someone else is already looking this up, so wait for their result
+            return future.result()
+
+        try:
+            data = self.edsby._call('lookUpMessageRecipient', query=query)
+            recipients = _itemValues(data.get('item'))
+            with self.lock:
+                self._store(query, recipients, _recipientsComplete(data, recipients))
+            future.set_result(recipients)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.inFlight[query]
+        return recipients
+
+    """
+        Debounced lookup for autocomplete: looks query up once debounce seconds pass without another call,
+        then calls callback(query, recipients, error). Calls superseded by a newer one are dropped.
+    """
+    def lookupLater(self, query, callback):
+        def run():
+            try:
+                recipients = self.lookup(query)
+            except Exception as e:
+                callback(query, None, e)
+                return
+            callback(query, recipients, None)
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+            self.timer = threading.Timer(self.debounce, run)
+            self.timer.daemon = True
+            self.timer.start()
+
+    """
+        Forgets all cached lookups.
+    """
+    def invalidate(self):
+        with self.lock:
+            self.results = dict()
+            self.recipients = dict()
+            self.suffixes = list()
+            self.indexedNames = dict()
+
+    """
+        Returns how many lookups were served from the cache, filtered locally from an earlier lookup,
+        sent to Edsby, or coalesced with a lookup that was already in flight.
+    """
+    def getStats(self):
+        with self.lock:
+            return dict(self.stats)
+
+    def _lookupLocally(self, query):
+        now = time.time()
+        cached = self.results.get(query)
+        if cached is not None and now - cached[0] < self.ttl:
+            self.stats['cached'] += 1
+            return [self.recipients[key][0] for key in cached[1]]
+
+        if not self.filterLocally:
+            return None
+        # A complete, cached result for a query this one starts with holds all of its matches. Try the longest.
+        for length in range(len(query) - 1, 0, -1):
+            cached = self.results.get(query[:length])
+            if cached is not None and cached[2] and now - cached[0] < self.ttl:
+                low = bisect.bisect_left(self.suffixes, (query, ))
+                high = bisect.bisect_left(self.suffixes, (query + '\U0010ffff', ))
+                matches = set(key for suffix, key in self.suffixes[low:high])
+                keys = [key for key in cached[1] if key in matches]
+                self.results[query] = (cached[0], keys, True)
+                self.stats['local'] += 1
+                return [self.recipients[key][0] for key in keys]
+        return None
+
+    def _store(self, query, recipients, complete):
+        keys = list()
+        for recipient in recipients:
+            key = _itemKey(recipient)
+            self.recipients[key] = (recipient, _recipientName(recipient))
+            keys.append(key)
+        self.results[query] = (time.time(), keys, complete)
+        if self.filterLocally and complete:
+            self._index(keys)
+
+    """
+        Adds the names of recipients to the suffix index, replacing their old names if they've changed.
+    """
+    def _index(self, keys):
+        changed = [key for key in keys if self.indexedNames.get(key) != self.recipients[key][1]]
+        if len(changed) == 0:
+            return
+        stale = set(changed)
+        suffixes = [entry for entry in self.suffixes if entry[1] not in stale]
+        for key in changed:
+            name = self.recipients[key][1]
+            self.indexedNames[key] = name
+            suffixes.extend((name[start:], key) for start in range(len(name)))
+        suffixes.sort()
+        self.suffixes = suffixes
+
+
+"""
+    Caches link previews scraped by Edsby (see Edsby.scrapeURLMetadata), along with their formatted strings
+    (see getFormattedURLMetadataString), keyed by URL, so a link posted to many classes is only scraped once.
+    Pass one to Edsby with the urlPreviewCache option; it can be shared between several instances.
+
+    Previews are kept for ttl seconds, and once there are more than maxEntries the least recently used ones
+    are dropped. If path is given, the cache is loaded from and saved to that JSON file, so it survives
+    restarts. Simultaneous requests for the same URL share a single scrape.
+"""
+class URLPreviewCache(object):
+    def __init__(self, ttl=86400, maxEntries=1024, path=None):
+        self.ttl = ttl
+        self.maxEntries = maxEntries
+        self.path = path
+        self.entries = OrderedDict() # url -> {'metadata', 'formatted', 'fetched_at'}, least recently used first
+        self.inFlight = dict()
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'scrapes': 0, 'coalesced': 0}
+        if path is not None and os.path.exists(path):
+            with codecs.open(path, 'r', 'utf-8') as cacheFile:
+                for url, entry in json.load(cacheFile):
+                    self.entries[url] = entry
+            self._evict()
+
+    """
+        Returns the scraped metadata for url, scraping it through classNID's feed if it isn't cached.
+    """
+    def getMetadata(self, edsby, classNID, url):
+        return deepcopy(self._getEntry(edsby, classNID, url)['metadata'])
+
+    """
+        Returns the formatted metadata string for url (as getFormattedURLMetadataString does).
+    """
+    def getFormattedString(self, edsby, classNID, url):
+        return self._getEntry(edsby, classNID, url)['formatted']
+
+    def _getEntry(self, edsby, classNID, url):
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is not None and time.time() - entry['fetched_at'] < self.ttl:
+                self.entries.move_to_end(url)
+                self.stats['hits'] += 1
+                return entry
+            future = self.inFlight.get(url)
+            owner = future is None
+            if owner:
+                future = self.inFlight[url] = Future()
+                self.stats['scrapes'] += 1
+            else:
+                self.stats['coalesced'] += 1
+        if not owner: # Someone else is already scraping this URL, so wait for theirs
+            return future.result()
+
+        try:
+            metadata = edsby._call('scrapeURLMetadata', classNID=classNID, url=url)
+            entry = {'metadata': metadata, 'formatted': json.dumps(edsby.formatURLMetadata(metadata)), 'fetched_at': time.time()}
+            with self.lock:
+                self.entries[url] = entry
+                self.entries.move_to_end(url)
+                self._evict()
+                if self.path is not None:
+                    self._save()
+            future.set_result(entry)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.inFlight[url]
+        return entry
+
+    def _evict(self):
+        now = time.time()
+        for url in [url for url, entry in self.entries.items() if now - entry['fetched_at'] >= self.ttl]:
+            del self.entries[url]
+        while len(self.entries) > self.maxEntries:
+            self.entries.popitem(last=False)
+
+    def _save(self):
+        _writeJSONAtomically(self.path, list(self.entries.items()))
+
+    """
+        Forgets url, or every cached preview if url isn't given.
+    """
+    def invalidate(self, url=None):
+        with self.lock:
+            if url is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(url, None)
+            if self.path is not None:
+                self._save()
+
+    """
+        Returns how many previews were served from the cache, scraped, or shared with a scrape in flight.
+    """
+    def getStats(self):
+        with self.lock:
+            return dict(self.stats)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+"""
+    Sends requests to Edsby over the network, through a requests Session. This is the default transport.
+    A transport is anything with a request(method, url, **kwargs) method that takes the same arguments as
+    requests.Session.request and returns a requests Response.
+"""
+class RequestsTransport(object):
+    def __init__(self, session=None):
+        self.session = session if session is not None else requests.Session()
+
+    def request(self, method, url, **kwargs):
+        return self.session.request(method, url, **kwargs)
+
+
+"""
+    Wraps another transport, and appends every exchange that passes through it to a cassette file (one JSON
+    object per line), for ReplayTransport to serve back later. Only the request method and URL are kept from
+    the request, never its body, cookies or headers, so passwords and form keys aren't recorded. The URL is
+    scrubbed too: NIDs in its path and the values of its query parameters (search terms, scraped URLs and so
+    on) are replaced with pseudonyms, which are the same every time so replays still match (see _cassetteKey).
+    Cookie values in responses are replaced with 'scrubbed', and in JSON responses the values of scrubKeys
+    (names, message and post text, link targets, emails and authentication data by default, matched
+    ignoring case, so 'lastname' covers Edsby's 'LastName') are replaced too, as are email addresses
+    anywhere in the body.
+    include is an optional regex; only URLs matching it are recorded.
+    Streamed responses are read in full so they can be recorded, so don't record huge downloads.
+"""
+class RecordingTransport(object):
+    scrubKeys = ('name', 'fname', 'mname', 'lname', 'firstname', 'lastname', 'fullname', 'author', 'email', 'phone', 'address',
+                 'birthdate', 'text', 'body', 'message', 'href', 'url', 'guid', 'formkey', '_formkey', 'sauthdata', 'login-userid', 'login-password')
+
+    def __init__(self, path, transport=None, scrubKeys=None, include=None):
+        self.path = path
+        self.transport = transport if transport is not None else RequestsTransport()
+        self.scrubKeys = frozenset(key.lower() for key in (scrubKeys if scrubKeys is not None else RecordingTransport.scrubKeys))
+        self.include = re.compile(include) if include is not None else None
+        self.lock = threading.Lock()
+        self.recorded = 0
+
+    def request(self, method, url, **kwargs):
+        started = time.time()
+        response = self.transport.request(method, url, **kwargs)
+        if self.include is None or self.include.search(url):
+            self.record(method, url, response, time.time() - started)
+        return response
+
+    """
+        Appends an exchange to the cassette.
+    """
+    def record(self, method, url, response, elapsed=0.0):
+        interaction = {
+            'method': method,
+            'url': _cassetteKey(url),
+            'status': response.status_code,
+            'headers': {'content-type': response.headers.get('content-type', '')},
+            'cookies': dict((name, 'scrubbed') for name in response.cookies.keys()),
+            'elapsed': round(elapsed, 6)
+        }
+        content = response.content
+        try:
+            interaction['json'] = self.scrub(_decodeJSON(content))
+        except ValueError:
+            try:
+                interaction['text'] = _emailPattern.sub('user@example.com', content.decode('utf-8'))
+            except UnicodeDecodeError:
+                interaction['base64'] = base64.b64encode(content).decode('ascii')
+        line = json.dumps(interaction, separators=(',', ':'))
+        with self.lock:
+            with codecs.open(self.path, 'a', 'utf-8') as cassette:
+                cassette.write(line+'\n')
+            self.recorded += 1
+
+    """
+        Returns a copy of decoded JSON with the values of scrubKeys, and any email addresses, replaced.
+    """
+    def scrub(self, data):
+        if isinstance(data, dict):
+            return dict((key, 'scrubbed' if key.lower() in self.scrubKeys and isinstance(value, str) else self.scrub(value)) for key, value in data.items())
+        if isinstance(data, list):
+            return [self.scrub(value) for value in data]
+        if isinstance(data, str):
+            return _emailPattern.sub('user@example.com', data)
+        return data
+
+
+"""
+    Serves the exchanges in a cassette file (see RecordingTransport) instead of sending requests, so it works
+    with no network access at all. Requests are matched on their method, path and query string, ignoring the
+    host, and if the same request was recorded several times its responses are served in turn, wrapping
+    around. Each response is delayed by latency seconds, plus a random amount up to jitter seconds.
+    Requests that weren't recorded raise a RequestError.
+"""
+class ReplayTransport(object):
+    def __init__(self, path, latency=0.0, jitter=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.interactions = dict()
+        self.served = dict()
+        self.lock = threading.Lock()
+        with codecs.open(path, 'r', 'utf-8') as cassette:
+            for line in cassette:
+                if line.strip():
+                    interaction = json.loads(line)
+                    self.interactions.setdefault((interaction['method'], interaction['url']), list()).append(interaction)
+
+    def request(self, method, url, **kwargs):
+        key = (method, _cassetteKey(url))
+        if key not in self.interactions:
+            raise RequestError('No recorded response for '+method+' '+key[1])
+        with self.lock:
+            served = self.served.get(key, 0)
+            self.served[key] = served + 1
+        interactions = self.interactions[key]
+        interaction = interactions[served % len(interactions)]
+
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter > 0 else 0)
+        if delay > 0:
+            time.sleep(delay)
+        return _replayResponse(url, interaction)
+
+    def __len__(self):
+        return sum(len(interactions) for interactions in self.interactions.values())
+
+
+"""
+    Holds the student's current classes (from BaseStudentClasses) and all of their classes (from
+    ClassPicker), indexed by NID, RID and course code. Edsby.getClassCatalog returns the catalog shared by
+    all of the class list methods, but you can also make your own:
+        catalog = ClassCatalog(edsby, ttl=600)
+        catalog.getClassByRID(<class RID>)
+
+    Each of the two lists is only fetched when a lookup needs it, so getCurrentClasses and
+    getCurrentClassNIDList never fetch ClassPicker, and then kept until it's older than ttl seconds. Set ttl
+    to None to keep them until refresh is called, or to 0 to reload them on every lookup. The class dicts
+    returned are copies, so they can be modified freely (getCurrentClassAverages adds averages to them, for example).
+"""
+class ClassCatalog(object):
+    def __init__(self, edsby, ttl=300):
+        self.edsby = edsby
+        self.ttl = ttl
+        self.loadedAt = {'current': None, 'all': None} # When each list was last fetched
+        self.currentClasses = dict() # class NID -> class dict, as returned by getCurrentClasses
+        self.pickerClasses = dict() # class NID -> class dict, as parsed from ClassPicker
+        self.allClasses = dict() # class NID -> class dict, as returned by getAllClasses
+        self.byRID = dict() # class RID -> class NID
+        self.byCourseCode = dict() # course code -> list of class NIDs
+        self.lock = threading.RLock()
+
+    """
+        Fetches BaseStudentClasses and ClassPicker (concurrently), or only the lists named in lists ('current'
+        and/or 'all'), and rebuilds the catalog's indexes.
+    """
+    def refresh(self, lists=('current', 'all')):
+        fetches = {'current': self.edsby.getRawCurrentClassData, 'all': self.edsby.getRawClassData}
+        fetched = _concurrentMap(lambda name: fetches[name](), list(lists), 2)
+        for name, raw, error in fetched:
+            if error is not None:
+                raise error
+
+        with self.lock:
+            for name, raw, error in fetched:
+                if name == 'current':
+                    self.currentClasses = _parseCurrentClasses(raw)
+                else:
+                    self.pickerClasses = _parseAllClasses(raw)
+                self.loadedAt[name] = time.time()
+            self._index()
+        return self
+
+    def _index(self):
+        allClasses = dict(self.pickerClasses)
+        for NID in self.currentClasses: # Classes that somehow aren't in the class picker are still classes
+            if NID not in allClasses:
+                allClasses[NID] = deepcopy(self.currentClasses[NID])
+
+        byRID = dict()
+        byCourseCode = dict()
+        for classes in (allClasses, self.currentClasses):
+            for NID in classes:
+                byRID[classes[NID]['rid']] = NID
+                codeNIDs = byCourseCode.setdefault(classes[NID]['course_code'], list())
+                if NID not in codeNIDs:
+                    codeNIDs.append(NID)
+        self.allClasses = allClasses
+        self.byRID = byRID
+        self.byCourseCode = byCourseCode
+
+    """
+        Loads the lists named in lists if they haven't been loaded yet, or reloads them if they've expired.
+    """
+    def load(self, lists=('current', 'all')):
+        with self.lock:
+            now = time.time()
+            stale = [name for name in lists if self.loadedAt[name] is None or (self.ttl is not None and now - self.loadedAt[name] >= self.ttl)]
+            if len(stale) > 0:
+                self.refresh(stale)
+        return self
+
+    """
+        Forgets everything loaded so far, so that the next lookup fetches the catalog again.
+    """
+    def invalidate(self):
+        with self.lock:
+            self.loadedAt = {'current': None, 'all': None}
+
+    """
+        Returns classes the student is currently enrolled in, in the same format as Edsby.getCurrentClasses
+    """
+    def getCurrentClasses(self):
+        with self.lock:
+            self.load(('current', ))
+            return deepcopy(self.currentClasses)
+
+    """
+        Returns every class, current and past, in the same format as Edsby.getAllClasses
+    """
+    def getAllClasses(self):
+        with self.lock:
+            self.load()
+            return deepcopy(self.allClasses)
+
+    """
+        Returns classes the student was previously enrolled in, in the same format as Edsby.getAllClasses
+    """
+    def getPastClasses(self):
+        with self.lock:
+            self.load()
+            return deepcopy(dict((NID, self.allClasses[NID]) for NID in self.allClasses if NID not in self.currentClasses))
+
+    def getCurrentClassNIDList(self):
+        with self.lock:
+            self.load(('current', ))
+            return list(self.currentClasses)
+
+    def getAllClassNIDList(self):
+        with self.lock:
+            self.load()
+            return list(self.allClasses)
+
+    def getPastClassNIDList(self):
+        with self.lock:
+            self.load()
+            return [NID for NID in self.allClasses if NID not in self.currentClasses]
+
+    """
+        Returns (current classes, all classes) from a single load of the catalog, so the two agree with each
+        other even when the catalog is reloaded on every lookup. ClassPicker is only fetched if includeAll is
+        set; otherwise all classes is None.
+    """
+    def getClassLists(self, includeAll=True):
+        with self.lock:
+            self.load(('current', 'all') if includeAll else ('current', ))
+            return deepcopy(self.currentClasses), deepcopy(self.allClasses) if includeAll else None
+
+    """
+        Returns True if the student is currently enrolled in the class, or False if it's a past class.
+    """
+    def isCurrent(self, classNID):
+        with self.lock:
+            self.load(('current', ))
+            return self.findNID(classNID) in self.currentClasses
+
+    def isPast(self, classNID):
+        with self.lock:
+            self.load()
+            classNID = self.findNID(classNID)
+            return classNID in self.allClasses and classNID not in self.currentClasses
+
+    """
+        Returns the catalog's key for a class NID, which is the NID as Edsby returned it (usually an int),
+        even if it's passed as a string.
+    """
+    def findNID(self, classNID):
+        if classNID in self.allClasses:
+            return classNID
+        for NID in self.allClasses:
+            if str(NID) == str(classNID):
+                return NID
+        return classNID
+
+    """
+        Returns the class dict for a class NID, preferring the current class data (which includes the
+        teacher's NID) when the class is current. Returns None for unknown classes.
+    """
+    def getClass(self, classNID):
+        self.load()
+        classNID = self.findNID(classNID)
+        if classNID in self.currentClasses:
+            return deepcopy(self.currentClasses[classNID])
+        if classNID in self.allClasses:
+            return deepcopy(self.allClasses[classNID])
+        return None
+
+    """
+        Returns the class dict for a class RID, or None if no class has that RID.
+    """
+    def getClassByRID(self, classRID):
+        self.load()
+        for RID in (classRID, str(classRID)):
+            if RID in self.byRID:
+                return self.getClass(self.byRID[RID])
+        for RID in self.byRID:
+            if str(RID) == str(classRID):
+                return self.getClass(self.byRID[RID])
+        return None
+
+    """
+        Returns a dict of class NID -> class dict for every class with the given course code.
+    """
+    def getClassesByCourseCode(self, courseCode):
+        self.load()
+        return dict((NID, self.getClass(NID)) for NID in self.byCourseCode.get(courseCode, list()))
+
+
+"""
+    An inverted index of class and group rosters, for answering questions about who shares which classes
+    without walking nested roster dicts. Student and class/group NIDs are encoded as small integers, and
+    each student maps to the set of classes/groups they belong to (and vice versa), so overlap queries
+    cost about as much as the rosters involved rather than the square of them.
+
+    Build one from the output of getCurrentClassRosters or getAllClassRosters:
+        index = RosterIndex(edsby.getCurrentClassRosters())
+    Or let it fetch everything itself, optionally including group rosters:
+        index = RosterIndex.fromEdsby(edsby, groupNIDs=[<group NID>, ...])
+"""
+class RosterIndex(object):
+    def __init__(self, rosterData=None):
+        self.studentIDs = dict() # student NID -> student ID
+        self.studentNIDs = list() # student ID -> student NID
+        self.studentData = list() # student ID -> classmate dict, as returned by Edsby
+        self.memberships = list() # student ID -> set of class/group IDs
+        self.classIDs = dict() # class/group NID -> class/group ID
+        self.classNIDs = list() # class/group ID -> class/group NID
+        self.classNames = list() # class/group ID -> human readable name
+        self.members = list() # class/group ID -> set of student IDs
+        if rosterData is not None:
+            self.addRosters(rosterData)
+
+    """
+        Builds an index from the current class rosters of an Edsby instance, or from every class roster
+        if allClasses is set. Rosters for any group NIDs passed are added with getFullGroupRoster.
+    """
+    @classmethod
+    def fromEdsby(cls, edsby, allClasses=False, groupNIDs=()):
+        index = cls(edsby.getAllClassRosters() if allClasses else edsby.getCurrentClassRosters())
+        for groupNID in groupNIDs:
+            index.addRoster(groupNID, edsby.getFullGroupRoster(groupNID))
+        return index
+
+    """
+        Adds every roster in a dict shaped like the output of getCurrentClassRosters/getAllClassRosters.
+    """
+    def addRosters(self, rosterData):
+        for NID in rosterData:
+            self.addRoster(NID, rosterData[NID]['classmates'], rosterData[NID].get('human_name'))
+        return self
+
+    """
+        Adds (or extends) the roster for a single class or group. roster is the item dict returned by
+        getClassmates or getFullGroupRoster.
+    """
+    def addRoster(self, classNID, roster, name=None):
+        classID = self._getClassID(classNID, name)
+        for student in _itemValues(roster):
+            if 'nid' not in student:
+                continue
+            studentID = self._getStudentID(student['nid'], student)
+            self.members[classID].add(studentID)
+            self.memberships[studentID].add(classID)
+        return self
+
+    def _getClassID(self, classNID, name=None):
+        classNID = str(classNID)
+        if classNID not in self.classIDs:
+            self.classIDs[classNID] = len(self.classNIDs)
+            self.classNIDs.append(classNID)
+            self.classNames.append(name)
+            self.members.append(set())
+        classID = self.classIDs[classNID]
+        if name is not None:
+            self.classNames[classID] = name
+        return classID
+
+    def _getStudentID(self, studentNID, student):
+        studentNID = str(studentNID)
+        if studentNID not in self.studentIDs:
+            self.studentIDs[studentNID] = len(self.studentNIDs)
+            self.studentNIDs.append(studentNID)
+            self.studentData.append(student)
+            self.memberships.append(set())
+        return self.studentIDs[studentNID]
+
+    """
+        Returns the classmate dict Edsby returned for a student NID (FirstName, LastName, nid, etc.)
+    """
+    def getStudent(self, studentNID):
+        return self.studentData[self.studentIDs[str(studentNID)]]
+
+    """
+        Returns the human readable name of a class or group, if one was provided when it was indexed.
+    """
+    def getClassName(self, classNID):
+        return self.classNames[self.classIDs[str(classNID)]]
+
+    """
+        Returns a list of NIDs for all classes and groups the specified student is a member of.
+    """
+    def getStudentClasses(self, studentNID):
+        studentNID = str(studentNID)
+        if studentNID not in self.studentIDs:
+            return list()
+        return [self.classNIDs[classID] for classID in self.memberships[self.studentIDs[studentNID]]]
+
+    """
+        Returns a list of NIDs for all students in the specified class or group.
+    """
+    def getClassRoster(self, classNID):
+        classNID = str(classNID)
+        if classNID not in self.classIDs:
+            return list()
+        return [self.studentNIDs[studentID] for studentID in self.members[self.classIDs[classNID]]]
+
+    """
+        Returns a list of NIDs for the students who are members of every class/group NID passed.
+    """
+    def getRosterIntersection(self, *classNIDs):
+        rosters = list()
+        for classNID in classNIDs:
+            classNID = str(classNID)
+            if classNID not in self.classIDs:
+                return list()
+            rosters.append(self.members[self.classIDs[classNID]])
+        if len(rosters) == 0:
+            return list()
+        rosters.sort(key=len) # Intersecting smallest first keeps every step as cheap as possible
+        common = set(rosters[0])
+        for roster in rosters[1:]:
+            common &= roster
+        return [self.studentNIDs[studentID] for studentID in common]
+
+    """
+        Returns a dict mapping the NID of every student who shares at least one class/group with the
+        specified student to the number of classes/groups they share, e.g. {'<student NID>': 3}
+    """
+    def getCoMembershipCounts(self, studentNID):
+        studentNID = str(studentNID)
+        if studentNID not in self.studentIDs:
+            return dict()
+        studentID = self.studentIDs[studentNID]
+        counts = dict()
+        for classID in self.memberships[studentID]:
+            for otherID in self.members[classID]:
+                if otherID != studentID:
+                    counts[otherID] = counts.get(otherID, 0) + 1
+        return dict((self.studentNIDs[otherID], count) for otherID, count in counts.items())
+
+    """
+        Returns the NIDs of students sharing at least k classes/groups with the specified student,
+        as a dict of student NID -> number of shared classes/groups.
+    """
+    def getStudentsSharingClasses(self, studentNID, k=2):
+        counts = self.getCoMembershipCounts(studentNID)
+        return dict((otherNID, count) for otherNID, count in counts.items() if count >= k)
+
+    """
+        Returns every pair of students who share at least k classes/groups, across the whole index, as a
+        dict of (student NID, student NID) -> number of shared classes/groups. The cost of this grows with
+        the number of pairs of students who share a class, so prefer getStudentsSharingClasses when you
+        only care about one student.
+    """
+    def getSharedClassPairs(self, k=2):
+        counts = dict()
+        for studentID in range(len(self.studentNIDs)):
+            for classID in self.memberships[studentID]:
+                for otherID in self.members[classID]:
+                    if otherID > studentID: # Count each pair once
+                        pair = (studentID, otherID)
+                        counts[pair] = counts.get(pair, 0) + 1
+        return dict(((self.studentNIDs[a], self.studentNIDs[b]), count) for (a, b), count in counts.items() if count >= k)
+
+
+"""
+    Compact record types for the data PyEdsby returns. Every getter still returns plain dicts, but if you're
+    holding data for many students at once, converting them into these records uses far less memory:
+    each record keeps its fields in __slots__ instead of a dict, repeated strings (teacher names, grading
+    schemes and so on) are interned, and the original data is kept as compact JSON bytes which are only
+    decoded when you ask for .raw. Pass keepRaw=False to drop the original data entirely, in which case
+    .raw rebuilds a dict from the record's fields.
+
+        classes = Class.fromDicts(edsby.getCurrentClassAverages())
+        assignments = Assignment.fromAssignmentList(edsby.getClassAssignmentList(classNID, classRID))
+"""
+class Record(object):
+    __slots__ = ('_raw',)
+    fields = ()
+
+    def __init__(self, raw=None, **kwargs):
+        for field in self.fields:
+            setattr(self, field, kwargs[field] if field in kwargs else None)
+        self._raw = json.dumps(raw, separators=(',', ':')).encode('utf-8') if raw is not None else None
+
+    """
+        The original dict this record was made from, decoded from its compact form on every access.
+    """
+    @property
+    def raw(self):
+        if self._raw is None:
+            return self.toDict()
+        return json.loads(self._raw.decode('utf-8'))
+
+    def toDict(self):
+        return dict((field, getattr(self, field)) for field in self.fields)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(getattr(self, field) == getattr(other, field) for field in self.fields)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    """
+        Records that are equal hash the same, so they can be kept in sets and used as dict keys like the
+        tuples and dicts they replace. Don't change a record's fields while it's in a set or used as a key.
+    """
+    def __hash__(self):
+        return hash((type(self).__name__, ) + tuple(_hashable(getattr(self, field)) for field in self.fields))
+
+    def __repr__(self):
+        return type(self).__name__+'('+', '.join(field+'='+repr(getattr(self, field)) for field in self.fields)+')'
+
+
+"""
+    A class, made from an entry in the dicts returned by getCurrentClasses, getAllClasses,
+    getCurrentClassAverages and the like.
+"""
+class Class(Record):
+    fields = ('nid', 'rid', 'name', 'courseCode', 'teacherName', 'teacherNID', 'average')
+    __slots__ = fields
+
+    @classmethod
+    def fromDict(cls, classNID, classDict, keepRaw=True):
+        teacher = classDict['teacher'] if 'teacher' in classDict else dict()
+        return cls(
+            raw=classDict if keepRaw else None,
+            nid=classNID,
+            rid=classDict.get('rid'),
+            name=_intern(classDict.get('human_name')),
+            courseCode=_intern(classDict.get('course_code')),
+            teacherName=_intern(teacher.get('name')),
+            teacherNID=teacher.get('nid'),
+            average=classDict.get('average')
+        )
+
+    """
+        Converts a whole dict of classes (class NID -> class dict) into a list of Class records.
+    """
+    @classmethod
+    def fromDicts(cls, classes, keepRaw=True):
+        return [cls.fromDict(NID, classes[NID], keepRaw) for NID in classes]
+
+
+"""
+    An assignment, made from an entry in the 'assignments' (or 'no_scores_found') dict returned by
+    getClassAssignmentList.
+"""
+class Assignment(Record):
+    fields = ('nid', 'rid', 'classNID', 'name', 'score', 'weighting', 'columns', 'scorePercentage', 'scheme', 'date', 'graded', 'published')
+    __slots__ = fields
+
+    @classmethod
+    def fromDict(cls, assignmentDict, classNID=None, keepRaw=True):
+        return cls(
+            raw=assignmentDict if keepRaw else None,
+            nid=assignmentDict.get('nid'),
+            rid=assignmentDict.get('rid'),
+            classNID=classNID,
+            name=assignmentDict.get('name'),
+            score=assignmentDict.get('score'),
+            weighting=assignmentDict.get('weighting'),
+            columns=assignmentDict.get('columns'),
+            scorePercentage=assignmentDict.get('scorePercentage'),
+            scheme=_intern(assignmentDict.get('scheme')),
+            date=_intern(assignmentDict.get('date')),
+            graded=assignmentDict.get('graded'),
+            published=_intern(assignmentDict.get('published'))
+        )
+
+    """
+        Converts the output of getClassAssignmentList into a list of Assignment records. Assignments
+        without scores are included too if includeUnscored is set.
+    """
+    @classmethod
+    def fromAssignmentList(cls, assignmentList, classNID=None, includeUnscored=False, keepRaw=True):
+        assignments = [cls.fromDict(assignment, classNID, keepRaw) for assignment in assignmentList['assignments'].values()]
+        if includeUnscored:
+            assignments.extend(cls.fromDict(assignment, classNID, keepRaw) for assignment in assignmentList['no_scores_found'].values())
+        return assignments
+
+
+"""
+    A classmate (or group member), made from an entry in the dicts returned by getClassmates,
+    getFullGroupRoster and the like.
+"""
+class Classmate(Record):
+    fields = ('nid', 'firstName', 'middleName', 'lastName')
+    __slots__ = fields
+
+    @classmethod
+    def fromDict(cls, classmateDict, keepRaw=True):
+        return cls(
+            raw=classmateDict if keepRaw else None,
+            nid=classmateDict.get('nid'),
+            firstName=_intern(classmateDict.get('FirstName')),
+            middleName=_intern(classmateDict.get('MName')),
+            lastName=_intern(classmateDict.get('LastName'))
+        )
+
+    """
+        Converts a roster (as returned by getClassmates or getFullGroupRoster) into a list of Classmate records.
+    """
+    @classmethod
+    def fromRoster(cls, roster, keepRaw=True):
+        return [cls.fromDict(classmate, keepRaw) for classmate in _itemValues(roster)]
+
+    @property
+    def name(self):
+        return ' '.join(part for part in (self.firstName, self.middleName, self.lastName) if part)
+
+
+"""
+    An item (post, reply, poll, etc.) from a class or group feed, the activity feed, or the news river.
+    sourceNID is the NID of the class or group the item was posted in, when known.
+"""
+class FeedItem(Record):
+    fields = ('nid', 'rid', 'sourceNID', 'author', 'text', 'date', 'nodetype', 'nodesubtype')
+    __slots__ = fields
+
+    @classmethod
+    def fromDict(cls, itemDict, sourceNID=None, keepRaw=True):
+        return cls(
+            raw=itemDict if keepRaw else None,
+            nid=itemDict.get('nid'),
+            rid=itemDict.get('rid'),
+            sourceNID=sourceNID,
+            author=_intern(_findValue(itemDict, ('author', 'authorName', 'creator', 'from', 'sender'))),
+            text=_findValue(itemDict, ('text', 'body', 'message', 'title')),
+            date=_findValue(itemDict, ('cdate', 'date', 'created', 'sdate')),
+            nodetype=itemDict.get('nodetype'),
+            nodesubtype=itemDict.get('nodesubtype')
+        )
+
+    """
+        Converts a feed (as returned by getClassFeed, getGroupFeed, getBaseActivity and so on) into a list
+        of FeedItem records.
+    """
+    @classmethod
+    def fromFeed(cls, feed, sourceNID=None, keepRaw=True):
+        return [cls.fromDict(item, sourceNID, keepRaw) for item in _feedItems(feed)]
+
+
+_eventStartKeys = ('sdate', 'startdate', 'start', 'date', 'ddate', 'duedate')
+
+"""
+    A calendar entry (event, due assignment, schedule entry and so on). start and end are seconds since the
+    epoch (see _parseTimestamp), kind says which part of the calendar it came from ('due', 'overdue',
+    'events', 'schedules', 'class', 'group' etc.), and sourceNID is the NID of the class or group calendar
+    it came from, when known.
+"""
+class CalendarEvent(Record):
+    fields = ('nid', 'title', 'start', 'end', 'kind', 'sourceNID')
+    __slots__ = fields
+
+    @classmethod
+    def fromDict(cls, eventDict, kind=None, sourceNID=None, keepRaw=True):
+        start = _parseTimestamp(_findValue(eventDict, _eventStartKeys))
+        end = _parseTimestamp(_findValue(eventDict, ('edate', 'enddate', 'end')))
+        return cls(
+            raw=eventDict if keepRaw else None,
+            nid=eventDict.get('nid'),
+            title=_findValue(eventDict, ('title', 'name', 'text', 'body')),
+            start=start,
+            end=end if end is not None and start is not None and end >= start else start,
+            kind=_intern(kind),
+            sourceNID=sourceNID
+        )
+
+    """
+        Converts a dict or list of calendar entries into a list of CalendarEvent records.
+    """
+    @classmethod
+    def fromEntries(cls, entries, kind=None, sourceNID=None, keepRaw=True):
+        return [cls.fromDict(entry, kind, sourceNID, keepRaw) for entry in _itemValues(entries) if isinstance(entry, dict)]
+
+
+"""
+    One fetch of a student's calendar (see Edsby.getCalendarData), with all of the views the getCalendar*
+    methods provide. Get one with Edsby.getCalendarSnapshot.
+"""
+class CalendarSnapshot(object):
+    def __init__(self, caldata, date=None):
+        self.data = caldata
+        self.date = date
+        self.fetchedAt = time.time()
+
+    """
+        Calendar entries for all upcoming due assignments
+    """
+    def getDueAssignments(self):
+        return self.data['due']
+
+    """
+        Calendar entries for currently overdue assignments
+    """
+    def getOverdueAssignments(self):
+        return self.data['overdue']
+
+    """
+        All available calendar events, with the details from the 'events' data merged in where present
+    """
+    def getEvents(self):
+        events = dict(self.data['common'])
+        for key in list(events):
+            if 'events' in self.data and str(key + '.0') in self.data['events']:
+                events[str(key)] = self.data['events'][str(key + '.0')]
+        return events
+
+    """
+        Calendar entries containing school scheduling information
+    """
+    def getSchedules(self):
+        return self.data['schedules']
+
+    """
+        Returns the entries from the chosen parts of the calendar ('due', 'overdue', 'events' and/or
+        'schedules') as CalendarEvent records, sorted by start time. sourceNID is recorded on each event.
+    """
+    def getTimelineEvents(self, kinds=('due', 'events', 'schedules'), sourceNID=None):
+        views = {
+            'due': self.getDueAssignments,
+            'overdue': self.getOverdueAssignments,
+            'events': self.getEvents,
+            'schedules': self.getSchedules
+        }
+        events = list()
+        for kind in kinds:
+            if kind in views and (kind if kind != 'events' else 'common') in self.data:
+                events.extend(CalendarEvent.fromEntries(views[kind](), kind, sourceNID))
+        return _sortEvents(events)
+
+
+"""
+    A sorted, interval-indexed list of CalendarEvent records. Looking up the events that overlap a time
+    window costs a binary search plus the events returned, so it can be queried freely once built.
+    Events without a start time can't be placed on the timeline, and are kept in undated instead.
+
+    Times passed to the lookup methods can be datetime or date objects, anything Edsby uses to represent
+    dates, or seconds since the epoch (see _parseTimestamp).
+"""
+class CalendarTimeline(object):
+    def __init__(self, events=()):
+        events = list(events)
+        self.undated = [event for event in events if event.start is None]
+        self.events = _sortEvents(event for event in events if event.start is not None)
+        self._index()
+
+    def _index(self):
+        self.starts = [event.start for event in self.events]
+        # maxEnds[i] is the latest end of any event up to i, which never decreases, so we can binary search
+        # it for the first event that could still be running at a given time.
+        self.maxEnds = list()
+        latest = None
+        for event in self.events:
+            latest = event.end if latest is None or event.end > latest else latest
+            self.maxEnds.append(latest)
+
+    """
+        Builds a timeline by merging lists of events that are each already sorted by start time (such as
+        the lists returned by CalendarSnapshot.getTimelineEvents). Events with the same NID and start time,
+        or the same title and start time if they have no NID, are only kept once.
+    """
+    @classmethod
+    def merge(cls, *eventLists):
+        timeline = cls()
+        seen = set()
+        for event in heapq.merge(*eventLists, key=_eventSortKey):
+            key = (event.nid if event.nid is not None else event.title, event.start)
+            if event.start is None:
+                timeline.undated.append(event)
+            elif key not in seen:
+                seen.add(key)
+                timeline.events.append(event)
+        timeline._index()
+        return timeline
+
+    def __len__(self):
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(self.events)
+
+    """
+        Returns the events that overlap the window from start to end, in order of start time.
+        Omitting start or end leaves that side of the window open.
+    """
+    def between(self, start=None, end=None):
+        start = _parseTimestamp(start)
+        end = _parseTimestamp(end)
+        first = 0 if start is None else bisect.bisect_left(self.maxEnds, start)
+        last = len(self.events) if end is None else bisect.bisect_right(self.starts, end)
+        return [event for event in self.events[first:last] if start is None or event.end >= start]
+
+    """
+        Returns the events happening at a particular time.
+    """
+    def at(self, moment):
+        return self.between(moment, moment)
+
+    """
+        Returns the events on a particular day.
+    """
+    def onDay(self, day):
+        start = _parseTimestamp(day)
+        start = start - start % 86400
+        return self.between(start, start + 86399)
+
+    """
+        Returns the first event that starts after a particular time, or None if there isn't one.
+    """
+    def next(self, moment):
+        position = bisect.bisect_right(self.starts, _parseTimestamp(moment))
+        return self.events[position] if position < len(self.events) else None
+
+
+"""
+    One period in a day's schedule. Inside a ScheduleIndex, start and end are seconds after midnight, but
+    the periods returned by its lookups have start and end in seconds since the epoch like CalendarEvent.
+"""
+class SchedulePeriod(Record):
+    fields = ('start', 'end', 'title', 'room', 'classNID')
+    __slots__ = fields
+
+    @classmethod
+    def fromDict(cls, periodDict, keepRaw=False):
+        start = _parseTimeOfDay(_findValue(periodDict, ('stime', 'starttime', 'start', 'sdate', 'time')))
+        end = _parseTimeOfDay(_findValue(periodDict, ('etime', 'endtime', 'end', 'edate')))
+        times = _findValue(periodDict, ('time', 'period', 'times'))
+        if isinstance(times, str) and '-' in times and (start is None or end is None): # e.g. "8:30 AM - 9:45 AM"
+            start, end = [_parseTimeOfDay(part) for part in times.split('-', 1)]
+        return cls(
+            raw=periodDict if keepRaw else None,
+            start=start,
+            end=end if end is not None and start is not None and end >= start else start,
+            title=_intern(_findValue(periodDict, ('title', 'name', 'course', 'class', 'text'))),
+            room=_intern(_findValue(periodDict, ('room', 'location', 'place'))),
+            classNID=_findValue(periodDict, ('classNid', 'classnid', 'nid'))
+        )
+
+
+"""
+    A term's worth of schedules (see Edsby.getScheduleRange), indexed by time. Days that follow the same
+    schedule share a single copy of it, so a term costs little more than its distinct bell schedules.
+    at and nextPeriod are binary searches over the days and then the periods of one day, so they're
+    cheap enough to call on every page view.
+
+    Times can be datetime objects, anything Edsby uses to represent dates and times, or seconds since the
+    epoch (see _parseTimestamp).
+"""
+class ScheduleIndex(object):
+    def __init__(self, schedules=()):
+        self.patterns = list() # Distinct day schedules, each a tuple of SchedulePeriods sorted by start
+        self.patternStarts = list() # The start of each period in each pattern, for binary searching
+        self.days = list() # Midnight of each day with a schedule, in seconds since the epoch, sorted
+        self.dayPatterns = list() # Index into patterns for each entry in days
+        patternIDs = dict()
+
+        for day, schedule in sorted(schedules, key=lambda entry: _parseTimestamp(entry[0])):
+            periods = [SchedulePeriod.fromDict(period) for period in _itemValues(schedule) if isinstance(period, dict)]
+            pattern = tuple(sorted((period for period in periods if period.start is not None), key=lambda period: (period.start, period.end)))
+            if len(pattern) == 0:
+                continue
+            key = tuple((period.start, period.end, period.title, period.room, period.classNID) for period in pattern)
+            if key not in patternIDs:
+                patternIDs[key] = len(self.patterns)
+                self.patterns.append(pattern)
+                self.patternStarts.append([period.start for period in pattern])
+            dayStart = _parseTimestamp(day)
+            self.days.append(dayStart - dayStart % 86400)
+            self.dayPatterns.append(patternIDs[key])
+
+    def __len__(self):
+        return len(self.days)
+
+    def _period(self, dayIndex, periodIndex):
+        period = self.patterns[self.dayPatterns[dayIndex]][periodIndex]
+        day = self.days[dayIndex]
+        return SchedulePeriod(start=day + period.start, end=day + period.end, title=period.title, room=period.room, classNID=period.classNID)
+
+    """
+        Returns the periods scheduled on a particular day (empty if there's no schedule for that day).
+    """
+    def getDay(self, day):
+        day = _parseTimestamp(day)
+        dayIndex = bisect.bisect_left(self.days, day - day % 86400)
+        if dayIndex == len(self.days) or self.days[dayIndex] != day - day % 86400:
+            return list()
+        return [self._period(dayIndex, periodIndex) for periodIndex in range(len(self.patterns[self.dayPatterns[dayIndex]]))]
+
+    """
+        Returns the period (class, room and times) scheduled at a particular time, or None if the student
+        isn't scheduled to be anywhere.
+    """
+    def at(self, moment):
+        moment = _parseTimestamp(moment)
+        dayIndex = bisect.bisect_right(self.days, moment) - 1
+        if dayIndex < 0 or moment - self.days[dayIndex] >= 86400:
+            return None
+        offset = moment - self.days[dayIndex]
+        periodIndex = bisect.bisect_right(self.patternStarts[self.dayPatterns[dayIndex]], offset) - 1
+        if periodIndex < 0 or offset >= self.patterns[self.dayPatterns[dayIndex]][periodIndex].end:
+            return None
+        return self._period(dayIndex, periodIndex)
+
+    """
+        Returns the next period to start after a particular time (which may be on a later day), or None if
+        there are none left in the index.
+    """
+    def nextPeriod(self, moment):
+        moment = _parseTimestamp(moment)
+        dayIndex = max(0, bisect.bisect_right(self.days, moment) - 1)
+        while dayIndex < len(self.days):
+            starts = self.patternStarts[self.dayPatterns[dayIndex]]
+            periodIndex = bisect.bisect_right(starts, moment - self.days[dayIndex])
+            if periodIndex < len(starts):
+                return self._period(dayIndex, periodIndex)
+            dayIndex += 1
+        return None
+
+    """
+        Returns the start time of the next period after a particular time as a datetime, or None.
+    """
+    def nextPeriodStart(self, moment):
+        period = self.nextPeriod(moment)
+        return _formatTimestamp(period.start) if period is not None else None
+
+
+"""
+    A local SQLite mirror of students' Edsby data. Each sync fetches data with the usual getters, and writes
+    only the rows that were added, changed or removed since the last sync, in one transaction per table.
+    Reporting queries can then run against the local, indexed tables instead of the live instance:
+
+        mirror = EdsbyMirror('edsby.sqlite')
+        mirror.sync(edsby)
+        mirror.query('SELECT name, score_percentage FROM assignments WHERE class_nid = ?', (classNID,))
+
+    Several students can be mirrored into the same database; every table records which student a row was
+    synced for. Complex values (multi-part scores, raw feed items and the like) are stored as JSON text.
+    Feeds, messages and the calendar are only fetched a page (or a few months) at a time, so rows for them
+    are only ever added or updated, never deleted, and the mirror keeps their history. Feed items and
+    messages without a NID are keyed by a hash of their contents.
+"""
+class EdsbyMirror(object):
+    # table name -> (columns, primary key columns, indexed columns)
+    tables = {
+        'classes': (('student_nid', 'class_nid', 'rid', 'name', 'course_code', 'teacher_name', 'teacher_nid', 'current'), ('student_nid', 'class_nid'), ('course_code', )),
+        'averages': (('student_nid', 'class_nid', 'average'), ('student_nid', 'class_nid'), ()),
+        'assignments': (('student_nid', 'class_nid', 'assignment_nid', 'rid', 'name', 'score', 'weighting', 'columns', 'score_percentage', 'scheme', 'date', 'graded', 'published', 'data'), ('student_nid', 'assignment_nid'), ('class_nid', 'date')),
+        'rosters': (('student_nid', 'class_nid', 'member_nid', 'first_name', 'middle_name', 'last_name'), ('student_nid', 'class_nid', 'member_nid'), ('member_nid', )),
+        'groups': (('student_nid', 'group_nid', 'rid', 'name', 'posts', 'members', 'data'), ('student_nid', 'group_nid'), ()),
+        'feed_items': (('student_nid', 'source_nid', 'item_nid', 'rid', 'author', 'text', 'date', 'data'), ('student_nid', 'source_nid', 'item_nid'), ('date', 'author')),
+        'messages': (('student_nid', 'message_nid', 'author', 'text', 'date', 'data'), ('student_nid', 'message_nid'), ('date', )),
+        'calendar': (('student_nid', 'event_key', 'event_nid', 'title', 'start', 'end', 'kind', 'source_nid', 'data'), ('student_nid', 'event_key'), ('start', 'source_nid'))
+    }
+    datasets = ('classes', 'averages', 'assignments', 'rosters', 'groups', 'feeds', 'messages', 'calendar')
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.RLock()
+        self._createTables()
+
+    def _createTables(self):
+        with self.lock, self.connection:
+            for table, (columns, key, indexes) in self.tables.items():
+                self.connection.execute('CREATE TABLE IF NOT EXISTS '+table+' ('+', '.join(columns)+', row_hash TEXT, PRIMARY KEY ('+', '.join(key)+'))')
+                for column in indexes:
+                    self.connection.execute('CREATE INDEX IF NOT EXISTS '+table+'_'+column+' ON '+table+' ('+column+')')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS sync_state (student_nid, dataset, synced_at, PRIMARY KEY (student_nid, dataset))')
+
+    def close(self):
+        self.connection.close()
+
+    """
+        Runs a query against the mirror and returns all the rows it produces.
+    """
+    def query(self, sql, params=()):
+        with self.lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    """
+        Returns when each dataset was last synced for a student, as a dict of dataset -> seconds since the epoch.
+    """
+    def getSyncState(self, studentNID):
+        return dict(self.query('SELECT dataset, synced_at FROM sync_state WHERE student_nid = ?', (str(studentNID), )))
+
+    """
+        Syncs the chosen datasets (see EdsbyMirror.datasets) for the student logged in to an Edsby instance.
+        Per-class data is fetched concurrently, using up to maxWorkers requests at once.
+        Returns a dict of table -> {'inserted': n, 'updated': n, 'deleted': n, 'unchanged': n}.
+    """
+    def sync(self, edsby, datasets=None, maxWorkers=4):
+        datasets = self.datasets if datasets is None else datasets
+        studentNID = str(edsby.studentData['nid'])
+        # One snapshot of the catalog for the whole sync, so every dataset works from the same classes
+        currentClasses, allClasses = edsby.getClassCatalog().getClassLists(includeAll='classes' in datasets)
+        stats = dict()
+
+        def fetchPerClass(fetch, classNIDs):
+            results = dict()
+            for classNID, result, error in _concurrentMap(fetch, classNIDs, maxWorkers):
+                if error is not None:
+                    raise error
+                results[classNID] = result
+            return results
+
+        if 'classes' in datasets:
+            rows = list()
+            for NID in allClasses:
+                classDict = currentClasses[NID] if NID in currentClasses else allClasses[NID]
+                rows.append({'class_nid': str(NID), 'rid': classDict['rid'], 'name': classDict['human_name'], 'course_code': classDict['course_code'],
+                             'teacher_name': classDict['teacher']['name'], 'teacher_nid': classDict['teacher']['nid'], 'current': 1 if NID in currentClasses else 0})
+            stats['classes'] = self._syncRows('classes', studentNID, rows)
+
+        if 'averages' in datasets:
+            averages = fetchPerClass(edsby.getClassAverage, list(currentClasses))
+            stats['averages'] = self._syncRows('averages', studentNID, [{'class_nid': str(NID), 'average': averages[NID]} for NID in averages])
+
+        if 'assignments' in datasets:
+            assignmentLists = fetchPerClass(lambda NID: edsby.getClassAssignmentList(NID, currentClasses[NID]['rid']), list(currentClasses))
+            rows = list()
+            for NID in assignmentLists:
+                for assignment in Assignment.fromAssignmentList(assignmentLists[NID], NID):
+                    rows.append({'class_nid': str(NID), 'assignment_nid': str(assignment.nid), 'rid': assignment.rid, 'name': assignment.name,
+                                 'score': _toColumn(assignment.score), 'weighting': _toColumn(assignment.weighting), 'columns': _toColumn(assignment.columns),
+                                 'score_percentage': _toColumn(assignment.scorePercentage), 'scheme': assignment.scheme, 'date': assignment.date,
+                                 'graded': assignment.graded, 'published': assignment.published, 'data': _toColumn(assignment.raw)})
+            stats['assignments'] = self._syncRows('assignments', studentNID, rows)
+
+        if 'rosters' in datasets:
+            rosters = fetchPerClass(edsby.getClassmates, list(currentClasses))
+            rows = list()
+            for NID in rosters:
+                for classmate in Classmate.fromRoster(rosters[NID], keepRaw=False):
+                    rows.append({'class_nid': str(NID), 'member_nid': str(classmate.nid), 'first_name': classmate.firstName,
+                                 'middle_name': classmate.middleName, 'last_name': classmate.lastName})
+            stats['rosters'] = self._syncRows('rosters', studentNID, rows)
+
+        if 'groups' in datasets:
+            rows = list()
+            for group in _itemValues(edsby.getStudentGroups()):
+                summary = group['summary'] if 'summary' in group else dict()
+                info = summary['info'] if 'info' in summary else dict()
+                rows.append({'group_nid': str(group['nid']), 'rid': group.get('rid'), 'name': summary.get('name'),
+                             'posts': info.get('nposts'), 'members': info.get('nmembers'), 'data': _toColumn(group)})
+            stats['groups'] = self._syncRows('groups', studentNID, rows)
+
+        if 'feeds' in datasets:
+            feeds = fetchPerClass(edsby.getClassFeed, list(currentClasses))
+            rows = list()
+            for NID in feeds:
+                for item in FeedItem.fromFeed(feeds[NID], NID):
+                    rows.append({'source_nid': str(NID), 'item_nid': _itemKey(item.raw), 'rid': item.rid, 'author': _toColumn(item.author),
+                                 'text': _toColumn(item.text), 'date': _toColumn(item.date), 'data': _toColumn(item.raw)})
+            stats['feed_items'] = self._syncRows('feed_items', studentNID, rows, complete=False)
+
+        if 'messages' in datasets:
+            rows = list()
+            for message in FeedItem.fromFeed(edsby.getDirectMessages()):
+                rows.append({'message_nid': _itemKey(message.raw), 'author': _toColumn(message.author), 'text': _toColumn(message.text),
+                             'date': _toColumn(message.date), 'data': _toColumn(message.raw)})
+            stats['messages'] = self._syncRows('messages', studentNID, rows, complete=False)
+
+        if 'calendar' in datasets:
+            rows = list()
+            for event in edsby.getCalendarSnapshot().getTimelineEvents(('due', 'overdue', 'events', 'schedules')):
+                rows.append({'event_key': '%s:%s:%s' % (event.kind, event.nid if event.nid is not None else event.title, event.start), 'event_nid': _toColumn(event.nid),
+                             'title': _toColumn(event.title), 'start': event.start, 'end': event.end, 'kind': event.kind, 'source_nid': event.sourceNID, 'data': _toColumn(event.raw)})
+            stats['calendar'] = self._syncRows('calendar', studentNID, rows, complete=False)
+
+        with self.lock, self.connection:
+            now = time.time()
+            self.connection.executemany('INSERT OR REPLACE INTO sync_state (student_nid, dataset, synced_at) VALUES (?, ?, ?)', [(studentNID, dataset, now) for dataset in datasets])
+        return stats
+
+    """
+        Replaces everything a student has in a table with rows, touching only the rows that differ.
+        Rows that are new or changed are written, rows that are gone are deleted, and the rest are left alone.
+        If rows isn't complete (only a page of a feed, say), rows that aren't in it are kept instead.
+    """
+    def _syncRows(self, table, studentNID, rows, complete=True):
+        columns, key, indexes = self.tables[table]
+        keyColumns = [column for column in key if column != 'student_nid']
+        stats = {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+        with self.lock, self.connection:
+            existing = dict(((tuple(row[:-1]), row[-1]) for row in self.connection.execute('SELECT '+', '.join(keyColumns)+', row_hash FROM '+table+' WHERE student_nid = ?', (studentNID, ))))
+            writes = list()
+            seen = set()
+            for row in rows:
+                row['student_nid'] = studentNID
+                rowKey = tuple(row[column] for column in keyColumns)
+                if rowKey in seen: # Edsby occasionally returns the same item twice
+                    continue
+                seen.add(rowKey)
+                rowHash = _hashPayload([row.get(column) for column in columns])
+                if rowKey not in existing:
+                    stats['inserted'] += 1
+                elif existing[rowKey] != rowHash:
+                    stats['updated'] += 1
+                else:
+                    stats['unchanged'] += 1
+                    continue
+                writes.append(tuple(row.get(column) for column in columns) + (rowHash, ))
+            removed = [rowKey for rowKey in existing if rowKey not in seen] if complete else list()
+            stats['deleted'] = len(removed)
+
+            if len(writes) > 0:
+                self.connection.executemany('INSERT OR REPLACE INTO '+table+' ('+', '.join(columns)+', row_hash) VALUES ('+', '.join('?' * (len(columns) + 1))+')', writes)
+            if len(removed) > 0:
+                self.connection.executemany('DELETE FROM '+table+' WHERE student_nid = ? AND '+' AND '.join(column+' = ?' for column in keyColumns), [(studentNID, ) + rowKey for rowKey in removed])
+        return stats
+
+
+"""
+    Exports grades, averages, rosters and recent activity for one or many students to flat files, one per
+    dataset, in CSV, JSON Lines, or (with pyarrow installed) Parquet or Arrow format:
+        with Exporter('exports', format='parquet') as exporter:
+            exporter.export([edsby1, edsby2], datasets=('assignments', 'rosters'))
+    Rows are written out in batches of batchSize as they're fetched, one class at a time, so memory use
+    stays flat however many students are exported. See columns for what each dataset contains.
+"""
+class Exporter(object):
+    # dataset -> ((column, type), ...), where type is 'string', 'float' or 'int'
+    columns = {
+        'assignments': (('student_nid', 'string'), ('class_nid', 'string'), ('assignment_nid', 'string'), ('rid', 'string'), ('name', 'string'),
+                        ('score', 'string'), ('weighting', 'string'), ('columns', 'string'), ('score_percentage', 'float'),
+                        ('score_percentages', 'string'), ('scheme', 'string'), ('date', 'string'), ('graded', 'int'), ('published', 'string')),
+        'averages': (('student_nid', 'string'), ('class_nid', 'string'), ('name', 'string'), ('course_code', 'string'),
+                     ('teacher_name', 'string'), ('average', 'float')),
+        'rosters': (('student_nid', 'string'), ('class_nid', 'string'), ('member_nid', 'string'), ('first_name', 'string'),
+                    ('middle_name', 'string'), ('last_name', 'string')),
+        'activity': (('student_nid', 'string'), ('item_nid', 'string'), ('rid', 'string'), ('author', 'string'), ('text', 'string'),
+                     ('date', 'string'), ('nodetype', 'string'), ('nodesubtype', 'string'))
+    }
+    extensions = {'csv': '.csv', 'jsonl': '.jsonl', 'parquet': '.parquet', 'arrow': '.arrow'}
+
+    def __init__(self, directory, format='csv', batchSize=1000):
+        if format not in Exporter.extensions:
+            raise ValueError('Unknown export format: '+str(format))
+        if format in ('parquet', 'arrow') and pyarrow is None:
+            raise ImportError('pyarrow is needed to export to '+format)
+        self.directory = directory
+        self.format = format
+        self.batchSize = batchSize
+        self.writers = dict()
+        self.batches = dict()
+        self.rows = dict()
+        self.lock = threading.Lock()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    """
+        Exports the chosen datasets for every student (logged in Edsby instance) in edsbys, maxWorkers
+        students at a time. Returns {'rows': {<dataset>: <rows written>}, 'failed': {<student NID>: <error>}};
+        a student whose export fails partway through may have some of their rows written.
+    """
+    def export(self, edsbys, datasets=('assignments', 'averages', 'rosters', 'activity'), maxWorkers=4):
+        failed = dict()
+        for edsby, result, error in _concurrentMap(lambda edsby: self.exportStudent(edsby, datasets), list(edsbys), maxWorkers):
+            if error is not None:
+                failed[str(edsby.studentData['nid'])] = str(error)
+        self.flush()
+        with self.lock:
+            return {'rows': dict(self.rows), 'failed': failed}
+
+    """
+        Exports the chosen datasets for a single student.
+    """
+    def exportStudent(self, edsby, datasets=('assignments', 'averages', 'rosters', 'activity')):
+        studentNID = str(edsby.studentData['nid'])
+        catalog = edsby.getClassCatalog()
+        currentClasses = catalog.getCurrentClasses()
+
+        if 'assignments' in datasets:
+            for NID in currentClasses:
+                assignments = Assignment.fromAssignmentList(edsby.getClassAssignmentList(NID, currentClasses[NID]['rid']), NID, keepRaw=False)
+                self.write('assignments', [{
+                    'student_nid': studentNID, 'class_nid': NID, 'assignment_nid': assignment.nid, 'rid': assignment.rid, 'name': assignment.name,
+                    'score': assignment.score, 'weighting': assignment.weighting, 'columns': assignment.columns,
+                    'score_percentage': assignment.scorePercentage if not isinstance(assignment.scorePercentage, dict) else None,
+                    'score_percentages': assignment.scorePercentage if isinstance(assignment.scorePercentage, dict) else None,
+                    'scheme': assignment.scheme, 'date': assignment.date, 'graded': assignment.graded, 'published': assignment.published
+                } for assignment in assignments])
+
+        if 'averages' in datasets:
+            for NID in currentClasses:
+                classDict = currentClasses[NID]
+                self.write('averages', [{'student_nid': studentNID, 'class_nid': NID, 'name': classDict['human_name'], 'course_code': classDict['course_code'],
+                                         'teacher_name': classDict['teacher']['name'], 'average': edsby.getClassAverage(NID)}])
+
+        if 'rosters' in datasets:
+            for NID in catalog.getAllClassNIDList():
+                rows = list()
+                for classmateDict in edsby.iterClassmates(NID):
+                    classmate = Classmate.fromDict(classmateDict, keepRaw=False)
+                    rows.append({'student_nid': studentNID, 'class_nid': NID, 'member_nid': classmate.nid, 'first_name': classmate.firstName,
+                                 'middle_name': classmate.middleName, 'last_name': classmate.lastName})
+                    if len(rows) >= self.batchSize:
+                        self.write('rosters', rows)
+                        rows = list()
+                self.write('rosters', rows)
+
+        if 'activity' in datasets:
+            self.write('activity', [{'student_nid': studentNID, 'item_nid': item.nid, 'rid': item.rid, 'author': item.author, 'text': item.text,
+                                     'date': item.date, 'nodetype': item.nodetype, 'nodesubtype': item.nodesubtype}
+                                    for item in FeedItem.fromFeed(edsby.getBaseActivity(), keepRaw=False)])
+
+    """
+        Queues rows (dicts keyed by column name) to be written to a dataset, writing out a batch once
+        there are batchSize rows queued.
+    """
+    def write(self, dataset, rows):
+        columns = Exporter.columns[dataset]
+        rows = [tuple(_exportValue(row.get(column), kind) for column, kind in columns) for row in rows]
+        with self.lock:
+            batch = self.batches.setdefault(dataset, list())
+            batch.extend(rows)
+            if len(batch) >= self.batchSize:
+                self._writeBatch(dataset)
+
+    """
+        Writes out everything that's queued.
+    """
+    def flush(self):
+        with self.lock:
+            for dataset in list(self.batches):
+                self._writeBatch(dataset)
+
+    def _writeBatch(self, dataset):
+        batch = self.batches.pop(dataset, None)
+        if not batch:
+            return
+        if dataset not in self.writers:
+            self.writers[dataset] = _openExportWriter(os.path.join(self.directory, dataset+Exporter.extensions[self.format]), self.format, Exporter.columns[dataset])
+        self.writers[dataset].write(batch)
+        self.rows[dataset] = self.rows.get(dataset, 0) + len(batch)
+
+    """
+        Writes out anything still queued and closes the files. Nothing more can be exported afterwards.
+    """
+    def close(self):
+        self.flush()
+        with self.lock:
+            for writer in self.writers.values():
+                writer.close()
+            self.writers = dict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _CSVExportWriter(object):
+    def __init__(self, path, columns):
+        self.file = io.open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([column for column, kind in columns])
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _JSONLinesExportWriter(object):
+    def __init__(self, path, columns):
+        self.file = io.open(path, 'w', encoding='utf-8')
+        self.names = [column for column, kind in columns]
+
+    def write(self, rows):
+        self.file.write(''.join(json.dumps(dict(zip(self.names, row)), separators=(',', ':'))+'\n' for row in rows))
+
+    def close(self):
+        self.file.close()
+
+
+class _ArrowExportWriter(object):
+    def __init__(self, path, columns, parquet=False):
+        types = {'string': pyarrow.string(), 'float': pyarrow.float64(), 'int': pyarrow.int64()}
+        self.schema = pyarrow.schema([(column, types[kind]) for column, kind in columns])
+        if parquet:
+            self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+        else:
+            self.writer = pyarrow.ipc.new_file(path, self.schema)
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        self.writer.write_table(pyarrow.Table.from_arrays([pyarrow.array(column, type=field.type) for column, field in zip(columns, self.schema)], schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+"""
+    Builds assignment lists (see Edsby.getClassAssignmentList) for many classes, and many students, at once.
+    Fetching is done by fetchWorkers threads, and the CPU-bound merging by parseWorkers processes (one per core
+    by default), so the two overlap and merging isn't held back by the GIL. Processes are only used on machines
+    with more than one core unless processes is set; with processes=False merging is done in threads instead,
+    which avoids copying each payload to another process but only uses one core.
+
+    At most queueSize classes are in flight between fetching and being handed back to you, so fetching waits
+    when processing (or whatever you do with the results) falls behind, instead of piling up responses.
+    When processes are used, run this from a script guarded by if __name__ == '__main__'.
+        with AssignmentPipeline(fetchWorkers=8) as pipeline:
+            for edsby, classNID, assignmentList, error in pipeline.iterStudents(edsbys):
+                ...
+"""
+class AssignmentPipeline(object):
+    def __init__(self, fetchWorkers=8, parseWorkers=None, queueSize=16, processes=None):
+        cores = os.cpu_count() or 1
+        self.fetchWorkers = fetchWorkers
+        self.parseWorkers = parseWorkers if parseWorkers is not None else cores
+        self.queueSize = queueSize
+        self.processes = processes if processes is not None else cores > 1
+        self.fetchPool = None
+        self.parsePool = None
+
+    def _pools(self):
+        if self.fetchPool is None:
+            self.fetchPool = ThreadPoolExecutor(max_workers=self.fetchWorkers)
+            self.parsePool = ProcessPoolExecutor(max_workers=self.parseWorkers) if self.processes else ThreadPoolExecutor(max_workers=self.parseWorkers)
+        return self.fetchPool, self.parsePool
+
+    """
+        Builds the assignment lists for jobs, a list of (edsby, class NID, class RID) tuples, and yields
+        (job, assignment list, error) tuples as they finish, which isn't necessarily in order. error is
+        None unless fetching or processing that class failed.
+    """
+    def run(self, jobs):
+        jobs = list(jobs)
+        fetchPool, parsePool = self._pools()
+        results = queue.Queue()
+        slots = threading.Semaphore(self.queueSize)
+        stopped = threading.Event()
+
+        def fetch(job):
+            slots.acquire()
+            if stopped.is_set():
+                return
+            edsby, classNID, classRID = job
+            try:
+                scores = edsby.getClassAssignmentScores(classNID, classRID)
+                metadata = edsby.getClassAssignmentMetadata(classNID)
+                future = parsePool.submit(_mergeAssignmentData, scores, metadata)
+            except Exception as error:
+                results.put((job, None, error))
+                return
+            future.add_done_callback(lambda future: results.put((job, None, future.exception()) if future.exception() is not None else (job, future.result(), None)))
+
+        for job in jobs:
+            fetchPool.submit(fetch, job)
+        finished = 0
+        try:
+            while finished < len(jobs):
+                result = results.get()
+                finished += 1
+                yield result
+                slots.release() # Only once the result's been dealt with, so slow consumers hold fetching back too
+        finally:
+            if finished < len(jobs): # Stopped early, so let any fetches still waiting for a slot give up
+                stopped.set()
+                for i in range(len(jobs)):
+                    slots.release()
+
+    """
+        Builds the assignment lists for every current class of every student (logged in Edsby instance) in
+        edsbys, yielding (edsby, class NID, assignment list, error) tuples as they finish.
+    """
+    def iterStudents(self, edsbys):
+        jobs = list()
+        for edsby, classes, error in _concurrentMap(lambda edsby: edsby.getClassCatalog().getCurrentClasses(), list(edsbys), self.fetchWorkers):
+            if error is not None:
+                raise error
+            jobs.extend((edsby, NID, classes[NID]['rid']) for NID in classes)
+        for job, assignmentList, error in self.run(jobs):
+            yield job[0], job[1], assignmentList, error
+
+    def close(self):
+        if self.fetchPool is not None:
+            self.fetchPool.shutdown()
+            self.parsePool.shutdown()
+            self.fetchPool = self.parsePool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+"""
+    A student's attendance records (see Edsby.getRawClassAttendanceRecords), parsed into three compact columns:
+    the day (days since the epoch), the class and the attendance code, kept sorted by day. Aggregate queries
+    work straight off these columns, and a date range costs a binary search, so they're cheap to run often:
+        store = edsby.getAttendanceStore()
+        store.getCounts(kind='absent', start='2017-09-01')
+        store.getWeeklyCounts(kind='late')
+
+    Each attendance code is classified as 'absent', 'late', 'present' or 'other' by its wording (see
+    _attendanceKind). Pass kinds, a dict of code -> kind, to classify codes your school uses differently.
+    Dates passed to queries can be anything _parseTimestamp understands. Stores can be saved and loaded, so
+    alerts can compare against the previous run without fetching everything again.
+"""
+class AttendanceStore(object):
+    def __init__(self, kinds=None):
+        self.days = array('l')
+        self.classIndexes = array('H')
+        self.codeIndexes = array('H')
+        self.classNIDs = list() # class index -> class NID
+        self.classIDs = dict() # class NID -> class index
+        self.codes = list() # code index -> attendance code
+        self.codeIDs = dict() # attendance code -> code index
+        self.kinds = list() # Kind of each code, by code index
+        self.kindOverrides = kinds if kinds is not None else dict()
+        self.unparsed = 0 # Records without a date we could read
+        self.sorted = True
+        self.lock = threading.RLock()
+
+    @classmethod
+    def fromEdsby(cls, edsby, classNIDs=None, maxWorkers=8, kinds=None):
+        store = cls(kinds)
+        classNIDs = edsby.getCurrentClassNIDList() if classNIDs is None else classNIDs
+        for classNID, records, error in _concurrentMap(edsby.getRawClassAttendanceRecords, list(classNIDs), maxWorkers):
+            if error is not None:
+                raise error
+            store.addRecords(classNID, records)
+        return store
+
+    """
+        Parses and adds the raw attendance records for one class.
+    """
+    def addRecords(self, classNID, records):
+        with self.lock:
+            classIndex = self._index(self.classNIDs, self.classIDs, str(classNID))
+            for record in _itemValues(records):
+                if not isinstance(record, dict):
+                    continue
+                timestamp = _parseTimestamp(_findValue(record, ('date', 'sdate', 'incidentdate', 'day', 'cdate')))
+                if timestamp is None:
+                    self.unparsed += 1
+                    continue
+                code = _findValue(record, ('code', 'attendancecode', 'incidenttype', 'type', 'status', 'reason', 'name'))
+                codeIndex = self._index(self.codes, self.codeIDs, str(code) if code is not None else '')
+                if codeIndex == len(self.kinds):
+                    self.kinds.append(self.kindOverrides.get(self.codes[codeIndex], _attendanceKind(self.codes[codeIndex])))
+                self.days.append(int(timestamp // 86400))
+                self.classIndexes.append(classIndex)
+                self.codeIndexes.append(codeIndex)
+            self.sorted = False
+
+    def _index(self, values, indexes, value):
+        if value not in indexes:
+            indexes[value] = len(values)
+            values.append(value)
+        return indexes[value]
+
+    def _sort(self):
+        if not self.sorted:
+            order = sorted(range(len(self.days)), key=self.days.__getitem__)
+            self.days = array('l', (self.days[i] for i in order))
+            self.classIndexes = array('H', (self.classIndexes[i] for i in order))
+            self.codeIndexes = array('H', (self.codeIndexes[i] for i in order))
+            self.sorted = True
+
+    """
+        Yields (day, class index, code index) for the records in [start, end] (inclusive days) that match.
+    """
+    def _select(self, classNID=None, kind=None, start=None, end=None):
+        with self.lock:
+            self._sort()
+            low = 0 if start is None else bisect.bisect_left(self.days, _attendanceDay(start))
+            high = len(self.days) if end is None else bisect.bisect_right(self.days, _attendanceDay(end))
+            classIndex = self.classIDs.get(str(classNID)) if classNID is not None else None
+            if classNID is not None and classIndex is None:
+                return
+            codeMatches = [kind is None or codeKind == kind for codeKind in self.kinds]
+            days, classIndexes, codeIndexes = self.days, self.classIndexes, self.codeIndexes
+            for i in range(low, high):
+                if codeMatches[codeIndexes[i]] and (classIndex is None or classIndexes[i] == classIndex):
+                    yield days[i], classIndexes[i], codeIndexes[i]
+
+    """
+        Returns the matching records as (date, class NID, code, kind) tuples, oldest first.
+    """
+    def getRecords(self, classNID=None, kind=None, start=None, end=None):
+        return [(_attendanceDate(day), self.classNIDs[classIndex], self.codes[codeIndex], self.kinds[codeIndex])
+                for day, classIndex, codeIndex in self._select(classNID, kind, start, end)]
+
+    """
+        Returns {code: number of records} for the matching records, e.g. to count absences by reason.
+    """
+    def getCounts(self, classNID=None, kind=None, start=None, end=None):
+        counts = [0] * len(self.codes)
+        for day, classIndex, codeIndex in self._select(classNID, kind, start, end):
+            counts[codeIndex] += 1
+        return dict((self.codes[i], count) for i, count in enumerate(counts) if count > 0)
+
+    """
+        Returns the number of matching records.
+    """
+    def getCount(self, classNID=None, kind=None, start=None, end=None):
+        return sum(1 for record in self._select(classNID, kind, start, end))
+
+    """
+        Returns {class NID: number of records} for the matching records.
+    """
+    def getClassCounts(self, kind=None, start=None, end=None):
+        counts = [0] * len(self.classNIDs)
+        for day, classIndex, codeIndex in self._select(None, kind, start, end):
+            counts[classIndex] += 1
+        return dict((self.classNIDs[i], count) for i, count in enumerate(counts) if count > 0)
+
+    """
+        Returns {week: number of records}, where week is the date ('YYYY-MM-DD') of the Monday starting it.
+        Weeks without any matching records are left out.
+    """
+    def getWeeklyCounts(self, classNID=None, kind=None, start=None, end=None):
+        counts = dict()
+        for day, classIndex, codeIndex in self._select(classNID, kind, start, end):
+            week = day - (day + 3) % 7 # The epoch was a Thursday
+            counts[week] = counts.get(week, 0) + 1
+        return dict((_attendanceDate(week), counts[week]) for week in sorted(counts))
+
+    """
+        Returns {class NID: rate} for records of kind in each class. If sessions ({class NID: number of classes
+        held}) is given, the rate is the fraction of sessions with such a record; otherwise it's the number of
+        such records per week, over the weeks between start and end (or the first and last records).
+    """
+    def getClassRates(self, kind='absent', sessions=None, start=None, end=None):
+        counts = self.getClassCounts(kind, start, end)
+        if sessions is not None:
+            return dict((str(NID), float(counts.get(str(NID), 0)) / sessions[NID]) for NID in sessions if sessions[NID] > 0)
+        with self.lock:
+            self._sort()
+            if len(self.days) == 0:
+                return dict()
+            first = _attendanceDay(start) if start is not None else self.days[0]
+            last = _attendanceDay(end) if end is not None else self.days[-1]
+        weeks = max(1.0, (last - first + 1) / 7.0)
+        return dict((NID, counts.get(NID, 0) / weeks) for NID in self.classNIDs)
+
+    """
+        Saves the store to a JSON file.
+    """
+    def save(self, path):
+        with self.lock:
+            _writeJSONAtomically(path, {'days': list(self.days), 'classIndexes': list(self.classIndexes), 'codeIndexes': list(self.codeIndexes),
+                                        'classNIDs': self.classNIDs, 'codes': self.codes, 'unparsed': self.unparsed})
+
+    """
+        Loads a store saved with save.
+    """
+    @classmethod
+    def load(cls, path, kinds=None):
+        with codecs.open(path, 'r', 'utf-8') as storeFile:
+            saved = json.load(storeFile)
+        store = cls(kinds)
+        store.days = array('l', saved['days'])
+        store.classIndexes = array('H', saved['classIndexes'])
+        store.codeIndexes = array('H', saved['codeIndexes'])
+        store.classNIDs = saved['classNIDs']
+        store.classIDs = dict((NID, index) for index, NID in enumerate(store.classNIDs))
+        store.codes = saved['codes']
+        store.codeIDs = dict((code, index) for index, code in enumerate(store.codes))
+        store.kinds = [store.kindOverrides.get(code, _attendanceKind(code)) for code in store.codes]
+        store.unparsed = saved['unparsed']
+        store.sorted = False
+        return store
+
+    def __len__(self):
+        return len(self.days)
+
+
+"""
+    A history of students' class averages and assignment grades, for charting how they change over time.
+    Each snapshot only stores the values that changed since the one before it (a new average, a score that
+    was entered, an assignment that disappeared), appended as one line to a JSON Lines log, so a daily
+    snapshot where nothing changed costs nothing:
+        history = GradeHistory('grades.jsonl')
+        history.record(edsby) # Run daily
+        history.getSnapshot(studentNID, at='2017-10-01')
+        times, averages = history.getAverageSeries(studentNID, classNID, start='2017-09-01')
+
+    In memory, every value (a class's average, or one field of an assignment, see assignmentFields) is kept
+    as its own series of change times and values, grouped by student. Looking up any point in time is a binary search per series,
+    and range queries return arrays that can be handed straight to a charting library, so neither depends
+    on how many snapshots have been taken, only on how many changes they held.
+"""
+class GradeHistory(object):
+    assignmentFields = ('name', 'date', 'score', 'scorePercentage', 'weighting', 'columns', 'published')
+
+    def __init__(self, path=None):
+        self.path = path
+        self.series = dict() # student NID -> {series key: (change times, values)}
+        self.current = dict() # student NID -> {series key: latest value}
+        self.snapshots = 0
+        self.changes = 0
+        self.lock = threading.RLock()
+        self.log = None
+        if path is not None:
+            if os.path.exists(path):
+                with codecs.open(path, 'r', 'utf-8') as logFile:
+                    for line in logFile:
+                        if line.strip() != '':
+                            entry = json.loads(line)
+                            self._apply(entry['student'], entry['time'], entry['set'], entry['removed'])
+            self.log = codecs.open(path, 'a', 'utf-8')
+
+    def close(self):
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    """
+        Fetches the averages and assignment lists for all of a student's current classes, maxWorkers requests
+        at a time, and records them as a snapshot taken at timestamp (now by default).
+        Returns the number of values that changed.
+    """
+    def record(self, edsby, timestamp=None, maxWorkers=4):
+        classes = edsby.getClassCatalog().getCurrentClasses()
+        averages, assignmentLists = dict(), dict()
+        for NID, average, error in _concurrentMap(edsby.getClassAverage, list(classes), maxWorkers):
+            if error is not None:
+                raise error
+            averages[NID] = average
+        for NID, assignmentList, error in _concurrentMap(lambda NID: edsby.getClassAssignmentList(NID, classes[NID]['rid']), list(classes), maxWorkers):
+            if error is not None:
+                raise error
+            assignmentLists[NID] = assignmentList
+        return self.recordSnapshot(edsby.studentData['nid'], averages, assignmentLists, timestamp)
+
+    """
+        Records a snapshot of a student's grades, taken at timestamp (now by default), and returns the number of
+        values that changed. averages can be the output of getCurrentClassAverages, or a dict of class NID ->
+        average; assignmentLists is a dict of class NID -> getClassAssignmentList output. Either can be None to
+        leave it out of the snapshot, in which case its values are carried over rather than marked as removed.
+    """
+    def recordSnapshot(self, studentNID, averages=None, assignmentLists=None, timestamp=None):
+        studentNID = str(studentNID)
+        timestamp = time.time() if timestamp is None else _parseTimestamp(timestamp)
+        values = dict()
+        if averages is not None:
+            for NID in averages:
+                average = averages[NID]
+                values['average:'+str(NID)] = average['average'] if isinstance(average, dict) and 'average' in average else average
+        if assignmentLists is not None:
+            for NID in assignmentLists:
+                assignments = assignmentLists[NID]
+                assignments = assignments['assignments'] if isinstance(assignments, dict) and 'assignments' in assignments else assignments
+                for assignmentNID in assignments:
+                    for field in self.assignmentFields:
+                        if field in assignments[assignmentNID]:
+                            values['assignment:%s:%s:%s' % (NID, assignmentNID, field)] = assignments[assignmentNID][field]
+
+        with self.lock:
+            current = self.current.get(studentNID, dict())
+            changed = dict((key, values[key]) for key in values if key not in current or current[key] != values[key])
+            kinds = [kind for kind, data in (('average:', averages), ('assignment:', assignmentLists)) if data is not None]
+            removed = [key for key in current if key not in values and any(key.startswith(kind) for kind in kinds)]
+            if len(changed) == 0 and len(removed) == 0:
+                return 0
+            if self.log is not None:
+                self.log.write(json.dumps({'student': studentNID, 'time': timestamp, 'set': changed, 'removed': removed}, sort_keys=True, separators=(',', ':'))+'\n')
+                self.log.flush()
+            self._apply(studentNID, timestamp, changed, removed)
+            return len(changed) + len(removed)
+
+    def _apply(self, studentNID, timestamp, changed, removed):
+        current = self.current.setdefault(studentNID, dict())
+        series = self.series.setdefault(studentNID, dict())
+        for key, value in [(key, changed[key]) for key in changed] + [(key, _removedGrade) for key in removed]:
+            if key not in series:
+                series[key] = (array('d'), list())
+            times, values = series[key]
+            if len(times) > 0 and times[-1] > timestamp: # Out of order snapshots are rare, so don't make the common case pay for them
+                index = bisect.bisect_right(times, timestamp)
+                times.insert(index, timestamp)
+                values.insert(index, value)
+            else:
+                times.append(timestamp)
+                values.append(value)
+            if values[-1] is _removedGrade:
+                current.pop(key, None)
+            else:
+                current[key] = values[-1]
+        self.snapshots += 1
+        self.changes += len(changed) + len(removed)
+
+    def _series(self, studentNID, key):
+        return self.series.get(str(studentNID), dict()).get(key)
+
+    def _valueAt(self, studentNID, key, timestamp):
+        times, values = self.series[studentNID][key]
+        index = bisect.bisect_right(times, timestamp) - 1
+        return values[index] if index >= 0 else _removedGrade
+
+    """
+        Reconstructs a student's grades as they were at a point in time (now by default), as
+        {'averages': {<class NID>: <average>}, 'assignments': {<class NID>: {<assignment NID>: {<field>: <value>}}}}.
+    """
+    def getSnapshot(self, studentNID, at=None):
+        studentNID = str(studentNID)
+        timestamp = time.time() if at is None else _parseTimestamp(at)
+        snapshot = {'averages': dict(), 'assignments': dict()}
+        with self.lock:
+            for key in self.series.get(studentNID, dict()):
+                value = self._valueAt(studentNID, key, timestamp)
+                if value is _removedGrade:
+                    continue
+                parts = key.split(':')
+                if parts[0] == 'average':
+                    snapshot['averages'][parts[1]] = value
+                else:
+                    snapshot['assignments'].setdefault(parts[1], dict()).setdefault(parts[2], dict())[parts[3]] = value
+        return snapshot
+
+    """
+        Returns a series' changes between start and end as (times, values), where times is an array of seconds
+        since the epoch. If start is given, the value in effect at start is included as the first point, so
+        charts start from the right value. Removed values show up as None.
+        key is 'average:<class NID>' or 'assignment:<class NID>:<assignment NID>:<field>'.
+    """
+    def getSeries(self, studentNID, key, start=None, end=None):
+        with self.lock:
+            if self._series(studentNID, key) is None:
+                return array('d'), list()
+            times, values = self._series(studentNID, key)
+            low = 0 if start is None else bisect.bisect_right(times, _parseTimestamp(start))
+            high = len(times) if end is None else bisect.bisect_right(times, _parseTimestamp(end))
+            rangeTimes, rangeValues = times[low:high], values[low:high]
+            if start is not None and low > 0:
+                rangeTimes.insert(0, _parseTimestamp(start))
+                rangeValues.insert(0, values[low - 1])
+            return rangeTimes, [None if value is _removedGrade else value for value in rangeValues]
+
+    """
+        Returns a class average's changes between start and end as (times, averages), both arrays of floats.
+        Averages that aren't numbers (missing, removed or letter grades) are NaN.
+    """
+    def getAverageSeries(self, studentNID, classNID, start=None, end=None):
+        times, values = self.getSeries(studentNID, 'average:'+str(classNID), start, end)
+        return times, array('d', (_gradeNumber(value) for value in values))
+
+    """
+        Returns the value of a series at each of times (in ascending order), as an array of floats, e.g. to
+        plot every class's average on the same daily axis. Values that aren't numbers are NaN.
+    """
+    def sample(self, studentNID, key, times):
+        samples = array('d')
+        with self.lock:
+            if self._series(studentNID, key) is None:
+                return array('d', [float('nan')] * len(times))
+            changeTimes, values = self._series(studentNID, key)
+            index = 0
+            for moment in times:
+                moment = _parseTimestamp(moment)
+                while index < len(changeTimes) and changeTimes[index] <= moment: # Both are sorted, so walk them together
+                    index += 1
+                samples.append(_gradeNumber(values[index - 1]) if index > 0 else float('nan'))
+        return samples
+
+    """
+        Returns the keys of every series recorded for a student, optionally only those starting with prefix
+        (e.g. 'average:' or 'assignment:<class NID>:').
+    """
+    def getSeriesKeys(self, studentNID, prefix=''):
+        with self.lock:
+            return sorted(key for key in self.series.get(str(studentNID), dict()) if key.startswith(prefix))
+
+    def getStats(self):
+        with self.lock:
+            return {'series': sum(len(series) for series in self.series.values()), 'snapshots': self.snapshots, 'changes': self.changes}
+
+
+"""
+    A full-text index of class feeds, group feeds, recent activity, school news and direct messages
+    (replies included), for finding posts again without crawling every feed:
+        index = SearchIndex('search.json.gz')
+        index.update(edsby) # Fetches everything, and indexes whatever is new or was edited
+        index.search('"field trip" permission', kind='class', author='Smith', start='2017-09-01')
+        index.save()
+
+    Queries match items containing every word, and every "quoted phrase" in order. Results can be filtered
+    by kind ('class', 'group', 'activity', 'news' or 'message'), the class or group NID they were posted in,
+    author (any part of the name, ignoring case) and date, and are ranked by how often the query's rarer
+    words appear, newest first for ties. Items and words are encoded as small integers, and each word maps
+    to the items and positions it appears at. The index is saved gzipped, with those positions delta encoded.
+"""
+class SearchIndex(object):
+    sources = ('class', 'group', 'activity', 'news', 'message')
+
+    def __init__(self, path=None):
+        self.path = path
+        self.documents = list() # item ID -> {'key', 'kind', 'sourceNID', 'author', 'date', 'timestamp', 'text', 'parent'}, or None once replaced
+        self.documentIDs = dict() # item key -> item ID
+        self.postings = dict() # word -> {item ID: array of positions}
+        self.replaced = 0
+        self.lock = threading.RLock()
+        if path is not None and os.path.exists(path):
+            self._load(path)
+
+    """
+        Fetches the chosen sources (see SearchIndex.sources; all of them by default) for the student logged in to
+        an Edsby instance, maxWorkers requests at a time, and indexes every item that's new or was edited.
+        Returns the number of items indexed.
+    """
+    def update(self, edsby, sources=None, maxWorkers=4):
+        sources = self.sources if sources is None else sources
+        jobs = list()
+        if 'class' in sources:
+            jobs.extend(('class', NID, lambda NID=NID: edsby.getClassFeed(NID)) for NID in edsby.getCurrentClassNIDList())
+        if 'group' in sources:
+            jobs.extend(('group', str(group['nid']), lambda NID=group['nid']: edsby.getGroupFeed(NID)) for group in _itemValues(edsby.getStudentGroups()) if 'nid' in group)
+        if 'activity' in sources:
+            jobs.append(('activity', None, edsby.getBaseActivity))
+        if 'news' in sources:
+            jobs.append(('news', None, lambda: _newsItems(edsby.getScrollingNews())))
+        if 'message' in sources:
+            jobs.append(('message', None, edsby.getDirectMessages))
+
+        indexed = 0
+        for (kind, sourceNID, fetch), feed, error in _concurrentMap(lambda job: job[2](), jobs, maxWorkers):
+            if error is not None:
+                raise error
+            indexed += self.addFeed(feed, kind, sourceNID)
+        return indexed
+
+    """
+        Indexes the items (and their replies) in a feed-like response, e.g. from getClassFeed or getDirectMessages.
+        Items that are already indexed unchanged are skipped; edited ones replace their old copy.
+        Returns the number of items indexed.
+    """
+    def addFeed(self, feed, kind, sourceNID=None):
+        indexed = 0
+        pending = [(item, None) for item in _feedItems(feed)]
+        with self.lock:
+            while len(pending) > 0:
+                item, parent = pending.pop()
+                key = '%s:%s:%s' % (kind, sourceNID if sourceNID is not None else '', _itemKey(item))
+                for value in item.values(): # Replies nested inside this item
+                    if isinstance(value, dict) and 'item' in value:
+                        pending.extend((reply, key) for reply in _feedItems(value))
+                feedItem = FeedItem.fromDict(item, sourceNID, keepRaw=False)
+                document = {'key': key, 'kind': kind, 'sourceNID': str(sourceNID) if sourceNID is not None else None, 'author': _searchText(feedItem.author),
+                            'date': _toColumn(feedItem.date), 'timestamp': _parseTimestamp(feedItem.date), 'text': _searchText(feedItem.text), 'parent': parent}
+                if self._addDocument(document):
+                    indexed += 1
+        return indexed
+
+    def _addDocument(self, document):
+        previousID = self.documentIDs.get(document['key'])
+        if previousID is not None:
+            if self.documents[previousID] == document:
+                return False
+            self.documents[previousID] = None # Its postings are skipped from now on, and dropped by compact
+            self.replaced += 1
+        documentID = len(self.documents)
+        self.documents.append(document)
+        self.documentIDs[document['key']] = documentID
+        for position, word in enumerate(_searchWords(document['text'])):
+            positions = self.postings.setdefault(word, dict())
+            if documentID not in positions:
+                positions[documentID] = array('I')
+            positions[documentID].append(position)
+        return True
+
+    """
+        Returns up to limit indexed items matching query, best match first, as dicts with the item's key, kind,
+        sourceNID, author, date, text, parent (the key of the item it replies to) and score.
+    """
+    def search(self, query, kind=None, sourceNID=None, author=None, start=None, end=None, limit=20):
+        phrases = [_searchWords(phrase) for phrase in re.findall(r'"([^"]*)"', query)]
+        phrases = [phrase for phrase in phrases if len(phrase) > 0]
+        words = set(_searchWords(re.sub(r'"[^"]*"', ' ', query)))
+        words.update(word for phrase in phrases for word in phrase)
+        if len(words) == 0:
+            return list()
+        start = _parseTimestamp(start) if start is not None else None
+        end = _parseTimestamp(end) if end is not None else None
+        author = author.lower() if author is not None else None
+
+        with self.lock:
+            if any(word not in self.postings for word in words):
+                return list()
+            words = sorted(words, key=lambda word: len(self.postings[word])) # Intersect starting from the rarest word
+            candidates = set(self.postings[words[0]])
+            for word in words[1:]:
+                candidates.intersection_update(self.postings[word])
+
+            results = list()
+            for documentID in candidates:
+                document = self.documents[documentID]
+                if document is None or (kind is not None and document['kind'] != kind) or (sourceNID is not None and document['sourceNID'] != str(sourceNID)):
+                    continue
+                if author is not None and author not in document['author'].lower():
+                    continue
+                if (start is not None or end is not None) and document['timestamp'] is None:
+                    continue
+                if (start is not None and document['timestamp'] < start) or (end is not None and document['timestamp'] > end):
+                    continue
+                if not all(self._containsPhrase(documentID, phrase) for phrase in phrases):
+                    continue
+                score = sum(len(self.postings[word][documentID]) * math.log(1.0 + float(len(self)) / len(self.postings[word])) for word in words)
+                results.append((score, document['timestamp'] or 0, documentID))
+
+            results.sort(reverse=True)
+            matches = list()
+            for score, timestamp, documentID in results[:limit]:
+                match = dict((field, value) for field, value in self.documents[documentID].items() if field != 'timestamp')
+                match['score'] = round(score, 4)
+                matches.append(match)
+            return matches
+
+    def _containsPhrase(self, documentID, phrase):
+        positions = [set(self.postings[word][documentID]) for word in phrase]
+        return any(all(start + offset in positions[offset] for offset in range(1, len(phrase))) for start in positions[0])
+
+    """
+        Drops replaced items from the index, renumbering the rest. save does this first.
+    """
+    def compact(self):
+        with self.lock:
+            if self.replaced == 0:
+                return
+            newIDs = dict()
+            documents = list()
+            for documentID, document in enumerate(self.documents):
+                if document is not None:
+                    newIDs[documentID] = len(documents)
+                    documents.append(document)
+            for word in list(self.postings):
+                positions = dict((newIDs[documentID], self.postings[word][documentID]) for documentID in self.postings[word] if documentID in newIDs)
+                if len(positions) > 0:
+                    self.postings[word] = positions
+                else:
+                    del self.postings[word]
+            self.documents = documents
+            self.documentIDs = dict((document['key'], documentID) for documentID, document in enumerate(documents))
+            self.replaced = 0
+
+    """
+        Saves the index to path (by default, the one it was loaded from) as gzipped JSON. Each word's postings
+        are stored as a flat list of [item ID gap, number of positions, position gaps...] for every item it's in.
+    """
+    def save(self, path=None):
+        path = self.path if path is None else path
+        with self.lock:
+            self.compact()
+            fields = ('key', 'kind', 'sourceNID', 'author', 'date', 'timestamp', 'text', 'parent')
+            postings = dict()
+            for word in self.postings:
+                encoded, previousID = list(), 0
+                for documentID in sorted(self.postings[word]):
+                    positions = self.postings[word][documentID]
+                    encoded.extend((documentID - previousID, len(positions), positions[0]))
+                    encoded.extend(positions[i] - positions[i - 1] for i in range(1, len(positions)))
+                    previousID = documentID
+                postings[word] = encoded
+            data = {'version': 1, 'fields': fields, 'documents': [[document[field] for field in fields] for document in self.documents], 'postings': postings}
+            temporary = path+'.tmp'
+            with gzip.open(temporary, 'wb') as indexFile:
+                indexFile.write(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+            os.replace(temporary, path)
+
+    def _load(self, path):
+        with gzip.open(path, 'rb') as indexFile:
+            data = _decodeJSON(indexFile.read())
+        self.documents = [dict(zip(data['fields'], values)) for values in data['documents']]
+        self.documentIDs = dict((document['key'], documentID) for documentID, document in enumerate(self.documents))
+        for word, encoded in data['postings'].items():
+            positions, documentID, i = dict(), 0, 0
+            while i < len(encoded):
+                documentID += encoded[i]
+                count, position = encoded[i + 1], encoded[i + 2]
+                documentPositions = array('I', [position])
+                for gap in encoded[i + 3:i + 2 + count]:
+                    position += gap
+                    documentPositions.append(position)
+                positions[documentID] = documentPositions
+                i += 2 + count
+            self.postings[word] = positions
+
+    def getStats(self):
+        with self.lock:
+            return {'items': len(self.documents) - self.replaced, 'words': len(self.postings), 'replaced': self.replaced}
+
+    def __len__(self):
+        return len(self.documents) - self.replaced
+
+
+"""
+    A local, threaded copy of a student's direct message inbox, kept in SQLite. Every message is stored once,
+    keyed by its NID. Edsby can only send the whole inbox, so sync still downloads all of it every time (see
+    iterDirectMessages; large inboxes are decoded a message at a time rather than all at once), but only
+    messages it hasn't seen before are parsed and written. Reads are served from local storage, a page at a time:
+
+        inbox = Inbox(edsby, 'inbox.sqlite')
+        inbox.sync()
+        for thread in inbox.getThreads(limit=20):
+            messages = inbox.getThread(thread['thread_nid'])
+
+    Messages are grouped into threads by their 'thread' property where Edsby provides one, and replies
+    nested inside a message are filed under that message's thread.
+"""
+class Inbox(object):
+    def __init__(self, edsby, path=':memory:'):
+        self.edsby = edsby
+        self.studentNID = str(edsby.studentData['nid'])
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.RLock()
+        with self.lock, self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS inbox_messages (student_nid, message_nid, thread_nid, author, text, date, sort_key, data, PRIMARY KEY (student_nid, message_nid))')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS inbox_messages_thread ON inbox_messages (student_nid, thread_nid, sort_key)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS inbox_messages_sort ON inbox_messages (student_nid, sort_key)')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS inbox_state (student_nid PRIMARY KEY, synced_at)')
+        self.known = set(row[0] for row in self.connection.execute('SELECT message_nid FROM inbox_messages WHERE student_nid = ?', (self.studentNID, )))
+
+    def close(self):
+        self.connection.close()
+
+    """
+        Downloads the inbox and stores any messages that aren't stored yet, in one transaction.
+        Returns the list of new message NIDs.
+    """
+    def sync(self):
+        return self.addMessages(list(self.edsby.iterDirectMessages()))
+
+    """
+        Stores any messages from a getDirectMessages response that aren't stored yet.
+    """
+    def addMessages(self, messages):
+        rows = list()
+        pending = [(item, None) for item in _feedItems(messages)]
+        while len(pending) > 0:
+            item, threadNID = pending.pop()
+            NID = _itemKey(item)
+            if threadNID is None:
+                threadNID = str(item['thread']) if 'thread' in item and not isinstance(item['thread'], dict) else NID
+            for value in item.values(): # Replies nested inside this message
+                if isinstance(value, dict) and 'item' in value:
+                    pending.extend((reply, threadNID) for reply in _feedItems(value))
+            if NID in self.known:
+                continue
+            self.known.add(NID)
+            message = FeedItem.fromDict(item, keepRaw=False)
+            sortKey = _parseTimestamp(message.date)
+            rows.append((self.studentNID, NID, threadNID, _toColumn(message.author), _toColumn(message.text), _toColumn(message.date), sortKey if sortKey is not None else 0, _toColumn(item)))
+
+        with self.lock, self.connection:
+            self.connection.executemany('INSERT OR IGNORE INTO inbox_messages (student_nid, message_nid, thread_nid, author, text, date, sort_key, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            self.connection.execute('INSERT OR REPLACE INTO inbox_state (student_nid, synced_at) VALUES (?, ?)', (self.studentNID, time.time()))
+        return [row[1] for row in rows]
+
+    def _messages(self, sql, params):
+        with self.lock:
+            cursor = self.connection.execute(sql, params)
+            columns = [column[0] for column in cursor.description]
+            messages = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        for message in messages:
+            message['data'] = json.loads(message['data'])
+        return messages
+
+    """
+        Returns a page of threads, most recently active first. Each is a dict with the thread's NID, its
+        number of messages, the time of its latest message (sort_key, in seconds since the epoch) and the text
+        of its first message.
+    """
+    def getThreads(self, limit=20, offset=0):
+        with self.lock:
+            rows = self.connection.execute(
+                'SELECT thread_nid, COUNT(*), MAX(sort_key), (SELECT text FROM inbox_messages AS first WHERE first.student_nid = m.student_nid AND first.thread_nid = m.thread_nid ORDER BY sort_key LIMIT 1) '
+                'FROM inbox_messages AS m WHERE student_nid = ? GROUP BY thread_nid ORDER BY MAX(sort_key) DESC LIMIT ? OFFSET ?',
+                (self.studentNID, limit, offset)).fetchall()
+        return [{'thread_nid': row[0], 'count': row[1], 'sort_key': row[2], 'text': row[3]} for row in rows]
+
+    """
+        Returns a page of the messages in a thread, oldest first.
+    """
+    def getThread(self, threadNID, limit=50, offset=0):
+        return self._messages('SELECT * FROM inbox_messages WHERE student_nid = ? AND thread_nid = ? ORDER BY sort_key, message_nid LIMIT ? OFFSET ?', (self.studentNID, str(threadNID), limit, offset))
+
+    """
+        Returns a page of all messages, newest first.
+    """
+    def getMessages(self, limit=50, offset=0):
+        return self._messages('SELECT * FROM inbox_messages WHERE student_nid = ? ORDER BY sort_key DESC, message_nid LIMIT ? OFFSET ?', (self.studentNID, limit, offset))
+
+    """
+        Returns a single message by NID, or None if it isn't stored.
+    """
+    def getMessage(self, messageNID):
+        messages = self._messages('SELECT * FROM inbox_messages WHERE student_nid = ? AND message_nid = ?', (self.studentNID, str(messageNID)))
+        return messages[0] if len(messages) > 0 else None
+
+    def __len__(self):
+        return len(self.known)
+
+
+"""
+    Something that changed between two polls of a ChangeWatcher. kind is one of:
+        'new_grade': a score appeared for an assignment (itemNID) in a class (classNID)
+        'grade_changed': the score for an assignment changed
+        'average_changed': the average for a class changed (or appeared)
+        'new_notification': a notification (itemNID) appeared
+        'new_message': a direct message (itemNID) appeared
+        'new_activity': an item (itemNID) appeared in the student's recent activity
+        'poll_failed': fetching source (an EventStream source, or a ChangeWatcher target's name) raised error
+    old and new are the values before and after the change, and time is when it was noticed.
+"""
+class ChangeEvent(Record):
+    fields = ('kind', 'studentNID', 'classNID', 'itemNID', 'old', 'new', 'time', 'source', 'error')
+    __slots__ = fields
+
+
+"""
+    One thing a ChangeWatcher polls, with its own polling interval.
+"""
+class WatchTarget(object):
+    def __init__(self, name, studentNID, fetch, diff, interval):
+        self.name = name
+        self.studentNID = studentNID
+        self.fetch = fetch # Returns the current payload
+        self.diff = diff # Takes (old state, payload) and returns (new state, list of ChangeEvents)
+        self.interval = interval
+        self.nextPoll = 0
+        self.lastHash = None
+        self.state = None
+        self.polls = 0
+        self.changes = 0
+        self.errors = 0
+        self.failures = 0 # Consecutive failed polls
+        self.lastError = None
+
+
+"""
+    Polls averages, notifications and assignment scores for any number of students, and turns what changed
+    into ChangeEvents. Each response is hashed, so polls that return exactly what they returned last time
+    are discarded without being compared. Every target (a student's averages, or one class's scores) keeps
+    its own polling interval, which halves whenever the target changes and grows by half whenever it
+    doesn't, staying between minInterval and maxInterval seconds. Things that rarely change end up being
+    polled rarely.
+
+        watcher = ChangeWatcher(callback=lambda event: print(event))
+        watcher.watchStudent(edsby)
+        watcher.run()
+
+    The first poll of each target only records a baseline, and never produces events. A poll that fails
+    produces a 'poll_failed' event instead, with the target's name as its source, and the target is retried
+    after twice as long each time it fails again (up to maxInterval), until a poll succeeds.
+"""
+class ChangeWatcher(object):
+    def __init__(self, minInterval=60, maxInterval=3600, callback=None, maxWorkers=4):
+        self.minInterval = minInterval
+        self.maxInterval = maxInterval
+        self.callback = callback
+        self.maxWorkers = maxWorkers
+        self.targets = dict()
+        self.lock = threading.RLock()
+        self.stopped = threading.Event()
+
+    def _addTarget(self, name, studentNID, fetch, diff):
+        with self.lock:
+            self.targets[name] = WatchTarget(name, studentNID, fetch, diff, self.minInterval)
+        return self.targets[name]
+
+    """
+        Watches a student's current class averages and notifications, plus assignment scores for each of
+        their current classes.
+    """
+    def watchStudent(self, edsby):
+        self.watchAverages(edsby)
+        self.watchNotifications(edsby)
+        classes = edsby.getClassCatalog().getCurrentClasses()
+        for classNID in classes:
+            self.watchAssignmentScores(edsby, classNID, classes[classNID]['rid'])
+
+    """
+        Watches the averages for a student's current classes (see Edsby.getCurrentClassAverages).
+    """
+    def watchAverages(self, edsby):
+        studentNID = edsby.studentData['nid']
+
+        def diff(old, classes):
+            state = dict((str(NID), classes[NID]['average']) for NID in classes)
+            events = list()
+            for NID in state:
+                if old is not None and state[NID] != old.get(NID):
+                    events.append(ChangeEvent(kind='average_changed', studentNID=studentNID, classNID=NID, old=old.get(NID), new=state[NID], time=time.time()))
+            return state, events
+
+        return self._addTarget('averages:'+str(studentNID), studentNID, edsby.getCurrentClassAverages, diff)
+
+    """
+        Watches a student's notifications (see Edsby.getStudentNotifications).
+    """
+    def watchNotifications(self, edsby):
+        studentNID = edsby.studentData['nid']
+
+        def diff(old, notifications):
+            state = set()
+            events = list()
+            for notification in _feedItems(notifications):
+                NID = _itemKey(notification)
+                state.add(NID)
+                if old is not None and NID not in old:
+                    events.append(ChangeEvent(kind='new_notification', studentNID=studentNID, itemNID=NID, new=notification, time=time.time()))
+            return state, events
+
+        return self._addTarget('notifications:'+str(studentNID), studentNID, edsby.getStudentNotifications, diff)
+
+    """
+        Watches the assignment scores for one of a student's classes (see Edsby.getClassAssignmentScores).
+    """
+    def watchAssignmentScores(self, edsby, classNID, classRID):
+        studentNID = edsby.studentData['nid']
+
+        def diff(old, scores):
+            state = dict()
+            events = list()
+            for NID in scores:
+                if not isinstance(scores[NID], dict) or 'cols' not in scores[NID]:
+                    continue
+                score = scores[NID]['cols']['0'] if '0' in scores[NID]['cols'] else scores[NID]['cols']
+                state[str(NID)] = score
+                if old is None:
+                    continue
+                if str(NID) not in old:
+                    events.append(ChangeEvent(kind='new_grade', studentNID=studentNID, classNID=str(classNID), itemNID=str(NID), new=score, time=time.time()))
+                elif old[str(NID)] != score:
+                    events.append(ChangeEvent(kind='grade_changed', studentNID=studentNID, classNID=str(classNID), itemNID=str(NID), old=old[str(NID)], new=score, time=time.time()))
+            return state, events
+
+        return self._addTarget('scores:'+str(studentNID)+':'+str(classNID), studentNID, lambda: edsby.getClassAssignmentScores(classNID, classRID), diff)
+
+    """
+        Stops watching a target, by name (e.g. 'averages:<student NID>').
+    """
+    def unwatch(self, name):
+        with self.lock:
+            self.targets.pop(name, None)
+
+    def _poll(self, target):
+        payload = target.fetch()
+        payloadHash = _hashPayload(payload)
+        target.polls += 1
+        if payloadHash == target.lastHash: # Nothing changed, so there's no need to look any closer
+            target.interval = min(self.maxInterval, target.interval * 1.5)
+            return list()
+        first = target.lastHash is None
+        target.lastHash = payloadHash
+        target.state, events = target.diff(target.state, payload)
+        if len(events) > 0:
+            target.changes += 1
+            target.interval = max(self.minInterval, target.interval / 2.0)
+        elif not first:
+            target.interval = min(self.maxInterval, target.interval * 1.5)
+        return events
+
+    """
+        Polls every target that's due (or every target, if force is set), and returns the ChangeEvents
+        found, after passing each one to the callback if there is one. Targets that fail produce a
+        'poll_failed' event, and back off (see ChangeWatcher).
+    """
+    def poll(self, force=False):
+        now = time.time()
+        with self.lock:
+            due = [target for target in self.targets.values() if force or target.nextPoll <= now]
+        events = list()
+        for target, targetEvents, error in _concurrentMap(self._poll, due, self.maxWorkers):
+            if error is None:
+                target.failures = 0
+                events.extend(targetEvents)
+                interval = target.interval
+            else:
+                target.errors += 1
+                target.failures += 1
+                target.lastError = str(error)
+                events.append(ChangeEvent(kind='poll_failed', studentNID=target.studentNID, source=target.name, error=error, time=time.time()))
+                interval = min(max(target.interval, self.maxInterval), target.interval * 2 ** min(target.failures, 20))
+            # A little jitter keeps targets that were added together from staying in lockstep
+            target.nextPoll = time.time() + interval * random.uniform(0.9, 1.1)
+        for event in events:
+            if self.callback is not None:
+                self.callback(event)
+        return events
+
+    """
+        Returns the number of seconds until the next target is due to be polled.
+    """
+    def getNextPollDelay(self):
+        with self.lock:
+            if len(self.targets) == 0:
+                return self.minInterval
+            return max(0, min(target.nextPoll for target in self.targets.values()) - time.time())
+
+    """
+        Polls targets as they come due until stop is called.
+    """
+    def run(self):
+        self.stopped.clear()
+        while not self.stopped.is_set():
+            self.poll()
+            self.stopped.wait(self.getNextPollDelay())
+
+    def stop(self):
+        self.stopped.set()
+
+    """
+        Returns a dict of target name -> {'interval': seconds, 'polls': n, 'changes': n, 'errors': n,
+        'failures': n, 'lastError': message}, to see how often each target is being polled, and which are
+        failing. polls only counts successful polls, and failures is how many of the latest polls failed in a row.
+    """
+    def getStats(self):
+        with self.lock:
+            return dict((name, {'interval': target.interval, 'polls': target.polls, 'changes': target.changes, 'errors': target.errors,
+                                'failures': target.failures, 'lastError': target.lastError}) for name, target in self.targets.items())
+
+
+"""
+    An asyncio stream of new notifications, direct messages and recent activity for any number of students,
+    all polled from one event loop:
+
+        async for event in EventStream([edsby1, edsby2]).events():
+            forward(event)
+
+    Or, for a single student, async for event in edsby.events(). Each event is a ChangeEvent with kind
+    'new_notification', 'new_message' or 'new_activity', and the item's dict as new.
+
+    Every student/source pair is polled every interval seconds. The blocking requests run in a shared
+    pool of maxWorkers threads, rather than a thread per student. Items are only delivered once, keyed by
+    their NID, and items that already exist when polling starts are skipped unless includeExisting is set.
+    At most maxQueueSize events are buffered: once a consumer falls that far behind, pollers wait for it to
+    catch up before fetching any more.
+
+    A poll that fails (an expired session, say) yields a 'poll_failed' event with the source and error,
+    rather than ending the stream, so check each event's kind. A failing source is retried after twice as
+    long each time it fails again, up to maxRetryInterval seconds, and back at interval once it succeeds.
+"""
+class EventStream(object):
+    sources = {
+        'notifications': ('new_notification', lambda edsby: edsby.getStudentNotifications()),
+        'messages': ('new_message', lambda edsby: edsby.getDirectMessages()),
+        'activity': ('new_activity', lambda edsby: edsby.getBaseActivity())
+    }
+
+    def __init__(self, edsbys, sources=('notifications', 'messages', 'activity'), interval=60, maxQueueSize=100, maxWorkers=4, includeExisting=False,
+                 maxRetryInterval=3600):
+        self.edsbys = list(edsbys)
+        self.sourceNames = sources
+        self.interval = interval
+        self.maxRetryInterval = maxRetryInterval
+        self.maxQueueSize = maxQueueSize
+        self.maxWorkers = maxWorkers
+        self.includeExisting = includeExisting
+        self.seen = dict() # (student NID, source) -> set of item NIDs already delivered
+
+    async def _pollSource(self, edsby, source, queue, executor):
+        loop = asyncio.get_running_loop()
+        kind, fetch = self.sources[source]
+        studentNID = edsby.studentData['nid']
+        seen = self.seen.setdefault((str(studentNID), source), set())
+        first = not self.includeExisting and len(seen) == 0
+        failures = 0
+        while True:
+            try:
+                payload = await loop.run_in_executor(executor, fetch, edsby)
+            except Exception as e: # Report it and back off, rather than ending the stream
+                failures += 1
+                await queue.put(ChangeEvent(kind='poll_failed', studentNID=studentNID, source=source, error=e, time=time.time()))
+                delay = min(max(self.interval, self.maxRetryInterval), self.interval * 2 ** min(failures, 20))
+                await asyncio.sleep(delay * random.uniform(0.9, 1.1))
+                continue
+            failures = 0
+            if payload is not None:
+                for item in _feedItems(payload):
+                    NID = _itemKey(item)
+                    if NID in seen:
+                        continue
+                    seen.add(NID)
+                    if not first:
+                        await queue.put(ChangeEvent(kind=kind, studentNID=studentNID, itemNID=NID, new=item, time=time.time())) # Waits while the queue is full
+                first = False
+            await asyncio.sleep(self.interval * random.uniform(0.9, 1.1))
+
+    """
+        An async generator yielding ChangeEvents as they're found. Polling stops when the generator is closed.
+    """
+    async def events(self):
+        queue = asyncio.Queue(maxsize=self.maxQueueSize)
+        executor = ThreadPoolExecutor(max_workers=self.maxWorkers)
+        tasks = list()
+        try:
+            for edsby in self.edsbys:
+                for source in self.sourceNames:
+                    tasks.append(asyncio.ensure_future(self._pollSource(edsby, source, queue, executor)))
+            while True:
+                yield await queue.get()
+        finally:
+            for task in tasks:
+                task.cancel()
+            executor.shutdown(wait=False)
+
+    def __aiter__(self):
+        return self.events()
+
+
+"""
+    An incremental JSON parser which pulls the items out of one container deep inside a document, without
+    decoding the rest of it. It reads the document from an iterable of byte or string chunks (such as
+    Response.iter_content) only as far as it needs to, skips over everything that isn't on the path with
+    regular expression searches, and decodes each item under the path on its own. Only the item being
+    decoded, plus one chunk, is ever held in memory.
+"""
+class _JSONPathStream(object):
+    structural = re.compile(r'[\[\]{}"]')
+    stringEnd = re.compile(r'["\\]')
+    scalarEnd = re.compile(r'[\s,\]}]')
+    whitespace = ' \t\r\n'
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.mark = None # Start of the value being captured, which must stay in the buffer until it's decoded
+        self.exhausted = False
+
+    """
+        Reads another chunk into the buffer, dropping everything before pos (or mark). Returns False once
+        the document has been read entirely.
+    """
+    def _read(self):
+        while not self.exhausted:
+            try:
+                chunk = next(self.chunks)
+            except StopIteration:
+                self.exhausted = True
+                chunk = self.decoder.decode(b'', True)
+            if isinstance(chunk, bytes):
+                chunk = self.decoder.decode(chunk)
+            if len(chunk) == 0:
+                continue
+            keep = self.pos if self.mark is None else self.mark
+            self.buffer = self.buffer[keep:] + chunk
+            self.pos -= keep
+            if self.mark is not None:
+                self.mark -= keep
+            return True
+        return False
+
+    def _more(self):
+        if not self._read():
+            raise ValueError('Unexpected end of JSON document')
+
+    """
+        Returns the next non-whitespace character, without consuming it.
+    """
+    def _peek(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in self.whitespace:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            self._more()
+
+    """
+        Consumes the next character, which must be one of the closing character or a comma.
+        Returns True if the container was closed.
+    """
+    def _next(self, closing):
+        char = self._peek()
+        self.pos += 1
+        if char == ',':
+            return False
+        if char == closing:
+            return True
+        raise ValueError('Expected , or '+closing+' in JSON document, found '+char)
+
+    def _skipString(self):
+        self.pos += 1 # Opening quote
+        while True:
+            match = self.stringEnd.search(self.buffer, self.pos)
+            if match is None:
+                self.pos = len(self.buffer)
+                self._more()
+            elif match.group() == '\\':
+                if match.end() >= len(self.buffer): # The escaped character hasn't arrived yet
+                    self.pos = match.start()
+                    self._more()
+                else:
+                    self.pos = match.end() + 1
+            else:
+                self.pos = match.end()
+                return
+
+    def _skipValue(self):
+        char = self._peek()
+        if char == '"':
+            self._skipString()
+        elif char in '{[':
+            depth = 0
+            while True:
+                match = self.structural.search(self.buffer, self.pos)
+                if match is None:
+                    self.pos = len(self.buffer)
+                    self._more()
+                    continue
+                if match.group() == '"':
+                    self.pos = match.start()
+                    self._skipString()
+                    continue
+                self.pos = match.end()
+                depth += 1 if match.group() in '{[' else -1
+                if depth == 0:
+                    return
+        else: # Numbers, true, false and null
+            while True:
+                match = self.scalarEnd.search(self.buffer, self.pos)
+                if match is not None:
+                    self.pos = match.start()
+                    return
+                self.pos = len(self.buffer)
+                if not self._read(): # A scalar can end the document
+                    return
+
+    def _readValue(self):
+        self._peek()
+        self.mark = self.pos
+        try:
+            self._skipValue()
+            return _decodeJSON(self.buffer[self.mark:self.pos])
+        finally:
+            self.mark = None
+
+    """
+        Moves into the value at key (or index) step of the current container. Returns False if the
+        current value isn't a container of the right kind, or doesn't have that key.
+    """
+    def _enter(self, step):
+        char = self._peek()
+        if char != ('[' if isinstance(step, int) else '{'):
+            return False
+        self.pos += 1
+        if self._peek() in ']}':
+            return False
+        index = 0
+        while True:
+            if isinstance(step, int):
+                if index == step:
+                    return True
+                index += 1
+            else:
+                key = self._readValue()
+                if self._peek() != ':':
+                    raise ValueError('Expected : in JSON document')
+                self.pos += 1
+                if key == step:
+                    return True
+            self._skipValue()
+            if self._next(']' if isinstance(step, int) else '}'):
+                return False
+
+    """
+        Yields the entries of the list, or the values of the dict, found at path in the document
+        (or (key, value) pairs if withKeys is set). If path leads to anything else, it's yielded by itself,
+        except for the empty strings Edsby returns in place of empty lists.
+    """
+    def items(self, path, withKeys=False):
+        for step in path:
+            if not self._enter(step):
+                return
+        char = self._peek()
+        if char not in '{[':
+            value = self._readValue()
+            if value != '':
+                yield (None, value) if withKeys else value
+            return
+        self.pos += 1
+        if self._peek() in ']}':
+            return
+        index = 0
+        while True:
+            if char == '{':
+                key = self._readValue()
+                if self._peek() != ':':
+                    raise ValueError('Expected : in JSON document')
+                self.pos += 1
+            else:
+                key = index
+                index += 1
+            value = self._readValue()
+            yield (key, value) if withKeys else value
+            if self._next('}' if char == '{' else ']'):
+                return
+
+
+"""
+    Parses raw BaseStudentClasses data (see Edsby.getRawCurrentClassData) into the format returned by
+    Edsby.getCurrentClasses.
+"""
+def _parseCurrentClasses(rawCurrentClasses):
+    currentClasses = dict()
+    for className in rawCurrentClasses:
+        NID = rawCurrentClasses[className]['nid']
+        info = rawCurrentClasses[className]['class']['details']['info']
+
+        currentClasses[NID] = dict()
+        currentClasses[NID]['human_name'] = rawCurrentClasses[className]['class']['details']['course']
+        currentClasses[NID]['rid'] = rawCurrentClasses[className]['rid']
+        currentClasses[NID]['course_code'] = info['code'] if 'code' in info else None
+
+        currentClasses[NID]['teacher'] = dict()
+        currentClasses[NID]['teacher']['name'] = info['param']
+        currentClasses[NID]['teacher']['nid'] = info['teachernid']
+
+    return currentClasses
+
+"""
+    Parses raw ClassPicker data (see Edsby.getRawClassData) into the format returned by Edsby.getAllClasses.
+"""
+def _parseAllClasses(rawClassData):
+    classDict = dict()
+    for className in rawClassData:
+        NID = rawClassData[className]['nid']
+        text = rawClassData[className]['course']['class']['text']
+
+        classDict[NID] = dict()
+        classDict[NID]['human_name'] = text['line1']
+        classDict[NID]['rid'] = rawClassData[className]['rid']
+        classDict[NID]['course_code'] = text['line2']['code']
+
+        classDict[NID]['teacher'] = dict()
+        classDict[NID]['teacher']['name'] = text['line2']['name']
+        # This endpoint does not return NID information for teachers, so we'll set this to None (e.g. null). If you need to
+        # Retrieve this data, try using the lookUpMessageRecipient method, or alternatively call getCurrentClasses.
+        classDict[NID]['teacher']['nid'] = None
+
+    return classDict
+
+"""
+    The processing half of Edsby.getClassAssignmentList: merges assignment scores (getClassAssignmentScores) with
+    assignment metadata (getClassAssignmentMetadata), and computes score percentages. This is a plain module
+    function so that it can be sent to another process (see AssignmentPipeline).
+"""
+def _mergeAssignmentData(scores, metadata):
+    assignmentData = {
+        'assignments': dict(), # Assignments that have all applicable metadata present
+        'no_scores_found': dict(), # Assignments that we haven't found scores for
+        'no_weights_found': list(), # Assignments we haven't found weights for
+        'no_columns_found': list(), # Assignments we haven't found columns for
+        'invalid_weighting': list(), # Assignments that have invalid weighting
+        'invalid_columns': list() # Assignments that have invalid columns
+    }
+    for nid in scores: # Populates assignmentData with NIDs and available assignment scores
+        if 'cols' in scores[nid]:
+            assignmentData['assignments'][nid] = {'score': scores[nid]['cols']['0']} if '0' in scores[nid]['cols'] else {'score': scores[nid]['cols']}
+
+    # Copy all available assignment metadata to assignmentData dict
+    for assg in metadata:
+        assignmentNID = str(metadata[assg]['nid'])
+
+        # Copy other keys from metadata obj to compiled assignment data obj
+        for key in metadata['r'+str(metadata[assg]['rid'])]:
+            if assignmentNID in assignmentData['assignments']: # If we've found metadata for an asssignment that we've also found scores for
+                assignmentData['assignments'][assignmentNID][key] = metadata[assg][key] # Copy metadata to that entry
+            else:
+                assignmentData['no_scores_found'][assignmentNID] = dict() # Otherwise, place this metadata in the no_scores_found dict
+                for meta in metadata[assg]:
+                    assignmentData['no_scores_found'][assignmentNID][meta] = metadata[assg][meta]
+
+    # Copy weighting data, sort assignments without it, calculate percentage scores if possible
+    deepcopy_assignmentData = deepcopy(assignmentData)
+    for assg in deepcopy_assignmentData['assignments']:
+        assignmentNID = str(assg)
+
+        if 'scheme' not in assignmentData['assignments'][assg]:
+            del assignmentData['assignments'][assg]
+            continue
+
+        if 'weighting' in assignmentData['assignments'][assg]: # If weighting data is present in the metadata we retrieved
+            # API sometimes returns a dict, other times returns a JSON string. Figure out which one it is and parse appropriately.
+            if isinstance(assignmentData['assignments'][assg]['weighting'], dict): # If dict access weighting prop as a dict
+                if '0' in assignmentData['assignments'][assg]['weighting'] and not isinstance(assignmentData['assignments'][assg]['score'], dict):
+                    assignmentData['assignments'][assignmentNID]['weighting'] = assignmentData['assignments'][assg]['weighting']['0']
+                elif len(assignmentData['assignments'][assg]['weighting']) is not len(assignmentData['assignments'][assg]['score']):
+                    assignmentData['invalid_weighting'].append(assignmentNID)
+                else:
+                    assignmentData['assignments'][assignmentNID]['weighting'] = assignmentData['assignments'][assg]['weighting']
+            elif isinstance(assignmentData['assignments'][assg]['weighting'], str): # If string access weighting prop as a dict after running through a JSON parser
+                weighting_dict = json.loads(assignmentData['assignments'][assg]['weighting'])
+                if '0' in weighting_dict and not isinstance(assignmentData['assignments'][assg]['score'], dict):
+                    assignmentData['assignments'][assignmentNID]['weighting'] = json.loads(assignmentData['assignments'][assg]['weighting'])['0']
+                elif len(weighting_dict) is not len(assignmentData['assignments'][assg]['score']):
+                    assignmentData['invalid_weighting'].append(assignmentNID)
+                else:
+                    assignmentData['assignments'][assignmentNID]['weighting'] = weighting_dict
+        else:
+            assignmentData['no_weights_found'].append(assignmentNID) # No weighting data available for this entry, file it away
+
+        if 'columns' in assignmentData['assignments'][assg]: # If columns data is present in the metadata we retrieved
+            # API sometimes returns a dict, other times returns a JSON string. Figure out which one it is and parse appropriately.
+            if isinstance(assignmentData['assignments'][assg]['columns'], dict): # If dict access columns prop as a dict
+                if '0' in assignmentData['assignments'][assg]['columns'] and not isinstance(assignmentData['assignments'][assg]['score'], dict):
+                    assignmentData['assignments'][assignmentNID]['columns'] = assignmentData['assignments'][assg]['columns']['0']
+                elif len(assignmentData['assignments'][assg]['columns']) is not len(assignmentData['assignments'][assg]['score']):
+                    assignmentData['invalid_columns'].append(assignmentNID)
+                else:
+                    assignmentData['assignments'][assignmentNID]['columns'] = assignmentData['assignments'][assg]['columns']
+
+            elif not isinstance(assignmentData['assignments'][assg]['columns'], dict) and assignmentData['assignments'][assg]['scheme'] != 'gs_4levelplusminus': # If string access columns prop as a dict after running through a JSON parser
+                columns_dict = json.loads(assignmentData['assignments'][assg]['columns'])
+                if '0' in columns_dict and not isinstance(assignmentData['assignments'][assg]['score'], dict):
+                    assignmentData['assignments'][assignmentNID]['columns'] = json.loads(assignmentData['assignments'][assg]['columns'])['0']
+                elif len(columns_dict) is not len(assignmentData['assignments'][assg]['score']):
+                    assignmentData['invalid_columns'].append(assignmentNID)
+                else:
+                    assignmentData['assignments'][assignmentNID]['columns'] = columns_dict
+        else:
+            assignmentData['no_columns_found'].append(assignmentNID) # No columns data available for this entry, file it away
+
+        # Calculate score percentage for assignment
+        if 'columns' in assignmentData['assignments'][assg]: # If valid weighting data is present
+            if isinstance(assignmentData['assignments'][assg]['score'], (str, dict)) is False and 'columns' in assignmentData['assignments'][assg]: # If the score is NOT a letter grade or a multi-part grade (e.g. is numeric), calculate percentage score.
+                assignmentData['assignments'][assg]['scorePercentage'] = (float(assignmentData['assignments'][assg]['score'])/float(assignmentData['assignments'][assg]['columns'])) * 100
+            elif isinstance(assignmentData['assignments'][assg]['score'], dict):
+                if isinstance(assignmentData['assignments'][assg]['columns'], dict):
+                    assignmentData['assignments'][assg]['scorePercentage'] = {}
+                    for scoreType in assignmentData['assignments'][assg]['score'].keys():
+                        if scoreType in assignmentData['assignments'][assg]['columns']:
+                            assignmentData['assignments'][assg]['scorePercentage'][scoreType] = (float(assignmentData['assignments'][assg]['score'][scoreType])/float(assignmentData['assignments'][assg]['columns'][scoreType])) * 100
+
+
+    return assignmentData
+
+"""
+    Edsby returns lists of items (classmates, group members, feed items and so on) as dicts keyed by
+    'r<item RID>', and returns an empty string in place of an empty list. This normalizes all of those
+    into a list of the item dicts themselves.
+"""
+def _itemValues(items):
+    if isinstance(items, dict):
+        return list(items.values())
+    if isinstance(items, list):
+        return items
+    return list()
+
+"""
+    Interns strings, so that the many records sharing a value (a teacher name, a grading scheme) share
+    one copy of it. Anything that isn't a string is returned as-is.
+"""
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+"""
+    Returns the first of keys found in a dict, looking one level into nested dicts if none are found at the
+    top level. If that value is itself a dict with a 'text' property (as Edsby's message bodies are), the text
+    is returned instead. Returns None if none of the keys can be found.
+"""
+def _findValue(item, keys):
+    for candidates in (item, ) + tuple(value for value in item.values() if isinstance(value, dict)):
+        for key in keys:
+            if key in candidates and candidates[key] not in (None, ''):
+                value = candidates[key]
+                if isinstance(value, dict):
+                    value = value['text'] if 'text' in value else None
+                if value is not None:
+                    return value
+    return None
+
+_timestampPatterns = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M', '%Y-%m-%d', '%Y%m%d%H%M%S', '%Y%m%d%H%M', '%Y%m%d')
+
+"""
+    Converts the dates and times Edsby uses ('2017-04-21', '20170421', '2017-04-21 13:45:00', epoch seconds or
+    milliseconds), as well as datetime and date objects, into seconds since the epoch. Times are taken to be
+    in the school's time zone and are not converted, so two timestamps can be compared and
+    _formatTimestamp(_parseTimestamp(x)) gives back the same wall clock time. Returns None for anything else.
+"""
+def _parseTimestamp(value):
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, datetime):
+        return calendar.timegm(value.timetuple()) + value.microsecond / 1000000.0
+    if isinstance(value, date):
+        return float(calendar.timegm(value.timetuple()))
+    if isinstance(value, (int, float)):
+        return value / 1000.0 if value > 100000000000 else float(value) # Milliseconds, or seconds
+    value = str(value).strip()
+    for pattern in _timestampPatterns:
+        length = len(datetime(2000, 1, 1).strftime(pattern))
+        # Dashed formats may be followed by fractional seconds or a zone, but compact ones must match exactly
+        if len(value) == length or ('-' in pattern and len(value) > length):
+            try:
+                return float(calendar.timegm(datetime.strptime(value[:length], pattern).timetuple()))
+            except ValueError:
+                continue
+    try:
+        return _parseTimestamp(float(value))
+    except ValueError:
+        return None
+
+"""
+    Converts seconds since the epoch (as returned by _parseTimestamp) back into a naive datetime.
+"""
+def _formatTimestamp(timestamp):
+    return datetime(1970, 1, 1) + timedelta(seconds=timestamp)
+
+"""
+    Converts a time of day ('13:45', '1:45 PM', '13:45:00', or a full date and time) into seconds after
+    midnight. Returns None if the value isn't a time.
+"""
+def _parseTimeOfDay(value):
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)) and 0 <= value < 86400:
+        return float(value)
+    text = str(value).strip().upper()
+    for pattern in ('%H:%M', '%H:%M:%S', '%I:%M %p', '%I:%M%p', '%I:%M:%S %p', '%I %p'):
+        try:
+            parsed = datetime.strptime(text, pattern)
+            return float(parsed.hour * 3600 + parsed.minute * 60 + parsed.second)
+        except ValueError:
+            continue
+    timestamp = _parseTimestamp(value)
+    return timestamp % 86400 if timestamp is not None else None
+
+"""
+    Normalizes the calendar data returned by getClassCalendar, getGroupCalendar or getCalendarData into a list
+    of CalendarEvent records. Calendar data in the same shape as getCalendarData's is read by part (due,
+    events and so on). Otherwise, every dict in the data that has a start date is taken to be an entry.
+"""
+def _extractCalendarEvents(data, kind=None, sourceNID=None):
+    if isinstance(data, dict) and 'caldata' in data:
+        data = data['caldata']
+    if isinstance(data, dict) and any(part in data for part in ('due', 'common', 'schedules')):
+        return CalendarSnapshot(data).getTimelineEvents(sourceNID=sourceNID)
+
+    events = list()
+    pending = [data]
+    while len(pending) > 0:
+        entry = pending.pop()
+        if isinstance(entry, dict) and any(key in entry for key in _eventStartKeys): # Only entries themselves, not their containers
+            event = CalendarEvent.fromDict(entry, kind, sourceNID)
+            if event.start is not None and (event.nid is not None or event.title is not None):
+                events.append(event)
+                continue
+        pending.extend(value for value in _itemValues(entry) if isinstance(value, (dict, list)))
+    return events
+
+"""
+    Returns today's date, formatted year-month-day.
+"""
+def _today():
+    return date.today().strftime("%Y-%m-%d")
+
+"""
+    Returns the first day of every month from the month of start up to and including the month of end.
+"""
+def _monthsBetween(start, end):
+    start = _formatTimestamp(_parseTimestamp(start))
+    end = _formatTimestamp(_parseTimestamp(end))
+    months = list()
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append(date(year, month, 1))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+def _eventSortKey(event):
+    return (event.start if event.start is not None else float('-inf'), event.end if event.end is not None else float('-inf'))
+
+"""
+    Sorts CalendarEvent records by start time, then end time.
+"""
+def _sortEvents(events):
+    return sorted(events, key=_eventSortKey)
+
+"""
+    Returns a stable hash of any JSON-serializable value, which only changes when the value does.
+"""
+def _hashPayload(payload):
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')).hexdigest()
+
+"""
+    Converts a value into something SQLite can store: dicts and lists become JSON text, everything else is
+    left as it is.
+"""
+def _toColumn(value):
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, sort_keys=True, separators=(',', ':'))
+    return value
+
+"""
+    Returns the item dicts from a feed-like response: anything with an 'item' property (feeds, activity,
+    notifications), or a dict/list of items itself (direct messages).
+"""
+def _feedItems(feed):
+    items = feed['item'] if isinstance(feed, dict) and 'item' in feed else feed
+    return [item for item in _itemValues(items) if isinstance(item, dict)]
+
+"""
+    Returns whether a recipient lookup's response (the data slice, see RecipientDirectory) says that it holds
+    every match: a total or count equal to the number of recipients returned, or a false hasMore/more flag.
+    Anything else, including a response that says nothing either way, is treated as possibly cut short.
+"""
+def _recipientsComplete(data, recipients):
+    for key in ('total', 'count', 'totalCount', 'nresults'):
+        if isinstance(data.get(key), int) and not isinstance(data.get(key), bool):
+            return data[key] == len(recipients)
+    for key in ('hasMore', 'more', 'truncated'):
+        if key in data and isinstance(data[key], (bool, int)):
+            return not data[key]
+    return False
+
+"""
+    Returns the lowercased name of a recipient returned by lookUpMessageRecipient, for matching lookups
+    against. Falls back on all of its text if it doesn't have any of the usual name properties.
+"""
+def _recipientName(recipient):
+    parts = [recipient[key] for key in ('name', 'fullname', 'FirstName', 'MName', 'LastName', 'text') if isinstance(recipient.get(key), str)]
+    if len(parts) == 0:
+        parts = [value for value in recipient.values() if isinstance(value, str)]
+    return ' '.join(' '.join(parts).lower().split())
+
+"""
+    Classifies an attendance code by its wording: 'late' (tardies), 'absent', 'present' or 'other'.
+"""
+def _attendanceKind(code):
+    code = code.lower()
+    if 'tard' in code or 'late' in code:
+        return 'late'
+    if 'absen' in code or code in ('a', 'abs', 'ab', 'x'):
+        return 'absent'
+    if 'present' in code or code in ('p', '/'):
+        return 'present'
+    return 'other'
+
+"""
+    Converts a date to the number of days since the epoch, as stored by AttendanceStore.
+"""
+def _attendanceDay(value):
+    timestamp = _parseTimestamp(value)
+    if timestamp is None:
+        raise ValueError('Not a date: '+str(value))
+    return int(timestamp // 86400)
+
+def _attendanceDate(day):
+    return (date(1970, 1, 1) + timedelta(days=day)).strftime('%Y-%m-%d')
+
+# Marks a value that was removed from a GradeHistory series
+_removedGrade = object()
+
+def _gradeNumber(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return float('nan')
+
+"""
+    Returns the text of a feed item property for searching: strings as they are, the string values of a
+    dict (e.g. an author with first and last names) joined by spaces, and an empty string for anything else.
+"""
+def _searchText(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return ' '.join(_searchText(value[key]) for key in sorted(value) if isinstance(value[key], (str, dict))).strip()
+    return ''
+
+"""
+    Splits text into lowercased words for SearchIndex, ignoring any HTML tags in it.
+"""
+def _searchWords(text):
+    return re.findall(r'\w+', re.sub(r'<[^>]*>', ' ', text).lower(), re.UNICODE)
+
+def _newsItems(news):
+    if isinstance(news, dict) and 'slices' in news:
+        return news['slices'][0]['data']['boxLayout']['newsbox']
+    return news
+
+"""
+    Converts a value into something hashable that compares equal whenever the values do: dicts become
+    sorted tuples of their items, and lists become tuples.
+"""
+def _hashable(value):
+    if isinstance(value, dict):
+        return tuple(sorted(((key, _hashable(item)) for key, item in value.items()), key=lambda pair: repr(pair[0])))
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(item) for item in value)
+    return value
+
+"""
+    Returns a string identifying a feed item: its NID, or a hash of its contents if it doesn't have one.
+"""
+def _itemKey(item):
+    return str(item['nid']) if item.get('nid') is not None else _hashPayload(item)
+
+"""
+    Decodes a JSON document (bytes or a string) with orjson if it's installed, or the json module otherwise.
+"""
+def _decodeJSON(content):
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content.decode('utf-8') if isinstance(content, bytes) else content)
+
+"""
+    The already-decoded counterpart of _JSONPathStream.items: yields the entries of the list, or values of
+    the dict, found at path in data.
+"""
+def _walkItems(data, path, withKeys=False):
+    for step in path:
+        if isinstance(step, int) and isinstance(data, list) and step < len(data):
+            data = data[step]
+        elif not isinstance(step, int) and isinstance(data, dict) and step in data:
+            data = data[step]
+        else:
+            return
+    if isinstance(data, dict):
+        entries = data.items()
+    elif isinstance(data, list):
+        entries = enumerate(data)
+    elif data != '':
+        entries = [(None, data)]
+    else:
+        entries = []
+    for key, value in entries:
+        yield (key, value) if withKeys else value
+
+def _openExportWriter(path, format, columns):
+    if format == 'csv':
+        return _CSVExportWriter(path, columns)
+    if format == 'jsonl':
+        return _JSONLinesExportWriter(path, columns)
+    return _ArrowExportWriter(path, columns, parquet=format == 'parquet')
+
+"""
+    Converts a value to an export column's type, or None if it can't be. Nested values become JSON strings.
+"""
+def _exportValue(value, kind):
+    if value is None or value == '':
+        return None
+    try:
+        if kind == 'float':
+            return float(value)
+        if kind == 'int':
+            return int(value)
+    except (TypeError, ValueError):
+        return None
+    value = _toColumn(value)
+    return value if isinstance(value, str) else str(value)
+
+# Bandwidth saving mode asks these endpoints for compressed responses
+_compressiblePattern = re.compile(r'/(core/node|core/multinode|load/embed)\.json')
+_acceptEncoding = 'gzip, deflate, br' if brotli is not None else 'gzip, deflate'
+
+"""
+    Returns how many bytes of a response's body came over the wire, compressed. requests only knows this
+    for responses it actually received, so for anything else (e.g. replayed responses) it falls back on
+    Content-Length, and then on the decoded size.
+"""
+def _wireBytes(response, decodedBytes):
+    raw = getattr(response, 'raw', None)
+    if raw is not None and hasattr(raw, 'tell'):
+        try:
+            return raw.tell()
+        except Exception:
+            pass
+    length = response.headers.get('content-length', '')
+    return int(length) if length.isdigit() else decodedBytes
+
+# Responses with these status codes are worth retrying
+_retryStatuses = (429, 500, 502, 503, 504)
+
+"""
+    Follows a path of keys and indexes into decoded JSON, raising KeyError/IndexError if it isn't there.
+"""
+def _extractPath(data, path):
+    for step in path:
+        data = data[step]
+    return data
+
+_emailPattern = re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+')
+
+"""
+    The part of a URL cassettes are keyed on: everything after the host, with every number in the path (NIDs,
+    RIDs) and the value of every query parameter that's filled in from arguments replaced by a pseudonym.
+    Pseudonyms are derived from the values alone, so recording and replaying the same request give the same
+    key. They hide what was searched for or scraped, but a short NID could still be guessed by hashing
+    every candidate.
+"""
+def _cassetteKey(url):
+    parts = urlsplit(url)
+    path = re.sub(r'\d+', lambda match: _pseudonym(match.group(0)), parts.path) or '/'
+    query = [(key, value if key in _constantParams else _pseudonym(value)) for key, value in parse_qsl(parts.query, keep_blank_values=True)]
+    return path + ('?'+urlencode(query) if len(query) > 0 else '')
+
+def _pseudonym(value):
+    return 'x'+hashlib.sha1(value.encode('utf-8')).hexdigest()[:12]
+
+# Query parameters whose values are fixed by ENDPOINTS, rather than filled in from arguments, so needn't be scrubbed
+_constantParams = frozenset(['xds']) | (frozenset(key for endpoint in ENDPOINTS.values() for key, template in endpoint.params if '{' not in template)
+                                        - frozenset(key for endpoint in ENDPOINTS.values() for key, template in endpoint.params if '{' in template))
+
+"""
+    Builds a requests Response from a recorded exchange.
+"""
+def _replayResponse(url, interaction):
+    if 'json' in interaction:
+        content = json.dumps(interaction['json']).encode('utf-8')
+    elif 'text' in interaction:
+        content = interaction['text'].encode('utf-8')
+    else:
+        content = base64.b64decode(interaction.get('base64', ''))
+    response = requests.models.Response()
+    response.url = url
+    response.status_code = interaction['status']
+    response.headers = requests.structures.CaseInsensitiveDict(interaction['headers'])
+    response.headers['content-length'] = str(len(content))
+    response.cookies = requests.cookies.cookiejar_from_dict(interaction['cookies'])
+    response.encoding = 'utf-8'
+    response._content = content
+    response._content_consumed = True
+    return response
+
+"""
+    Splits a list into consecutive chunks no longer than size.
+"""
+def _chunked(items, size):
+    items = list(items)
+    size = max(1, int(size))
+    return [items[i:i+size] for i in range(0, len(items), size)]
+
+"""
+    Calls func, retrying up to retries more times if it raises. The delay between attempts doubles each
+    time (backoff, 2*backoff, 4*backoff...) with a little random jitter, so that concurrent callers which
+    failed together don't all retry at the same moment. If retryIf is given, only exceptions it returns
+    True for are retried.
+"""
+def _withBackoff(func, retries=3, backoff=1.0, retryIf=None):
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except Exception as e:
+            if attempt >= retries or (retryIf is not None and not retryIf(e)):
+                raise
+            time.sleep(_backoffDelay(attempt, backoff))
+            attempt += 1
+
+"""
+    Returns whether a request failed before any of it reached the server (the connection couldn't be made),
+    so it can be sent again without risk of Edsby acting on it twice.
+"""
+def _requestNotSent(error):
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and len(error.args) > 0:
+        reason = getattr(error.args[0], 'reason', None) # urllib3 wraps connection failures in a MaxRetryError
+        return isinstance(reason, (urllib3.exceptions.NewConnectionError, urllib3.exceptions.ConnectTimeoutError))
+    return False
+
+def _backoffDelay(attempt, backoff):
+    return backoff * (2 ** attempt) + random.uniform(0, backoff)
+
+"""
+    Runs func over every entry in items using up to maxWorkers threads. Returns a list of
+    (item, result, error) tuples in the same order as items, where error is None if the call succeeded,
+    or the exception it raised otherwise.
+"""
+def _concurrentMap(func, items, maxWorkers=4):
+    items = list(items)
+    if len(items) == 0:
+        return list()
+
+    def call(item):
+        try:
+            return (item, func(item), None)
+        except Exception as e:
+            return (item, None, e)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(int(maxWorkers), len(items)))) as executor:
+        return list(executor.map(call, items))
+
+
+class Error(Exception):
+    pass
+
+
+class LoginError(Error):
+    def __init__(self, message):
+        self.message = message
+
+
+class RequestError(Error):
+    def __init__(self, message):
+        Error.__init__(self, message)
+        self.message = message
+
+
+"""
+    python -m edsby sync: syncs data for many accounts into an EdsbyMirror database, in parallel.
+    The accounts file is JSON (a list of objects, or one object per line), each either
+        {"host": "school.edsby.com", "username": "...", "password": "..."}
+    or a session saved with Edsby.saveSession. Accounts that finished are recorded in the checkpoint file,
+    if given, and skipped when it's run again, so a crashed run can be resumed by rerunning the command.
+"""
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m edsby', description='PyEdsby command line tools.')
+    commands = parser.add_subparsers(dest='command')
+    sync = commands.add_parser('sync', help='Sync data for many accounts into a SQLite mirror.')
+    sync.add_argument('accounts', help='JSON file of accounts to sync')
+    sync.add_argument('--database', default='edsby.sqlite', help='SQLite database to sync into (default: edsby.sqlite)')
+    sync.add_argument('--datasets', default='averages,assignments,rosters,feeds,calendar,messages',
+                      help='Comma separated datasets to sync, from: '+', '.join(EdsbyMirror.datasets))
+    sync.add_argument('--concurrency', type=int, default=4, help='Accounts to sync at once (default: 4)')
+    sync.add_argument('--workers', type=int, default=4, help='Concurrent requests within each account (default: 4)')
+    sync.add_argument('--rate', type=float, default=None, help='Maximum requests per second across all accounts')
+    sync.add_argument('--retries', type=int, default=2, help='Times to retry failed requests (default: 2)')
+    sync.add_argument('--checkpoint', default=None, help='File recording finished accounts, to resume from')
+    args = parser.parse_args(argv)
+
+    if args.command != 'sync':
+        parser.print_help()
+        return 2
+    datasets = [dataset.strip() for dataset in args.datasets.split(',') if dataset.strip()]
+    for dataset in datasets:
+        if dataset not in EdsbyMirror.datasets:
+            parser.error('unknown dataset: '+dataset)
+    return _syncAccounts(args, datasets)
+
+def _syncAccounts(args, datasets):
+    with codecs.open(args.accounts, 'r', 'utf-8') as accountsFile:
+        text = accountsFile.read().strip()
+    accounts = json.loads(text) if text.startswith('[') else [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    done = dict()
+    if args.checkpoint is not None and os.path.exists(args.checkpoint):
+        with codecs.open(args.checkpoint, 'r', 'utf-8') as checkpointFile:
+            done = json.load(checkpointFile)
+    pending = [account for account in accounts if _accountLabel(account) not in done]
+    print('%d accounts, %d already synced, %d to sync' % (len(accounts), len(accounts) - len(pending), len(pending)))
+
+    options = {'retries': args.retries, 'retryBackoff': 1.0, 'catalogTTL': None} # Each account is synced once, so its classes only need loading once
+    if args.rate is not None:
+        options['rateLimiter'] = RateLimiter(args.rate, burst=max(1, int(args.rate)))
+    mirror = EdsbyMirror(args.database)
+    lock = threading.Lock()
+    progress = {'finished': 0, 'failed': 0, 'requests': 0, 'timings': list()}
+    started = time.time()
+
+    def syncAccount(account):
+        label = _accountLabel(account)
+        accountStarted = time.time()
+        try:
+            if 'password' in account:
+                edsby = Edsby(host=account['host'], scheme=account.get('scheme', 'https'), username=account['username'], password=account['password'], **options)
+            else:
+                edsby = Edsby.fromSavedSession(account, **options)
+            stats = mirror.sync(edsby, datasets, args.workers)
+            error = None
+        except Exception as e:
+            edsby, stats, error = None, None, e
+        elapsed = time.time() - accountStarted
+
+        with lock:
+            progress['finished'] += 1
+            if error is None:
+                progress['timings'].append(elapsed)
+                progress['requests'] += sum(metrics['calls'] for metrics in edsby.getMetrics().values())
+                done[label] = {'synced_at': time.time(), 'seconds': round(elapsed, 3), 'stats': stats}
+                if args.checkpoint is not None:
+                    _writeJSONAtomically(args.checkpoint, done)
+                changes = ', '.join('%s +%d ~%d -%d' % (name, counts['inserted'], counts['updated'], counts['deleted']) for name, counts in sorted(stats.items()))
+                print('[%d/%d] %s: synced in %.1fs (%s)' % (progress['finished'], len(pending), label, elapsed, changes))
+            else:
+                progress['failed'] += 1
+                print('[%d/%d] %s: FAILED after %.1fs: %s' % (progress['finished'], len(pending), label, elapsed, error))
+            sys.stdout.flush()
+
+    _concurrentMap(syncAccount, pending, args.concurrency)
+    mirror.close()
+
+    elapsed = time.time() - started
+    timings = sorted(progress['timings'])
+    print('Synced %d of %d accounts in %.1fs, %d failed' % (len(timings), len(pending), elapsed, progress['failed']))
+    if len(timings) > 0:
+        print('Per account: %.2fs mean, %.2fs p95, %.2fs max. %d requests, %.1f requests/s' % (
+            sum(timings) / len(timings), timings[min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))], timings[-1],
+            progress['requests'], progress['requests'] / elapsed if elapsed > 0 else 0))
+    return 1 if progress['failed'] > 0 else 0
+
+def _accountLabel(account):
+    if 'username' in account:
+        return account['host']+'/'+account['username']
+    return account['host']+'/'+str(account['student']['nid'])
+
+def _writeJSONAtomically(path, data):
+    temporary = path+'.tmp'
+    with codecs.open(temporary, 'w', 'utf-8') as temporaryFile:
+        json.dump(data, temporaryFile, sort_keys=True)
+    os.replace(temporary, path)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,51 +5,35 @@
 """
 
 import requests, json
-from edsby import Edsby
+from collections import OrderedDict
+from edsby import Edsby, RosterIndex
 
 print('Logging in...')
 edsby = Edsby(host='your_instance.edsby.com', username='your_username', password='password')
 print('Logged in.' if isinstance(edsby, object) else 'Login failed!')
 
 def filterCommonClassmates(classData):
-    # These loops prepare each class for search by creating an array of student NIDs for each class
-    # We can then find common students by searching for their NIDs in this array
-    for classEntry in classData:
-      classData[classEntry]['studentNIDs'] = list()
+    # RosterIndex maps every student NID to the set of classes they're in, so we can look up
+    # each classmate's shared classes directly instead of searching every roster for them.
+    index = RosterIndex(classData)
 
-      for student in classData[classEntry]['classmates']:
-        classData[classEntry]['studentNIDs'].append(classData[classEntry]['classmates'][student]['nid'])
+    # The index keeps NIDs as strings, so we'll map them back to the NIDs (and class order) Edsby gave us.
+    classOrder = list(classData)
 
     # This will be the dict of common classmates returned.
     commonClassmates = dict()
 
-    for classEntry in classData:  # For each class NID
-      for student in classData[classEntry]['classmates']:  # For each student in the roster of the current class
-        if classData[classEntry]['classmates'][student]['nid'] in classData[classEntry]['studentNIDs']: # If the current student NID is in the list of all NIDs for the current class
-            studentNID = classData[classEntry]['classmates'][student]['nid'] # Makes the student ID index much easier to read
-
-            if studentNID not in commonClassmates: # If we haven't made a dict for a classmate we've found in other classes
-              commonClassmates[studentNID] = dict()
-
-            if 'class_nids' not in commonClassmates[studentNID]: # If the class_nids prop does not exist in the classmate's dict
-              commonClassmates[studentNID]['class_nids'] = list()
-
-            if 'human_names' not in commonClassmates[studentNID]: # if the human course names array does not exist in the classmate's dict
-              commonClassmates[studentNID]['human_names'] = list()
-
-            if 'name' not in commonClassmates[studentNID]: # if the classmate's name array does not exist
-              commonClassmates[studentNID]['name'] = list()
-
-            if classEntry not in commonClassmates[studentNID]['class_nids']: # If we haven't appended the common class NIDs to the student's dict entry yet
-              commonClassmates[studentNID]['class_nids'].append(classEntry) # Add to common classmates dict
-
-            if classData[classEntry]['human_name'] not in commonClassmates[studentNID]['human_names']: # If we haven't added the human readable class name yet
-              commonClassmates[studentNID]['human_names'].append(classData[classEntry]['human_name']) # Add to common classmates dict
-
-            if classData[classEntry]['classmates'][student]['FirstName'] not in commonClassmates[studentNID]['name']: # If we haven't added the student's name data yet
-              # Tuple of available name data. Sometimes MName is not present so there's a ternary expression for the middle name
-              studentName = (classData[classEntry]['classmates'][student]['FirstName'], (classData[classEntry]['classmates'][student]['MName'] if 'MName' in classData[classEntry]['classmates'][student] else ''), classData[classEntry]['classmates'][student]['LastName'])
-              commonClassmates[studentNID]['name'].extend(studentName) # Add to common classmates dict
+    for studentNID in index.studentNIDs:
+      student = index.getStudent(studentNID)
+      memberships = set(index.getStudentClasses(studentNID))
+      classNIDs = [classNID for classNID in classOrder if str(classNID) in memberships]
+
+      commonClassmates[student['nid']] = {
+        'class_nids': classNIDs,
+        'human_names': list(OrderedDict.fromkeys(classData[classNID]['human_name'] for classNID in classNIDs)),
+        # Available name data. Sometimes MName is not present so there's a ternary expression for the middle name
+        'name': [student['FirstName'], (student['MName'] if 'MName' in student else ''), student['LastName']]
+      }
 
     print('Done.')
     return commonClassmates
@@ -0,0 +1,35 @@
+"""
+ Shared fixtures for the PyEdsby tests. Everything runs against the local stand-in Edsby server from
+ benchmarks/standInServer.py, so nothing leaves your machine. Run the tests with:
+    python -m pytest tests
+"""
+
+import os, sys
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from edsby import Edsby
+from standInServer import StandInData, StandInServer
+
+"""
+    Small enough to keep the tests quick, but with enough of everything that the data has some variety.
+"""
+@pytest.fixture
+def data():
+    return StandInData(classes=4, rosterSize=10, feedLength=10, assignments=5, attachmentSize=4096, groups=2, messages=8)
+
+@pytest.fixture
+def server(data):
+    with StandInServer(data) as server:
+        yield server
+
+@pytest.fixture
+def login(server):
+    return lambda **kwargs: Edsby(host=server.host, scheme='http', username='student', password='password', **kwargs)
+
+@pytest.fixture
+def edsby(login):
+    return login()
@@ -0,0 +1,34 @@
+import pytest
+
+from edsby import AttendanceStore, RequestError
+
+
+def testStoreFromEdsby(edsby, data):
+    store = edsby.getAttendanceStore()
+    recorded = [str(NID) for NID in data.classNIDs[:-1]] # The last class has no records
+    assert len(store) == 6 * len(recorded)
+    assert store.getCounts() == {'Absent': 6, 'Late': 6, 'Present': 6}
+    assert store.getCounts(kind='absent') == {'Absent': 6}
+    assert store.getClassCounts(kind='late') == dict((NID, 2) for NID in recorded)
+    assert store.getCount(classNID=recorded[0], start='2017-04-06', end='2017-04-12') == 3
+    assert store.getRecords(classNID=recorded[0], kind='absent') == [('2017-04-03', recorded[0], 'Absent', 'absent'),
+                                                                     ('2017-04-12', recorded[0], 'Absent', 'absent')]
+    assert store.getWeeklyCounts(kind='absent') == {'2017-04-03': 3, '2017-04-10': 3}
+    assert store.getWeeklyCounts() == {'2017-04-03': 9, '2017-04-10': 6, '2017-04-17': 3}
+
+def testSessionRates(edsby, data):
+    store = edsby.getAttendanceStore(classNIDs=data.classNIDs[:1])
+    assert store.getClassRates(sessions={data.classNIDs[0]: 8}) == {str(data.classNIDs[0]): 0.25}
+
+def testSaveAndLoad(tmpdir, edsby):
+    store = edsby.getAttendanceStore()
+    path = str(tmpdir.join('attendance.json'))
+    store.save(path)
+    loaded = AttendanceStore.load(path, kinds={'Present': 'other'})
+    assert loaded.getRecords(kind='late') == store.getRecords(kind='late')
+    assert loaded.getCount(kind='present') == 0 # The codes are reclassified when loading
+
+def testMalformedRecords(edsby, data):
+    data.setBody('MyWorkChart', {'slices': [{'data': {'chartContainer': 'unavailable'}}]}, data.classNIDs[0])
+    with pytest.raises(RequestError):
+        edsby.getAttendanceStore()
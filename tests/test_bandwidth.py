@@ -0,0 +1,48 @@
+import pytest
+
+from edsby import Edsby
+from standInServer import StandInServer
+
+
+@pytest.fixture
+def compressingServer(data):
+    with StandInServer(data, compress=True) as server:
+        yield server
+
+def login(server, **kwargs):
+    # These headers turn compression down, as some clients do
+    return Edsby(host=server.host, scheme='http', username='student', password='password', headers={'accept-encoding': 'identity'}, **kwargs)
+
+def testSaveBandwidthAsksForCompression(compressingServer, data):
+    edsby = login(compressingServer, saveBandwidth=True)
+    edsby.resetMetrics()
+    edsby.getClassFeed(data.classNIDs[0])
+    stats = edsby.getTransferStats()
+    feed = stats['endpoints']['getClassFeed']
+    assert feed['decodedBytes'] == len(data.nodeBodies[data.classNIDs[0]]['CourseFeed'])
+    assert 0 < feed['wireBytes'] < feed['decodedBytes']
+    assert stats['savedBytes'] == stats['decodedBytes'] - stats['wireBytes'] > 0
+    assert stats['compressionRatio'] > 1
+
+def testWithoutSaveBandwidthHeadersAreKept(compressingServer, data):
+    edsby = login(compressingServer)
+    edsby.resetMetrics()
+    edsby.getClassFeed(data.classNIDs[0])
+    feed = edsby.getTransferStats()['endpoints']['getClassFeed']
+    assert feed['wireBytes'] == feed['decodedBytes'] == len(data.nodeBodies[data.classNIDs[0]]['CourseFeed'])
+
+def testCompressedResponsesStream(compressingServer, data):
+    edsby = login(compressingServer, saveBandwidth=True, streamThreshold=16)
+    edsby.resetMetrics()
+    items = list(edsby.iterClassFeed(data.classNIDs[0]))
+    assert items == list(data.getBody('CourseFeed', data.classNIDs[0])['slices'][0]['data']['item'].values())
+    feed = edsby.getTransferStats()['endpoints']['getClassFeed']
+    assert feed['decodedBytes'] == len(data.nodeBodies[data.classNIDs[0]]['CourseFeed'])
+    assert feed['wireBytes'] < feed['decodedBytes']
+
+def testDownloadsAreCounted(edsby, data, tmpdir):
+    edsby.resetMetrics()
+    path = edsby.downloadAttachment(data.classNIDs[0], 1, 2, 3, str(tmpdir.join('attachment')))
+    with open(path, 'rb') as attachment:
+        assert attachment.read() == data.attachment
+    assert edsby.getTransferStats()['endpoints']['downloadAttachment']['decodedBytes'] == len(data.attachment)
@@ -0,0 +1,23 @@
+import random
+
+import benchParsing
+
+
+def testEveryCaseRuns():
+    cases = [(name, setup) for name, size, setup in benchParsing.cases() if size == benchParsing.SIZES[0]]
+    assert len(cases) == 5
+    for name, setup in cases:
+        result = benchParsing.runCase(name, 10, setup, repeats=2, minTime=0)
+        assert result['case'] == name and result['size'] == 10
+        assert 0 < result['best_us'] <= result['mean_us']
+        assert result['peak_bytes'] >= 0
+
+def testCasesProcessTheWholePayload():
+    setups = dict((name, setup) for name, size, setup in benchParsing.cases())
+    assignmentList = setups['getClassAssignmentList'](40, random.Random(1))()
+    assert len(assignmentList['assignments']) + len(assignmentList['no_scores_found']) == 40
+    assert len(setups['getCurrentClasses'](40, random.Random(1))()) == 40
+    assert len(setups['getAllClasses'](40, random.Random(1))()) == 40
+    metadata = setups['parseInstanceMetadata'](40, random.Random(1))()
+    assert metadata['nid'] == '1000' and len(metadata) == 40
+    assert len(setups['getCalendarEvents'](40, random.Random(1))()) == 40
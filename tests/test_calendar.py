@@ -0,0 +1,35 @@
+from datetime import date, datetime, timedelta
+
+from edsby import CalendarTimeline
+
+
+def testSnapshotFetchesOnce(edsby, data):
+    edsby.resetMetrics()
+    snapshot = edsby.getCalendarSnapshot()
+    assert len(snapshot.getDueAssignments()) == data.classes * 4
+    assert len(snapshot.getEvents()) == data.classes * 4
+    assert len(snapshot.getSchedules()) == data.classes * 4
+    assert snapshot.getOverdueAssignments() == dict()
+    assert edsby.getMetrics()['getCalendarData']['calls'] == 1
+
+def testRangeMergesMonths(edsby, data):
+    today = date.today()
+    edsby.resetMetrics()
+    timeline = edsby.getCalendarRange(today, today + timedelta(days=62))
+    # Every month gets the same calendar back from the stand-in server, so all but one copy are merged away
+    assert edsby.getMetrics()['getCalendarData']['calls'] >= 3
+    assert len(timeline) == data.classes * 4 * 3
+    assert [event.start for event in timeline] == sorted(event.start for event in timeline)
+
+def testTimelineLookups(edsby):
+    timeline = edsby.getCalendarRange(date.today(), date.today())
+    noon = datetime.combine(date.today(), datetime.min.time()) + timedelta(hours=12, minutes=30)
+    assert [event.title for event in timeline.at(noon)] == ['Event 0']
+    assert sorted(event.kind for event in timeline.onDay(date.today())) == ['due', 'events', 'schedules']
+    assert timeline.next(noon).title == 'Due 0'
+    assert [event.title for event in timeline.between(noon, noon + timedelta(days=1))] == ['Event 0', 'Due 0', 'Day 2', 'Event 1']
+
+def testEmptyTimeline():
+    timeline = CalendarTimeline()
+    assert timeline.between() == []
+    assert timeline.next(0) is None
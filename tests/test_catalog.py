@@ -0,0 +1,35 @@
+def classListFetches(edsby):
+    metrics = edsby.getMetrics()
+    return dict((name, metrics.get(name, {'calls': 0})['calls']) for name in ('getRawCurrentClassData', 'getRawClassData'))
+
+def testCurrentClassesOnlyFetchBaseStudentClasses(edsby, data):
+    edsby.resetMetrics()
+    assert sorted(edsby.getCurrentClassNIDList()) == sorted(data.classNIDs)
+    edsby.getCurrentClasses()
+    edsby.getCurrentClassAverages()
+    edsby.getBaseActivity()
+    assert classListFetches(edsby) == {'getRawCurrentClassData': 1, 'getRawClassData': 0}
+
+def testCatalogIsReused(edsby, data):
+    edsby.resetMetrics()
+    assert sorted(edsby.getAllClasses()) == sorted(data.classNIDs)
+    assert edsby.getPastClasses() == {}
+    edsby.getAllClassNIDList()
+    edsby.getCurrentClassRosters()
+    assert classListFetches(edsby) == {'getRawCurrentClassData': 1, 'getRawClassData': 1}
+
+    edsby.refreshClassCatalog()
+    assert classListFetches(edsby) == {'getRawCurrentClassData': 2, 'getRawClassData': 2}
+
+def testZeroTTLReloadsEveryTime(login):
+    edsby = login(catalogTTL=0)
+    edsby.getCurrentClasses()
+    edsby.getCurrentClasses()
+    assert classListFetches(edsby)['getRawCurrentClassData'] == 2
+
+def testCatalogLookups(edsby, data):
+    catalog = edsby.getClassCatalog()
+    classNID = data.classNIDs[1]
+    assert catalog.getClassByRID(classNID + 1)['rid'] == classNID + 1
+    assert catalog.isCurrent(str(classNID)) and not catalog.isPast(classNID)
+    assert catalog.getClass(1) is None
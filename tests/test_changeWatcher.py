@@ -0,0 +1,88 @@
+import time
+
+from edsby import ChangeWatcher
+
+
+def testFirstPollIsABaseline(edsby):
+    watcher = ChangeWatcher()
+    watcher.watchStudent(edsby)
+    assert watcher.poll(force=True) == []
+    assert watcher.poll(force=True) == []
+
+def testChangesBecomeEvents(edsby, data):
+    received = list()
+    watcher = ChangeWatcher(minInterval=10, maxInterval=100, callback=received.append)
+    watcher.watchStudent(edsby)
+    watcher.poll(force=True)
+
+    classNID = data.classNIDs[1]
+    work = data.getBody('MyWork', classNID)
+    work['slices'][0]['data']['loaddata']['average'] = 12.5
+    data.setBody('MyWork', work, classNID)
+    pane = data.getBody('MyWorkAssessmentPane', classNID)
+    grades = pane['slices'][0]['data']['grades']
+    changedNID = sorted(grades)[0]
+    grades[changedNID]['cols']['0'] = grades[changedNID]['cols']['0'] + 1
+    grades['999999'] = {'cols': {'0': 7}}
+    data.setBody('MyWorkAssessmentPane', pane, classNID)
+    notifications = data.getBody('notifications')
+    notifications['slices'][0]['data']['item']['r12345'] = {'nid': 12345, 'text': 'New notification'}
+    data.setBody('notifications', notifications)
+
+    events = watcher.poll(force=True)
+    assert received == events
+    found = sorted((event.kind, event.classNID, event.itemNID) for event in events)
+    assert found == sorted([
+        ('average_changed', str(classNID), None),
+        ('grade_changed', str(classNID), changedNID),
+        ('new_grade', str(classNID), '999999'),
+        ('new_notification', None, '12345')
+    ])
+    grade = [event for event in events if event.kind == 'grade_changed'][0]
+    assert grade.new == grade.old + 1
+
+def testIntervalsAdapt(edsby, data):
+    watcher = ChangeWatcher(minInterval=10, maxInterval=100)
+    watcher.watchStudent(edsby)
+    for i in range(3):
+        watcher.poll(force=True)
+    stats = watcher.getStats()
+    name = 'averages:'+str(edsby.studentData['nid'])
+    assert stats[name]['polls'] == 3
+    assert stats[name]['interval'] == 10 * 1.5 * 1.5 # Unchanged twice after the baseline
+
+    work = data.getBody('MyWork', data.classNIDs[0])
+    work['slices'][0]['data']['loaddata']['average'] = 12.5
+    data.setBody('MyWork', work, data.classNIDs[0])
+    watcher.poll(force=True)
+    assert watcher.getStats()[name]['interval'] == 10 * 1.5 * 1.5 / 2
+    assert watcher.getStats()[name]['changes'] == 1
+
+def testUnwatch(edsby):
+    watcher = ChangeWatcher()
+    watcher.watchNotifications(edsby)
+    watcher.unwatch('notifications:'+str(edsby.studentData['nid']))
+    assert watcher.getStats() == dict()
+
+def testFailuresAreReportedAndBackedOff(login):
+    edsby = login()
+    received = list()
+    watcher = ChangeWatcher(minInterval=10, maxInterval=100, callback=received.append)
+    target = watcher.watchNotifications(edsby)
+    edsby.setCookies({}) # As if the session had expired
+
+    started = time.time()
+    events = watcher.poll(force=True)
+    assert received == events
+    assert [(event.kind, event.source) for event in events] == [('poll_failed', target.name)]
+    assert isinstance(events[0].error, Exception)
+    assert target.nextPoll - started >= 20 * 0.9
+    watcher.poll(force=True)
+    assert target.nextPoll - started >= 40 * 0.9
+    for i in range(3):
+        watcher.poll(force=True)
+    assert target.nextPoll - time.time() <= 100 * 1.1
+
+    stats = watcher.getStats()[target.name]
+    assert (stats['polls'], stats['errors'], stats['failures'], stats['interval']) == (0, 5, 5, 10)
+    assert stats['lastError'] is not None
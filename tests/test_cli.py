@@ -0,0 +1,50 @@
+import json
+import sqlite3
+
+import pytest
+
+from edsby import main
+
+
+def writeAccounts(tmpdir, accounts):
+    path = str(tmpdir.join('accounts.json'))
+    with open(path, 'w') as accountsFile:
+        json.dump(accounts, accountsFile)
+    return path
+
+def testSyncResumesFromCheckpoint(tmpdir, server, data, capsys):
+    accounts = writeAccounts(tmpdir, [{'host': server.host, 'scheme': 'http', 'username': 'student', 'password': 'password'}])
+    database, checkpoint = str(tmpdir.join('mirror.sqlite')), str(tmpdir.join('checkpoint.json'))
+    argv = ['sync', accounts, '--database', database, '--checkpoint', checkpoint, '--datasets', 'averages,assignments', '--retries', '0']
+
+    assert main(argv) == 0
+    assert '1 accounts, 0 already synced, 1 to sync' in capsys.readouterr().out
+    with open(checkpoint) as checkpointFile:
+        done = json.load(checkpointFile)
+    assert list(done) == [server.host+'/student']
+    assert done[server.host+'/student']['stats']['assignments']['inserted'] == data.classes * data.assignments
+    connection = sqlite3.connect(database)
+    assert connection.execute('SELECT COUNT(*) FROM assignments').fetchone()[0] == data.classes * data.assignments
+    connection.close()
+
+    assert main(argv) == 0
+    assert '1 accounts, 1 already synced, 0 to sync' in capsys.readouterr().out
+
+def testSavedSessionsAndFailures(tmpdir, edsby, server, capsys):
+    saved = edsby.saveSession()
+    expired = dict(saved, cookies={}, student=dict(saved['student'], nid='1'))
+    accounts = str(tmpdir.join('accounts.jsonl'))
+    with open(accounts, 'w') as accountsFile: # One account per line works too
+        accountsFile.write(json.dumps(saved)+'\n'+json.dumps(expired)+'\n')
+    checkpoint = str(tmpdir.join('checkpoint.json'))
+
+    assert main(['sync', accounts, '--database', str(tmpdir.join('mirror.sqlite')), '--checkpoint', checkpoint, '--datasets', 'averages', '--retries', '0']) == 1
+    output = capsys.readouterr().out
+    assert server.host+'/1: FAILED' in output
+    assert 'Synced 1 of 2 accounts' in output
+    with open(checkpoint) as checkpointFile:
+        assert list(json.load(checkpointFile)) == [server.host+'/'+str(saved['student']['nid'])] # So only the failure is retried
+
+def testUnknownDataset(tmpdir):
+    with pytest.raises(SystemExit):
+        main(['sync', writeAccounts(tmpdir, []), '--datasets', 'averages,grades'])
@@ -0,0 +1,61 @@
+import requests
+
+from edsby import ENDPOINTS, Edsby, RequestsTransport
+from standInServer import STUDENT_NID, STUDENT_UNID
+
+
+class FlakyTransport(object):
+    def __init__(self, failures, pattern):
+        self.transport = RequestsTransport()
+        self.failures = failures
+        self.pattern = pattern
+
+    def request(self, method, url, **kwargs):
+        if self.pattern in url and self.failures > 0:
+            self.failures -= 1
+            response = requests.models.Response()
+            response.status_code = 503
+            response._content = b''
+            return response
+        return self.transport.request(method, url, **kwargs)
+
+def testURLsAreFilledIn(edsby, server):
+    base = 'http://'+server.host
+    assert edsby.getEndpointURL('getClassAverage', classNID=5) == base+'/core/node.json/5?xds=MyWork&student='+str(STUDENT_UNID)
+    assert edsby.getEndpointURL('getStudentGroups') == base+'/core/node.json/'+str(STUDENT_NID)+'?xds=MyGroups&combine=true'
+    assert edsby.getEndpointURL('getProfilePic', userNID=7, size='64,64') == base+'/core/nodedl/7?nodepic=true&field=file&xds=fileThumbnail&size=64,64'
+    # Optional parameters are left out when they aren't given
+    assert edsby.getEndpointURL('getSchedule') == base+'/core/node.json/'+str(STUDENT_UNID)+'?xds=CalendarPanelNav_Student'
+    assert edsby.getEndpointURL('getSchedule', targetDate='20170403').endswith('&targetDate=20170403')
+
+def testEndpointDefaults():
+    assert ENDPOINTS['getClassFeed'].idempotent and not ENDPOINTS['postMessageInClassFeed'].idempotent
+    assert ENDPOINTS['getClassmates'].items == ('slices', 0, 'data', 'places', 'item')
+    assert ENDPOINTS['getClassAverage'].items == ENDPOINTS['getClassAverage'].extract
+
+def testCacheableResponsesAreCached(login, data):
+    edsby = login(cacheTTL=60)
+    classNID = data.classNIDs[0]
+    edsby.resetMetrics()
+    first = edsby.getClassmates(classNID)
+    first.clear() # Callers get a copy, so this mustn't reach the cache
+    assert edsby.getClassmates(classNID) == login().getClassmates(classNID)
+    assert edsby.getMetrics()['getClassmates']['calls'] == 1
+    edsby.getClassFeed(classNID)
+    edsby.getClassFeed(classNID)
+    assert edsby.getMetrics()['getClassFeed']['calls'] == 2 # Not cacheable
+    edsby.clearCache()
+    edsby.getClassmates(classNID)
+    assert edsby.getMetrics()['getClassmates']['calls'] == 2
+
+def testIdempotentRequestsAreRetried(server, data):
+    transport = FlakyTransport(2, 'xds=MyWork&')
+    edsby = Edsby(host=server.host, scheme='http', username='student', password='password', transport=transport, retries=2, retryBackoff=0)
+    assert edsby.getClassAverage(data.classNIDs[0]) is not None
+    metrics = edsby.getMetrics()['getClassAverage']
+    assert (metrics['calls'], metrics['errors']) == (3, 2)
+
+def testCallEndpoints(edsby, data):
+    results = edsby.callEndpoints([('getClassAverage', {'classNID': NID}) for NID in data.classNIDs] + [('getClassFeed', {'classNID': 1})])
+    assert [error is None for call, result, error in results] == [True] * data.classes + [False]
+    assert results[0][1]['loaddata']['average'] == edsby.getClassAverage(data.classNIDs[0])
@@ -0,0 +1,79 @@
+import asyncio
+
+from edsby import EventStream
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+async def take(events, count, timeout=10):
+    taken = list()
+    for i in range(count):
+        taken.append(await asyncio.wait_for(events.__anext__(), timeout))
+    return taken
+
+async def pending(events):
+    try:
+        await asyncio.wait_for(events.__anext__(), 0.1)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+def testIncludeExistingDeliversEverythingOnce(edsby, data):
+    async def collect():
+        events = EventStream([edsby], interval=0.05, includeExisting=True).events()
+        try:
+            taken = await take(events, 5 + 8 + data.feedLength)
+            await asyncio.sleep(0.2) # Several more polls, which mustn't deliver anything again
+            return taken, await pending(events)
+        finally:
+            await events.aclose()
+
+    events, more = run(collect())
+    kinds = [event.kind for event in events]
+    assert kinds.count('new_notification') == 5
+    assert kinds.count('new_message') == 8
+    assert kinds.count('new_activity') == data.feedLength
+    assert len(set((event.kind, event.itemNID) for event in events)) == len(events)
+    assert not more
+
+def testOnlyNewItemsAreDelivered(edsby, data):
+    async def collect():
+        events = edsby.events(sources=('notifications', ), interval=0.05)
+        try:
+            first = asyncio.ensure_future(events.__anext__())
+            await asyncio.sleep(0.2) # The existing notifications have been seen by now
+            notifications = data.getBody('notifications')
+            notifications['slices'][0]['data']['item']['r12345'] = {'nid': 12345, 'text': 'New notification'}
+            data.setBody('notifications', notifications)
+            return await asyncio.wait_for(first, 10)
+        finally:
+            await events.aclose()
+
+    event = run(collect())
+    assert (event.kind, event.itemNID, event.studentNID) == ('new_notification', '12345', edsby.studentData['nid'])
+    assert event.new['text'] == 'New notification'
+
+def testFailuresAreReportedAndBackedOff(login, data):
+    edsby = login()
+    edsby.setCookies({}) # As if the session had expired
+
+    async def collect():
+        stream = EventStream([edsby], sources=('notifications', ), interval=0.05, maxRetryInterval=0.2)
+        events = stream.events()
+        try:
+            failures = await take(events, 2)
+            started = asyncio.get_running_loop().time()
+            failures.extend(await take(events, 2))
+            return failures, asyncio.get_running_loop().time() - started
+        finally:
+            await events.aclose()
+
+    failures, elapsed = run(collect())
+    assert all(event.kind == 'poll_failed' and event.source == 'notifications' for event in failures)
+    assert all(isinstance(event.error, Exception) for event in failures)
+    assert elapsed >= 0.2 * 0.9 + 0.2 * 0.9 # From the second failure on, retries wait maxRetryInterval
@@ -0,0 +1,50 @@
+import csv, json
+import pytest
+
+from edsby import Exporter
+
+
+def rosterSize(data):
+    return sum(len(data.getBody('ClassStudentList', NID)['slices'][0]['data']['places']['item']) for NID in data.classNIDs)
+
+def testCSVExport(login, data, tmpdir):
+    students = [login(), login()]
+    with Exporter(str(tmpdir), batchSize=7) as exporter:
+        result = exporter.export(students)
+    assert result['failed'] == dict()
+    assert result['rows'] == {'assignments': 2 * data.classes * data.assignments, 'averages': 2 * data.classes,
+                              'rosters': 2 * rosterSize(data), 'activity': 2 * data.feedLength}
+    for dataset, count in result['rows'].items():
+        with open(str(tmpdir.join(dataset+'.csv'))) as exported:
+            rows = list(csv.reader(exported))
+        assert rows[0] == [column for column, kind in Exporter.columns[dataset]]
+        assert len(rows) == count + 1
+
+def testJSONLinesExport(edsby, data, tmpdir):
+    with Exporter(str(tmpdir), format='jsonl') as exporter:
+        result = exporter.export([edsby], datasets=('averages', ))
+    assert result['rows'] == {'averages': data.classes}
+    with open(str(tmpdir.join('averages.jsonl'))) as exported:
+        rows = [json.loads(line) for line in exported]
+    assert sorted(row['class_nid'] for row in rows) == [str(NID) for NID in data.classNIDs]
+    assert all(isinstance(row['average'], float) and row['student_nid'] == str(edsby.studentData['nid']) for row in rows)
+
+def testFailedStudentsAreReported(login, tmpdir):
+    loggedOut = login()
+    loggedOut.setCookies({})
+    with Exporter(str(tmpdir)) as exporter:
+        result = exporter.export([loggedOut], datasets=('averages', ))
+    assert list(result['failed']) == [str(loggedOut.studentData['nid'])]
+
+def testParquetExport(edsby, data, tmpdir):
+    pyarrow = pytest.importorskip('pyarrow')
+    import pyarrow.parquet
+    with Exporter(str(tmpdir), format='parquet', batchSize=3) as exporter:
+        exporter.export([edsby], datasets=('assignments', ))
+    table = pyarrow.parquet.read_table(str(tmpdir.join('assignments.parquet')))
+    assert table.num_rows == data.classes * data.assignments
+    assert table.schema.field('score_percentage').type == pyarrow.float64()
+
+def testUnknownFormat(tmpdir):
+    with pytest.raises(ValueError):
+        Exporter(str(tmpdir), format='xlsx')
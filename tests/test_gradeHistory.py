@@ -0,0 +1,62 @@
+import math
+
+from edsby import GradeHistory
+
+FIRST, SECOND = 1491300000, 1491400000 # Two days in April 2017
+
+
+def changeGrades(data, classNID):
+    work = data.getBody('MyWork', classNID)
+    loaddata = work['slices'][0]['data']['loaddata']
+    loaddata['average'] = 12.5
+    terms = loaddata['gradebook']['terms']
+    terms[sorted(terms)[0]]['name'] = 'Renamed'
+    data.setBody('MyWork', work, classNID)
+    return str(terms[sorted(terms)[0]]['nid'])
+
+def testSnapshotsAtTime(tmpdir, edsby, data):
+    path = str(tmpdir.join('grades.jsonl'))
+    studentNID, classNID = edsby.studentData['nid'], data.classNIDs[0]
+    with GradeHistory(path) as history:
+        first = edsby.recordGradeHistory(history, FIRST)
+        assert first == data.classes * (1 + data.assignments * len(GradeHistory.assignmentFields))
+        assert edsby.recordGradeHistory(history, FIRST + 3600) == 0 # Nothing changed
+        before = history.getSnapshot(studentNID, at=FIRST)
+
+        assignmentNID = changeGrades(data, classNID)
+        assert edsby.recordGradeHistory(history, SECOND) == 2
+        assert history.getSnapshot(studentNID, at=SECOND - 1) == before
+        after = history.getSnapshot(studentNID)
+        assert after['averages'][str(classNID)] == 12.5
+        assert after['assignments'][str(classNID)][assignmentNID]['name'] == 'Renamed'
+        assert before['assignments'][str(classNID)][assignmentNID]['name'] == 'Assignment 0'
+        assert history.getStats() == {'series': first, 'snapshots': 2, 'changes': first + 2}
+
+    with GradeHistory(path) as reloaded: # Replayed from the log
+        assert reloaded.getSnapshot(studentNID, at=FIRST) == before
+        assert reloaded.getSnapshot(studentNID) == after
+
+def testSeries(edsby, data):
+    history = GradeHistory()
+    studentNID, classNID = edsby.studentData['nid'], data.classNIDs[0]
+    edsby.recordGradeHistory(history, FIRST)
+    average = history.getSnapshot(studentNID)['averages'][str(classNID)]
+    changeGrades(data, classNID)
+    edsby.recordGradeHistory(history, SECOND)
+
+    times, averages = history.getAverageSeries(studentNID, classNID)
+    assert list(times) == [FIRST, SECOND] and list(averages) == [average, 12.5]
+    times, averages = history.getAverageSeries(studentNID, classNID, start=FIRST + 1)
+    assert list(times) == [FIRST + 1, SECOND] and list(averages) == [average, 12.5]
+    samples = history.sample(studentNID, 'average:'+str(classNID), [FIRST - 1, FIRST, SECOND + 1])
+    assert math.isnan(samples[0]) and list(samples[1:]) == [average, 12.5]
+    assert history.getSeriesKeys(studentNID, 'average:') == sorted('average:'+str(NID) for NID in data.classNIDs)
+
+def testLeftOutValuesAreCarriedOver():
+    history = GradeHistory()
+    history.recordSnapshot('1', {'10': 80.0}, {'10': {'5': {'score': 7}}}, FIRST)
+    assert history.recordSnapshot('1', {'10': 85.0}, None, SECOND) == 1
+    assert history.getSnapshot('1') == {'averages': {'10': 85.0}, 'assignments': {'10': {'5': {'score': 7}}}}
+    assert history.recordSnapshot('1', {'10': 85.0}, {}, SECOND + 1) == 1 # An empty list removes the assignment
+    times, scores = history.getSeries('1', 'assignment:10:5:score')
+    assert list(times) == [FIRST, SECOND + 1] and scores == [7, None]
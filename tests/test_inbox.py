@@ -0,0 +1,39 @@
+from edsby import Inbox
+
+
+def testSyncOnlyReturnsNewMessages(edsby, data):
+    inbox = Inbox(edsby)
+    assert len(inbox.sync()) == 8 + 2 # Including the replies nested in two of the messages
+    assert inbox.sync() == []
+
+    messages = data.getBody('Messages')
+    messages['slices'][0]['data']['body']['left']['items']['item']['r99999'] = {'nid': 99998, 'rid': 99999, 'author': 'Someone',
+                                                                                'text': 'A new message', 'cdate': '2017-06-01 09:00:00'}
+    data.setBody('Messages', messages)
+    assert inbox.sync() == ['99998']
+    assert len(inbox) == 11
+    assert inbox.getMessages(limit=1)[0]['text'] == 'A new message'
+
+def testRepliesAreThreaded(edsby):
+    inbox = Inbox(edsby)
+    inbox.sync()
+    threads = inbox.getThreads(limit=100)
+    assert len(threads) == 8
+    assert sorted(thread['count'] for thread in threads) == [1] * 6 + [2] * 2
+    assert [thread['sort_key'] for thread in threads] == sorted((thread['sort_key'] for thread in threads), reverse=True)
+    thread = inbox.getThread('90000')
+    assert [message['message_nid'] for message in thread] == ['90000', '90002']
+    assert thread[1]['text'] == 'Reply to message 0'
+    assert inbox.getMessage('90002')['thread_nid'] == '90000'
+    assert inbox.getMessage('1') is None
+
+def testReopenedInboxKeepsItsMessages(edsby, tmpdir):
+    path = str(tmpdir.join('inbox.sqlite'))
+    inbox = Inbox(edsby, path)
+    inbox.sync()
+    inbox.close()
+
+    inbox = Inbox(edsby, path)
+    assert len(inbox) == 10
+    assert inbox.sync() == []
+    inbox.close()
@@ -0,0 +1,81 @@
+from edsby import EdsbyMirror
+
+
+def counts(stats, kind):
+    return dict((table, stats[table][kind]) for table in stats)
+
+def testFirstSyncInsertsEverything(edsby, data):
+    mirror = EdsbyMirror()
+    stats = mirror.sync(edsby)
+    assert set(stats) == set(['classes', 'averages', 'assignments', 'rosters', 'groups', 'feed_items', 'messages', 'calendar'])
+    assert stats['averages']['inserted'] == data.classes
+    assert stats['assignments']['inserted'] == data.classes * data.assignments
+    assert stats['feed_items']['inserted'] == data.classes * data.feedLength
+    assert stats['groups']['inserted'] == len(data.groupNIDs)
+    assert stats['messages']['inserted'] == 8
+    assert all(count == 0 for count in counts(stats, 'updated').values())
+    assert mirror.query('SELECT COUNT(*) FROM assignments')[0][0] == data.classes * data.assignments
+    assert set(mirror.getSyncState(edsby.studentData['nid'])) == set(EdsbyMirror.datasets)
+
+def testResyncOnlyWritesChanges(edsby, data):
+    mirror = EdsbyMirror()
+    mirror.sync(edsby)
+    stats = mirror.sync(edsby)
+    assert all(count == 0 for kind in ('inserted', 'updated', 'deleted') for count in counts(stats, kind).values())
+    assert stats['assignments']['unchanged'] == data.classes * data.assignments
+
+    classNID = data.classNIDs[0]
+    work = data.getBody('MyWork', classNID)
+    work['slices'][0]['data']['loaddata']['average'] = 12.5
+    data.setBody('MyWork', work, classNID)
+    feed = data.getBody('CourseFeed', classNID)
+    items = feed['slices'][0]['data']['item']
+    del items[sorted(items)[0]]
+    data.setBody('CourseFeed', feed, classNID)
+
+    stats = mirror.sync(edsby, ('averages', 'feeds'))
+    assert stats['averages'] == {'inserted': 0, 'updated': 1, 'deleted': 0, 'unchanged': data.classes - 1}
+    assert stats['feed_items'] == {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': data.classes * data.feedLength - 1}
+    assert mirror.query('SELECT average FROM averages WHERE class_nid = ?', (str(classNID), )) == [(12.5, )]
+    # Feeds are only fetched a page at a time, so items that dropped off it are kept
+    assert mirror.query('SELECT COUNT(*) FROM feed_items')[0][0] == data.classes * data.feedLength
+
+def testRosterChangesAreDeleted(edsby, data):
+    mirror = EdsbyMirror()
+    mirror.sync(edsby, ('rosters', ))
+    classNID = data.classNIDs[0]
+    roster = data.getBody('ClassStudentList', classNID)
+    items = roster['slices'][0]['data']['places']['item']
+    del items[sorted(items)[0]]
+    data.setBody('ClassStudentList', roster, classNID)
+    assert mirror.sync(edsby, ('rosters', ))['rosters']['deleted'] == 1
+
+def testItemsWithoutNIDsAreKeptApart(edsby, data):
+    classNID = data.classNIDs[0]
+    feed = data.getBody('CourseFeed', classNID)
+    for item in feed['slices'][0]['data']['item'].values():
+        del item['nid']
+    data.setBody('CourseFeed', feed, classNID)
+    mirror = EdsbyMirror()
+    assert mirror.sync(edsby, ('feeds', ))['feed_items']['inserted'] == data.classes * data.feedLength
+    assert mirror.query("SELECT COUNT(*) FROM feed_items WHERE item_nid = 'None'")[0][0] == 0
+    assert mirror.sync(edsby, ('feeds', ))['feed_items']['unchanged'] == data.classes * data.feedLength
+
+def testSyncLoadsTheCatalogOnce(login):
+    edsby = login(catalogTTL=0)
+    edsby.resetMetrics()
+    EdsbyMirror().sync(edsby)
+    metrics = edsby.getMetrics()
+    assert metrics['getRawCurrentClassData']['calls'] == 1 and metrics['getRawClassData']['calls'] == 1
+
+def testResyncFromDisk(edsby, data, tmpdir):
+    path = str(tmpdir.join('mirror.sqlite'))
+    mirror = EdsbyMirror(path)
+    mirror.sync(edsby, ('classes', 'rosters'))
+    mirror.close()
+
+    mirror = EdsbyMirror(path)
+    stats = mirror.sync(edsby, ('classes', 'rosters'))
+    assert stats['classes']['inserted'] == 0 and stats['classes']['unchanged'] == data.classes
+    assert stats['rosters']['inserted'] == 0 and stats['rosters']['unchanged'] > 0
+    mirror.close()
@@ -0,0 +1,41 @@
+from edsby import AssignmentPipeline
+
+
+def expectedLists(edsby):
+    classes = edsby.getCurrentClasses()
+    return dict((NID, edsby.getClassAssignmentList(NID, classes[NID]['rid'])) for NID in classes)
+
+def testThreadsByDefault(edsby, data):
+    assignmentLists = edsby.getCurrentClassAssignmentLists(maxWorkers=2)
+    assert assignmentLists == expectedLists(edsby)
+    assert all(len(assignmentLists[NID]['assignments']) == data.assignments for NID in data.classNIDs)
+
+def testProcessesGiveTheSameLists(edsby):
+    assert edsby.getCurrentClassAssignmentLists(maxWorkers=2, processes=True) == expectedLists(edsby)
+
+def testManyStudents(login, data):
+    students = [login(), login()]
+    expected = expectedLists(students[0])
+    results = list()
+    with AssignmentPipeline(fetchWorkers=4, parseWorkers=2, queueSize=2, processes=False) as pipeline:
+        for edsby, classNID, assignmentList, error in pipeline.iterStudents(students):
+            assert error is None
+            assert assignmentList == expected[classNID]
+            results.append((edsby, classNID))
+    assert sorted(NID for edsby, NID in results) == sorted(data.classNIDs * 2)
+    assert set(edsby for edsby, NID in results) == set(students)
+
+def testFailuresAreYielded(edsby, data):
+    jobs = [(edsby, data.classNIDs[0], data.classNIDs[0] + 1), (edsby, 1, 2)] # There's no class 1
+    with AssignmentPipeline(fetchWorkers=2, processes=False) as pipeline:
+        results = dict((job[1], (assignmentList, error)) for job, assignmentList, error in pipeline.run(jobs))
+    assert results[data.classNIDs[0]][1] is None and len(results[data.classNIDs[0]][0]['assignments']) == data.assignments
+    assert results[1][0] is None and results[1][1] is not None
+
+def testStoppingEarly(edsby, data):
+    jobs = [(edsby, NID, NID + 1) for NID in data.classNIDs] * 3
+    with AssignmentPipeline(fetchWorkers=2, queueSize=1, processes=False) as pipeline:
+        for result in pipeline.run(jobs):
+            break
+    # Closing the pipeline waited for the fetches still queued, which gave up rather than fetching
+    assert edsby.getMetrics()['getClassAssignmentScores']['calls'] < len(jobs)
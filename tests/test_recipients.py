@@ -0,0 +1,68 @@
+import threading
+
+from edsby import RecipientDirectory
+
+
+def matching(data, query):
+    return sorted(recipient['nid'] for recipient in data.recipients if query in recipient['name'].lower())
+
+def nids(recipients):
+    return sorted(recipient['nid'] for recipient in recipients)
+
+def lookups(edsby):
+    return edsby.getMetrics()['lookUpMessageRecipient']['calls']
+
+def testRepeatedLookupsAreCached(edsby, data):
+    directory = edsby.getRecipientDirectory()
+    assert nids(directory.lookup('a')) == matching(data, 'a')
+    assert nids(directory.lookup(' A ')) == matching(data, 'a') # Queries are normalized before being cached
+    assert lookups(edsby) == 1
+    assert directory.getStats() == {'cached': 1, 'local': 0, 'remote': 1, 'coalesced': 0}
+    assert directory.lookup('') == []
+
+    directory.invalidate()
+    directory.lookup('a')
+    assert lookups(edsby) == 2
+
+def testLongerQueriesAreFilteredLocally(edsby, data):
+    directory = RecipientDirectory(edsby, filterLocally=True)
+    name = data.recipients[0]['name'].lower()
+    directory.lookup(name[0])
+    assert nids(directory.lookup(name[:3])) == matching(data, name[:3])
+    assert lookups(edsby) == 1
+    assert directory.getStats()['local'] == 1
+
+def testCutShortResultsAreNotFilteredLocally(login, data):
+    data.recipientLimit = 5
+    edsby = login()
+    directory = RecipientDirectory(edsby, filterLocally=True)
+    name = data.recipients[0]['name'].lower()
+    assert len(directory.lookup(name[0])) == 5
+    assert nids(directory.lookup(name[:3])) == matching(data, name[:3])[:5]
+    assert lookups(edsby) == 2
+    assert directory.getStats()['local'] == 0
+
+def testLookupLaterOnlyLooksUpTheLastQuery(edsby, data):
+    directory = RecipientDirectory(edsby, debounce=0.2)
+    done = threading.Event()
+    calls = list()
+
+    def callback(query, recipients, error):
+        calls.append((query, nids(recipients), error))
+        done.set()
+    for query in ('a', 'ar', 'are'):
+        directory.lookupLater(query, callback)
+    assert done.wait(5)
+    assert calls == [('are', matching(data, 'are'), None)]
+    assert lookups(edsby) == 1
+
+def testLocalFilteringMatchesAnyPartOfNames(edsby, data):
+    data.recipients = [{'nid': 1, 'name': 'Sam Smith'}, {'nid': 2, 'name': 'Ann Smithers'}, {'nid': 3, 'name': 'Sima Jones'}, {'nid': 4, 'name': 'Tom Hill'}]
+    directory = RecipientDirectory(edsby, filterLocally=True)
+    assert nids(directory.lookup('s')) == [1, 2, 3]
+    assert nids(directory.lookup('sm')) == [1, 2]
+    assert nids(directory.lookup('smithe')) == [2]
+    assert nids(directory.lookup('sx')) == []
+    assert lookups(edsby) == 1
+    assert nids(directory.lookup('ones')) == [3] # Doesn't start with a cached query, so it's looked up
+    assert lookups(edsby) == 2
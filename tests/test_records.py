@@ -0,0 +1,33 @@
+from edsby import Assignment, Class, Classmate, FeedItem
+
+
+def testAssignmentsFromStandInData(edsby, data):
+    classNID = data.classNIDs[0]
+    classRID = edsby.getCurrentClasses()[classNID]['rid']
+    assignmentList = edsby.getClassAssignmentList(classNID, classRID)
+    assignments = Assignment.fromAssignmentList(assignmentList, classNID)
+    assert len(assignments) == len(assignmentList['assignments'])
+    assert all(assignment.classNID == classNID for assignment in assignments)
+    # raw gives back exactly what the record was made from
+    assert sorted((assignment.raw for assignment in assignments), key=lambda raw: raw['nid']) == sorted(assignmentList['assignments'].values(), key=lambda raw: raw['nid'])
+
+def testEqualRecordsHashTheSame(edsby, data):
+    classNID = data.classNIDs[0]
+    classRID = edsby.getCurrentClasses()[classNID]['rid']
+    first = Assignment.fromAssignmentList(edsby.getClassAssignmentList(classNID, classRID), classNID)
+    second = Assignment.fromAssignmentList(edsby.getClassAssignmentList(classNID, classRID), classNID, keepRaw=False)
+    assert sorted(first, key=lambda assignment: assignment.nid) == sorted(second, key=lambda assignment: assignment.nid)
+    assert set(first) == set(second) # Includes dict valued fields, like weighting
+    assert len(set(first + second)) == len(first)
+
+def testRecordsOfDifferentTypesAreNotEqual():
+    assert Classmate(nid=1) != FeedItem(nid=1)
+    assert len(set([Classmate(nid=1), FeedItem(nid=1), Classmate(nid=1)])) == 2
+
+def testClassesAndClassmates(edsby, data):
+    classes = Class.fromDicts(edsby.getCurrentClasses(), keepRaw=False)
+    assert sorted(record.nid for record in classes) == data.classNIDs
+    assert all(record.courseCode.startswith('C') for record in classes)
+    classmates = Classmate.fromRoster(edsby.getClassmates(data.classNIDs[0]))
+    assert len(classmates) > 0
+    assert all(classmate.name == classmate.firstName+' '+classmate.lastName for classmate in classmates)
@@ -0,0 +1,64 @@
+import json
+import pytest
+
+from edsby import Edsby, RecordingTransport, ReplayTransport, RequestError, RequestsTransport
+
+
+def record(server, path, calls):
+    edsby = Edsby(host=server.host, scheme='http', username='student', password='secret-password', transport=RecordingTransport(path, RequestsTransport()))
+    return [call(edsby) for call in calls]
+
+def replay(path, calls):
+    edsby = Edsby(host='offline.example.com', scheme='http', username='student', password='secret-password', transport=ReplayTransport(path))
+    return [call(edsby) for call in calls]
+
+def testRecordThenReplay(server, data, tmpdir):
+    path = str(tmpdir.join('cassette.jsonl'))
+    classNID = data.classNIDs[0]
+    calls = [
+        lambda edsby: edsby.getCurrentClassAverages(),
+        lambda edsby: dict((NID, assignment['score']) for NID, assignment in edsby.getClassAssignmentList(classNID, classNID + 1)['assignments'].items()),
+        lambda edsby: sorted(edsby.getClassFeed(classNID)['item']),
+        lambda edsby: list(edsby.iterDirectMessages())
+    ]
+    recorded = record(server, path, calls)
+    replayed = replay(path, calls)
+    assert replayed[:3] == recorded[:3] # Averages, scores and keys aren't scrubbed
+    assert [message['nid'] for message in replayed[3]] == [message['nid'] for message in recorded[3]]
+    assert set(message['author'] for message in replayed[3]) == set(['scrubbed'])
+    assert set(message['text'] for message in replayed[3]) == set(['scrubbed'])
+
+def testRepeatedRequestsAreServedInTurn(server, data, tmpdir):
+    path = str(tmpdir.join('cassette.jsonl'))
+    classNID = data.classNIDs[0]
+    edsby = Edsby(host=server.host, scheme='http', username='student', password='password', transport=RecordingTransport(path, RequestsTransport()))
+    first = edsby.getClassAverage(classNID)
+    work = data.getBody('MyWork', classNID)
+    work['slices'][0]['data']['loaddata']['average'] = 12.5
+    data.setBody('MyWork', work, classNID)
+    second = edsby.getClassAverage(classNID)
+
+    assert replay(path, [lambda edsby: [edsby.getClassAverage(classNID) for i in range(3)]]) == [[first, second, first]]
+
+def testCassetteIsScrubbed(server, data, tmpdir):
+    path = str(tmpdir.join('cassette.jsonl'))
+    record(server, path, [lambda edsby: edsby.getClassmates(data.classNIDs[0]), lambda edsby: edsby.lookUpMessageRecipient('smith'),
+                          lambda edsby: edsby.scrapeURLMetadata(data.classNIDs[0], 'https://example.com/private?token=abc')])
+    with open(path) as cassette:
+        text = cassette.read()
+    interactions = [json.loads(line) for line in text.splitlines()]
+    assert 'secret-password' not in text
+    assert 'stand-in-session' not in text and 'stand-in-guid' not in text
+    assert 'smith' not in text.lower()
+    urls = ' '.join(interaction['url'] for interaction in interactions)
+    assert 'example.com' not in urls and str(data.classNIDs[0]) not in urls
+    preview = [interaction for interaction in interactions if 'xds=bookMarkPreview' in interaction['url']][0]
+    assert preview['json']['slices'][0]['data']['href'] == 'scrubbed'
+    assert all(name not in text for name in data.lastNames)
+    assert any('xds=ClassStudentList' in interaction['url'] for interaction in interactions)
+
+def testUnrecordedRequestsRaise(server, tmpdir):
+    path = str(tmpdir.join('cassette.jsonl'))
+    record(server, path, [])
+    with pytest.raises(RequestError):
+        replay(path, [lambda edsby: edsby.getStudentGroups()])
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+
+def testRangeSkipsWeekends(edsby):
+    edsby.resetMetrics()
+    schedule = edsby.getScheduleRange('2017-04-03', '2017-04-09') # Monday to Sunday
+    assert len(schedule) == 5
+    assert edsby.getMetrics()['getSchedule']['calls'] == 5
+    assert len(edsby.getScheduleRange('2017-04-03', '2017-04-09', includeWeekends=True)) == 7
+
+def testDaysShareTheirPattern(edsby):
+    schedule = edsby.getScheduleRange('2017-04-03', '2017-04-28')
+    assert len(schedule) == 20
+    assert len(schedule.patterns) == 1
+
+def testWhatsNow(edsby, data):
+    schedule = edsby.getScheduleRange('2017-04-03', '2017-04-07')
+    period = schedule.at(datetime(2017, 4, 4, 9, 0))
+    assert (period.title, period.room, period.classNID) == ('Course 0', '101', data.classNIDs[0])
+    assert period.start == (datetime(2017, 4, 4, 8, 30) - datetime(1970, 1, 1)).total_seconds()
+    assert schedule.at(datetime(2017, 4, 4, 9, 47)) is None # Between periods
+    assert schedule.at(datetime(2017, 4, 8, 9, 0)) is None # Saturday
+    assert schedule.nextPeriod(datetime(2017, 4, 4, 9, 47)).title == 'Course 1'
+    assert schedule.nextPeriodStart(datetime(2017, 4, 4, 15, 0)) == datetime(2017, 4, 5, 8, 30)
+    assert schedule.nextPeriod(datetime(2017, 4, 7, 15, 0)) is None
+    assert [period.title for period in schedule.getDay('2017-04-05')] == ['Course 0', 'Course 1', 'Course 2', 'Course 3']
@@ -0,0 +1,55 @@
+from edsby import SearchIndex
+
+
+def testUpdateIndexesEverySource(edsby, data):
+    index = SearchIndex()
+    # Class and group feeds, recent activity, three news items, and the messages with their two replies
+    total = (data.classes + len(data.groupNIDs) + 1) * data.feedLength + 3 + 10
+    assert edsby.updateSearchIndex(index) == total
+    assert len(index) == total
+    assert edsby.updateSearchIndex(index) == 0 # Nothing new
+
+    assert len(index.search('"post 3"')) == data.classes + len(data.groupNIDs) + 1
+    assert len(index.search('"post 3"', kind='class')) == data.classes
+    assert len(index.search('"3 post"')) == 0 # Phrases must be in order
+    assert len(index.search('post 3', kind='group', sourceNID=data.groupNIDs[0])) == 1
+    assert len(index.search('post', kind='class', start='2017-04-05', end='2017-04-05 23:59:59')) == data.classes
+    assert len(index.search('news', author='OFFICE')) == 3
+
+    replies = index.search('"reply to message"', kind='message')
+    assert len(replies) == 2
+    assert all(reply['parent'] is not None and reply['parent'].startswith('message:') for reply in replies)
+
+def testEditedItemsReplaceTheirOldCopy(edsby, data):
+    index = SearchIndex()
+    edsby.updateSearchIndex(index, sources=('class', ))
+    classNID = data.classNIDs[0]
+    feed = data.getBody('CourseFeed', classNID)
+    item = feed['slices'][0]['data']['item'][sorted(feed['slices'][0]['data']['item'])[0]]
+    item['text'] = 'Edited: permission slips for the field trip'
+    data.setBody('CourseFeed', feed, classNID)
+
+    assert edsby.updateSearchIndex(index, sources=('class', )) == 1
+    assert len(index) == data.classes * data.feedLength
+    assert index.getStats()['replaced'] == 1
+    edited = index.search('"field trip"')
+    assert len(edited) == 1 and edited[0]['sourceNID'] == str(classNID)
+    assert len(index.search('post', sourceNID=classNID)) == data.feedLength - 1
+
+def testSaveAndLoad(tmpdir, edsby, data):
+    path = str(tmpdir.join('search.json.gz'))
+    index = SearchIndex(path)
+    edsby.updateSearchIndex(index)
+    feed = data.getBody('CourseFeed', data.classNIDs[0])
+    items = feed['slices'][0]['data']['item']
+    items[sorted(items)[0]]['text'] = 'Edited post'
+    data.setBody('CourseFeed', feed, data.classNIDs[0])
+    edsby.updateSearchIndex(index)
+    index.save()
+
+    loaded = SearchIndex(path)
+    assert len(loaded) == len(index)
+    assert loaded.getStats() == {'items': len(index), 'words': index.getStats()['words'], 'replaced': 0}
+    for query in ('"lorem ipsum lorem"', 'edited', '"reply to message"', 'school news'):
+        assert loaded.search(query) == index.search(query)
+    assert edsby.updateSearchIndex(loaded) == 0
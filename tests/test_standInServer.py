@@ -0,0 +1,25 @@
+import benchmark
+from standInServer import STUDENT_NID
+
+
+def testLoginAndClasses(edsby, data):
+    assert edsby.studentData['nid'] == STUDENT_NID
+    assert sorted(edsby.getCurrentClassNIDList()) == sorted(data.classNIDs)
+    assert edsby.getMetrics()['getSession']['errors'] == 0
+
+def testNotLoggedInIsRefused(server, edsby):
+    edsby.setCookies({})
+    response = edsby.http.get('http://'+server.host+'/core/node.json/2001?xds=Calendar')
+    assert response.status_code == 403
+
+def testBodiesCanBeReplaced(edsby, data):
+    classNID = data.classNIDs[0]
+    body = data.getBody('MyWork', classNID)
+    body['slices'][0]['data']['loaddata']['average'] = 42.5
+    data.setBody('MyWork', body, classNID)
+    assert edsby.getClassAverage(classNID) == 42.5
+
+def testBenchmarkSync(server, data):
+    result = benchmark.benchmarkSync(server.host, concurrency=2, syncs=3, maxWorkers=2)
+    assert result['count'] == 3
+    assert result['requests'] > 0
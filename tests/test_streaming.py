@@ -0,0 +1,54 @@
+import json
+import pytest, requests
+
+from edsby import _JSONPathStream, _walkItems
+
+
+def byteChunks(document, size):
+    encoded = json.dumps(document).encode('utf-8')
+    return [encoded[i:i + size] for i in range(0, len(encoded), size)]
+
+def testStreamedItemsMatchDecodedOnes(edsby, login, data):
+    streaming = login(streamThreshold=16) # Small enough that every response is streamed
+    classNID = data.classNIDs[0]
+    feed = edsby.getClassFeed(classNID)['item']
+    assert sorted(streaming.iterClassFeed(classNID), key=lambda item: item['nid']) == sorted(feed.values(), key=lambda item: item['nid'])
+    assert list(streaming.iterClassFeed(classNID)) == list(edsby.iterClassFeed(classNID))
+    assert dict(streaming.iterEndpointItems('getClassFeed', withKeys=True, classNID=classNID)) == feed
+    assert list(streaming.iterDirectMessages()) == list(edsby.getDirectMessages().values())
+    assert list(streaming.iterClassmates(classNID)) == list(edsby.getClassmates(classNID).values())
+    assert len(list(streaming.iterGroupFeed(data.groupNIDs[0]))) == data.feedLength
+
+def testStreamingCountsDecodedBytes(login, data):
+    streaming = login(streamThreshold=16)
+    list(streaming.iterClassFeed(data.classNIDs[0]))
+    metrics = streaming.getMetrics()['getClassFeed']
+    assert metrics['decodedBytes'] == len(data.nodeBodies[data.classNIDs[0]]['CourseFeed'])
+
+def testErrorStatusRaises(edsby):
+    with pytest.raises(requests.HTTPError):
+        list(edsby.iterClassFeed(1)) # The stand-in server has no class 1
+    assert edsby.getMetrics()['getClassFeed']['errors'] == 1
+
+def testMissingPathYieldsNothing(edsby, data):
+    url = edsby.getEndpointURL('getClassFeed', classNID=data.classNIDs[0])
+    assert list(edsby.iterResponseItems(url, ['slices', 0, 'data', 'nothing'])) == []
+
+@pytest.mark.parametrize('size', [1, 3, 7, 64, 100000])
+def testPathStreamAcrossChunkBoundaries(size):
+    document = {'skip': {'a': [1, 2, {'"}]': 'x\\"y'}], 'b': 'brace } and bracket ]'}, 'slices': [{'ignored': True}, {'data': {'item': {
+        'r1': {'nid': 1, 'text': 'café ☃ "quoted" \\ back'},
+        'r2': {'nid': 2, 'nested': {'item': [1.5, -2e3, None, False]}},
+        'r3': 'plain string'
+    }}}], 'after': 'tail'}
+    path = ['slices', 1, 'data', 'item']
+    assert list(_JSONPathStream(byteChunks(document, size)).items(path, withKeys=True)) == list(_walkItems(document, path, withKeys=True))
+
+def testPathStreamEdgeCases():
+    assert list(_JSONPathStream(byteChunks({'data': ''}, 4)).items(['data'])) == [] # Edsby's empty lists
+    assert list(_JSONPathStream(byteChunks({'data': []}, 4)).items(['data'])) == []
+    assert list(_JSONPathStream(byteChunks({'data': 5}, 4)).items(['data'])) == [5]
+    assert list(_JSONPathStream(byteChunks({'data': [1]}, 4)).items(['other'])) == []
+    assert list(_JSONPathStream(byteChunks([[0], [1, 2]], 2)).items([1])) == [1, 2]
+    with pytest.raises(ValueError):
+        list(_JSONPathStream([b'{"data": [1, 2']).items(['data']))
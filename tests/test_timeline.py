@@ -0,0 +1,24 @@
+from datetime import date
+
+
+def testMergesEverySource(edsby, data):
+    timeline = edsby.getUnifiedTimeline()
+    kinds = [event.kind for event in timeline]
+    assert kinds.count('class') == data.classes * 4
+    assert kinds.count('group') == len(data.groupNIDs) * 4
+    assert len(timeline) == data.classes * 4 + len(data.groupNIDs) * 4 + data.classes * 4 * 3
+    assert set(event.sourceNID for event in timeline if event.kind == 'class') == set(data.classNIDs)
+    assert [event.start for event in timeline] == sorted(event.start for event in timeline)
+
+def testSharedEntriesAreKeptOnce(edsby, data):
+    first, second = data.groupNIDs
+    data.setBody('CalendarPanel_Place', data.getBody('CalendarPanel_Place', first), second)
+    timeline = edsby.getUnifiedTimeline(includeClasses=False, includeStudentCalendar=False)
+    assert len(timeline) == 4
+
+def testSourcesCanBeLeftOut(edsby, data):
+    edsby.resetMetrics()
+    timeline = edsby.getUnifiedTimeline(includeGroups=False, includeStudentCalendar=False)
+    assert set(event.kind for event in timeline) == set(['class'])
+    assert 'getGroupCalendar' not in edsby.getMetrics()
+    assert len(timeline.onDay(date.today())) == data.classes
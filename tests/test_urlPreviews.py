@@ -0,0 +1,46 @@
+import json
+
+from edsby import URLPreviewCache
+
+URL = 'https://example.com/article'
+
+
+def scrapes(edsby):
+    return edsby.getMetrics().get('scrapeURLMetadata', {'calls': 0})['calls']
+
+def testLinksAreOnlyScrapedOnce(login, data):
+    cache = URLPreviewCache()
+    edsby = login(urlPreviewCache=cache)
+    formatted = edsby.getFormattedURLMetadataString(data.classNIDs[0], URL)
+    assert json.loads(formatted)['url'] == URL
+    for classNID in data.classNIDs: # Posting the same link to every class
+        assert edsby.getFormattedURLMetadataString(classNID, URL) == formatted
+        assert edsby.scrapeURLMetadata(classNID, URL)['title'] == 'Preview of '+URL
+    assert scrapes(edsby) == 1
+    assert cache.getStats() == {'hits': 2 * data.classes, 'scrapes': 1, 'coalesced': 0}
+
+    cache.invalidate(URL)
+    edsby.scrapeURLMetadata(data.classNIDs[0], URL)
+    assert scrapes(edsby) == 2
+
+def testCacheIsSharedAndOldestDropped(login, data):
+    cache = URLPreviewCache(maxEntries=2)
+    first, second = login(urlPreviewCache=cache), login(urlPreviewCache=cache)
+    first.scrapeURLMetadata(data.classNIDs[0], URL)
+    second.scrapeURLMetadata(data.classNIDs[0], URL)
+    assert scrapes(second) == 0
+    for i in range(2):
+        second.scrapeURLMetadata(data.classNIDs[0], URL+str(i))
+    assert len(cache) == 2
+    second.scrapeURLMetadata(data.classNIDs[0], URL)
+    assert scrapes(second) == 3
+
+def testCacheSurvivesRestarts(tmpdir, login, data):
+    path = str(tmpdir.join('previews.json'))
+    login(urlPreviewCache=URLPreviewCache(path=path)).scrapeURLMetadata(data.classNIDs[0], URL)
+
+    edsby = login(urlPreviewCache=URLPreviewCache(path=path))
+    assert edsby.scrapeURLMetadata(data.classNIDs[0], URL)['href'] == URL
+    assert scrapes(edsby) == 0
+
+    assert len(URLPreviewCache(path=path, ttl=0)) == 0 # Expired entries aren't loaded